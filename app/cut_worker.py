@@ -0,0 +1,43 @@
+"""The worker side of the parallel cut.
+
+The worker processes run under a bare python interpreter, see createCutExecutor.
+So this module only imports Part, FreeCAD's GUI modules, Draft and Arch are not
+available (and not needed) there.
+"""
+import time
+
+import Part
+
+
+def shapeFromBrep(brep):
+    shape = Part.Shape()
+    shape.importBrepFromString(brep)
+
+    return shape
+
+
+def cutBrepSolids(cutBrep, invcutBrep, solidBreps):
+    """Worker function for the parallel cut. Runs in a separate process.
+    Takes and returns BREP strings, as OCC shapes can't be pickled.
+    """
+    cutvolume = shapeFromBrep(cutBrep)
+    invcutvolume = None
+
+    if invcutBrep is not None:
+        invcutvolume = shapeFromBrep(invcutBrep)
+
+    results = []
+
+    for solidBrep in solidBreps:
+        start = time.perf_counter()
+        sol = shapeFromBrep(solidBrep)
+        c = sol.cut(cutvolume)
+        hiddenBrep = None
+
+        if invcutvolume is not None:
+            hiddenBrep = sol.cut(invcutvolume).exportBrepToString()
+
+        results.append((c.exportBrepToString(), hiddenBrep,
+                        time.perf_counter() - start))
+
+    return results
@@ -0,0 +1,126 @@
+import math
+
+
+def pointKey(point, precision):
+    return (round(point.x, precision), round(point.y, precision), round(point.z, precision))
+
+
+def chainEdges(edges, precision):
+    """Orders the edges into a single chain, using a hash of their end points.
+    Linear in the number of edges.
+    Returns a list of (edge, forward) tuples, forward tells if the edge is traversed from
+    its first to its last vertex. None, when the edges do not form a single chain.
+    """
+    ends = []
+    adjacency = {}
+
+    for i, e in enumerate(edges):
+        vertexes = e.Vertexes
+
+        if not vertexes:
+            return None
+
+        start = pointKey(vertexes[0].Point, precision)
+        end = pointKey(vertexes[-1].Point, precision)
+
+        ends.append((start, end))
+        adjacency.setdefault(start, []).append(i)
+
+        # closed edges (circles, ellipses) are only registered once
+        if end != start:
+            adjacency.setdefault(end, []).append(i)
+
+    # An open chain has to start at one of its ends
+    first = 0
+    firstForward = True
+
+    for key, indices in adjacency.items():
+        if len(indices) == 1:
+            first = indices[0]
+            firstForward = ends[first][0] == key
+            break
+
+    used = [False] * len(edges)
+    used[first] = True
+    chain = [(edges[first], firstForward)]
+    current = ends[first][1] if firstForward else ends[first][0]
+
+    for _ in range(len(edges) - 1):
+        nextIndex = None
+
+        for i in adjacency.get(current, []):
+            if not used[i]:
+                nextIndex = i
+                break
+
+        if nextIndex is None:
+            return None
+
+        used[nextIndex] = True
+        start, end = ends[nextIndex]
+        forward = start == current
+
+        chain.append((edges[nextIndex], forward))
+        current = end if forward else start
+
+    return chain
+
+
+def orderEdges(edges, precision):
+    """Returns the edges as a connected list of (edge, forward) tuples.
+    Falls back to Part.__sortEdges__ for edges that can't be chained by their end points,
+    e.g. when points straddle the rounding precision.
+    """
+    if len(edges) < 2:
+        return [(e, True) for e in edges]
+
+    chain = chainEdges(edges, precision)
+
+    if chain is not None:
+        return chain
+
+    import Part
+
+    return orientEdges(Part.__sortEdges__(edges))
+
+
+def orientEdges(edges):
+    """Finds the direction of already sorted edges. Every edge is traversed from the end point
+    nearest to the end of the previous edge, like chainEdges does, but without rounding.
+    """
+    if len(edges) < 2:
+        return [(e, True) for e in edges]
+
+    first = edges[0]
+    following = [v.Point for v in (edges[1].Vertexes[0], edges[1].Vertexes[-1])]
+    firstForward = (min([distance(first.Vertexes[-1].Point, p) for p in following])
+                    <= min([distance(first.Vertexes[0].Point, p) for p in following]))
+
+    chain = [(first, firstForward)]
+    current = getEndPoint(first, firstForward)
+
+    for e in edges[1:]:
+        forward = distance(e.Vertexes[0].Point, current) <= distance(e.Vertexes[-1].Point, current)
+
+        chain.append((e, forward))
+        current = getEndPoint(e, forward)
+
+    return chain
+
+
+def distance(a, b):
+    return math.sqrt((a.x - b.x) ** 2 + (a.y - b.y) ** 2 + (a.z - b.z) ** 2)
+
+
+def getStartPoint(edge, forward):
+    if forward:
+        return edge.Vertexes[0].Point
+
+    return edge.Vertexes[-1].Point
+
+
+def getEndPoint(edge, forward):
+    if forward:
+        return edge.Vertexes[-1].Point
+
+    return edge.Vertexes[0].Point
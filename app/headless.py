@@ -0,0 +1,141 @@
+"""Renders section planes without a GUI, e.g. on a build server.
+
+Usage:
+    FreeCADCmd app/headless.py --pass <document.FCStd> [SectionPlane ...] [--workers N]
+
+or, with the FreeCAD lib folder and the toolbox folder on the PYTHONPATH:
+    python -m app.headless <document.FCStd> [SectionPlane ...] [--workers N]
+
+Section planes can be given by name or label. When none is given, all SimpleSectionPlane
+objects of the document are rendered to their TargetFile.
+The exit code is 0 when all planes were written, 1 otherwise.
+"""
+import argparse
+import sys
+import zipfile
+import xml.etree.ElementTree as ElementTree
+
+import FreeCAD
+
+COLOR_PROPERTIES = ["ShapeColor", "LineColor"]
+
+
+def unpackColor(value):
+    "Converts a packed RGBA value, as stored in GuiDocument.xml, to a FreeCAD color tuple"
+    value = int(value)
+
+    return (((value >> 24) & 0xff) / 255.0,
+            ((value >> 16) & 0xff) / 255.0,
+            ((value >> 8) & 0xff) / 255.0,
+            (value & 0xff) / 255.0)
+
+
+def readStoredColors(fileName):
+    """Reads the view provider colors from the GuiDocument.xml inside the .FCStd file.
+    Returns a dict object name -> {property name: color}.
+    """
+    colors = {}
+
+    try:
+        with zipfile.ZipFile(fileName) as archive:
+            if not "GuiDocument.xml" in archive.namelist():
+                return colors
+
+            root = ElementTree.fromstring(archive.read("GuiDocument.xml"))
+    except (zipfile.BadZipFile, ElementTree.ParseError) as e:
+        print("Unable to read stored colors: %s" % (e, ))
+        return colors
+
+    for viewProvider in root.iter("ViewProvider"):
+        name = viewProvider.get("name")
+
+        for prop in viewProvider.iter("Property"):
+            if not prop.get("name") in COLOR_PROPERTIES:
+                continue
+
+            color = prop.find("PropertyColor")
+
+            if color is not None and color.get("value") is not None:
+                colors.setdefault(name, {})[prop.get("name")] = unpackColor(
+                    color.get("value"))
+
+    return colors
+
+
+def findSectionPlanes(doc, names):
+    from app import section_batch
+
+    planes = [o for o in doc.Objects if section_batch.isSectionPlane(o)]
+
+    if not names:
+        return (planes, [])
+
+    selected = []
+    missing = []
+
+    for name in names:
+        matches = [p for p in planes if p.Name == name or p.Label == name]
+
+        if matches:
+            selected.extend(matches)
+        else:
+            missing.append(name)
+
+    return (selected, missing)
+
+
+def getArguments(argv):
+    "FreeCADCmd passes everything after --pass to the script"
+    if "--pass" in argv:
+        return argv[argv.index("--pass") + 1:]
+
+    return argv[1:]
+
+
+def main(argv):
+    from app import section_batch
+
+    parser = argparse.ArgumentParser(
+        description="Renders section planes of a FreeCAD document to their target files")
+    parser.add_argument("document", help="The .FCStd file to open")
+    parser.add_argument("planes", nargs="*",
+                        help="Names or labels of the section planes to render. All when omitted")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Number of worker processes for the boolean cuts")
+
+    args = parser.parse_args(getArguments(argv))
+
+    try:
+        doc = FreeCAD.openDocument(args.document)
+    except Exception as e:
+        print("Unable to open %s: %s" % (args.document, e))
+        return 1
+
+    try:
+        planes, missing = findSectionPlanes(doc, args.planes)
+
+        for name in missing:
+            print("No section plane named %s" % (name, ))
+
+        if not planes:
+            print("No section planes to render")
+            return 1
+
+        shared = section_batch.SharedSectionData(
+            readStoredColors(args.document))
+        timings = section_batch.exportSections(
+            planes, cutWorkers=args.workers, shared=shared)
+
+        if missing or [t for t in timings if t.error]:
+            return 1
+
+        return 0
+    except Exception as e:
+        print("Rendering failed: %s" % (e, ))
+        return 1
+    finally:
+        FreeCAD.closeDocument(doc.Name)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
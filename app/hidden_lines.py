@@ -0,0 +1,181 @@
+import DraftGeomUtils
+import numpy
+
+from app.spatial_index import RTree
+
+# Maximum distance between a curved hidden edge and its polyline
+HIDDEN_EDGE_DEFLECTION = 1.0
+EPSILON = 1e-9
+
+
+def discretizeEdge(edge):
+    "Returns the points of an edge, curved edges are approximated by a polyline"
+    if len(edge.Vertexes) < 2 or DraftGeomUtils.geomType(edge) == "Line":
+        return [v.Point for v in edge.Vertexes]
+
+    try:
+        return edge.discretize(QuasiDeflection=HIDDEN_EDGE_DEFLECTION)
+    except Exception:
+        return [v.Point for v in edge.Vertexes]
+
+
+def buildSectionIndex(faces):
+    "Builds a RTree of the polygons of the given FaceData objects"
+    return RTree([(f.polygon.getBounds(), f.polygon) for f in faces
+                  if f is not None and f.polygon is not None])
+
+
+def segmentCrossings(p0, p1, ring):
+    "Returns the parameters (0 < t < 1) where the segment p0-p1 crosses the edges of the ring"
+    d = p1 - p0
+    r0 = ring
+    e = numpy.roll(ring, -1, axis=0) - ring
+    w = r0 - p0
+
+    denominator = d[0] * e[:, 1] - d[1] * e[:, 0]
+    valid = numpy.abs(denominator) > EPSILON
+
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        t = (w[:, 0] * e[:, 1] - w[:, 1] * e[:, 0]) / denominator
+        u = (w[:, 0] * d[1] - w[:, 1] * d[0]) / denominator
+
+    valid &= (t > EPSILON) & (t < 1 - EPSILON) & (
+        u >= -EPSILON) & (u <= 1 + EPSILON)
+
+    return t[valid]
+
+
+def clipSegment(p0, p1, polygons):
+    """Removes the parts of the segment p0-p1 inside any of the polygons.
+    Returns a list of (start, end) parameter ranges of the visible parts.
+    """
+    crossings = [0.0, 1.0]
+
+    for polygon in polygons:
+        for ring in polygon.rings:
+            crossings.extend(segmentCrossings(p0, p1, ring).tolist())
+
+    parameters = numpy.unique(numpy.array(crossings))
+    middles = (parameters[:-1] + parameters[1:]) / 2
+    points = p0 + numpy.outer(middles, p1 - p0)
+
+    hidden = numpy.zeros(len(points), dtype=bool)
+
+    for polygon in polygons:
+        hidden |= polygon.containsPoints(points)
+
+    return [(parameters[i], parameters[i + 1]) for i in range(len(middles)) if not hidden[i]]
+
+
+def cullPolyline(polyline, index):
+    """Removes the parts of the polyline covered by the polygons of the index.
+    Returns a list of the visible polylines and the number of completely hidden segments.
+    """
+    visible = []
+    current = None
+    culled = 0
+
+    for i in range(len(polyline) - 1):
+        p0 = polyline[i]
+        p1 = polyline[i + 1]
+        bounds = (min(p0[0], p1[0]), min(p0[1], p1[1]),
+                  max(p0[0], p1[0]), max(p0[1], p1[1]))
+        polygons = index.query(bounds)
+
+        if polygons:
+            ranges = clipSegment(p0, p1, polygons)
+        else:
+            ranges = [(0.0, 1.0)]
+
+        for start, end in ranges:
+            startPoint = p0 + (p1 - p0) * start
+            endPoint = p0 + (p1 - p0) * end
+
+            # Continue the current polyline, when the visible part is connected to it
+            if current is not None and start == 0.0 and numpy.array_equal(current[-1], startPoint):
+                current.append(endPoint)
+            else:
+                current = [startPoint, endPoint]
+                visible.append(current)
+
+        if not ranges:
+            culled += 1
+
+        if not ranges or ranges[-1][1] != 1.0:
+            current = None
+
+    return ([numpy.array(v) for v in visible], culled)
+
+
+def cullPolylines(polylines, index):
+    "Culls all polylines, returns (visible polylines, number of culled segments)"
+    if len(index) == 0:
+        return (polylines, 0)
+
+    visible = []
+    culled = 0
+
+    for polyline in polylines:
+        visiblePolylines, culledSegments = cullPolyline(polyline, index)
+        visible.extend(visiblePolylines)
+        culled += culledSegments
+
+    return (visible, culled)
+
+
+def clipSegmentToRectangle(p0, p1, bounds):
+    "Liang-Barsky clipping. Returns the (start, end) parameters of the part inside, or None"
+    start = 0.0
+    end = 1.0
+    d = p1 - p0
+
+    for delta, offset, low, high in ((d[0], p0[0], bounds[0], bounds[2]), (d[1], p0[1], bounds[1], bounds[3])):
+        if abs(delta) < EPSILON:
+            if offset < low or offset > high:
+                return None
+
+            continue
+
+        t0 = (low - offset) / delta
+        t1 = (high - offset) / delta
+
+        if t0 > t1:
+            t0, t1 = t1, t0
+
+        start = max(start, t0)
+        end = min(end, t1)
+
+        if start > end:
+            return None
+
+    return (start, end)
+
+
+def clipPolylineToRectangle(polyline, bounds):
+    "Returns the parts of the polyline inside the rectangle as list of polylines"
+    visible = []
+    current = None
+
+    for i in range(len(polyline) - 1):
+        p0 = polyline[i]
+        p1 = polyline[i + 1]
+        clipped = clipSegmentToRectangle(p0, p1, bounds)
+
+        if clipped is None:
+            current = None
+            continue
+
+        start, end = clipped
+        startPoint = p0 + (p1 - p0) * start
+        endPoint = p0 + (p1 - p0) * end
+
+        if current is not None and start == 0.0:
+            current.append(endPoint)
+        else:
+            current = [startPoint, endPoint]
+            visible.append(current)
+
+        if end != 1.0:
+            current = None
+
+    return [numpy.array(v) for v in visible]
@@ -0,0 +1,64 @@
+import app.section_observer as section_observer
+
+
+class ClassificationCache:
+    """Remembers values computed from a single object, until the object changes.
+
+    The values are stored per object and key, together with the revision of the object
+    reported by the section observer. Any change of the object gives it a new revision,
+    so the value is computed again on the next access.
+    The values of deleted objects and closed documents are dropped.
+    """
+
+    def __init__(self, observer=None):
+        self.observer = observer
+        # (document name, object name) -> {key: (revision, value)}
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def getObserver(self):
+        if self.observer is None:
+            self.observer = section_observer.getObserver()
+
+        self.observer.addListener(self)
+
+        return self.observer
+
+    def get(self, o, key, compute):
+        "Returns the cached value of compute(o) for the key"
+        revision = self.getObserver().getObjectRevision(o)
+        values = self.entries.setdefault((o.Document.Name, o.Name), {})
+        entry = values.get(key)
+
+        if entry is not None and entry[0] == revision:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        value = compute(o)
+        values[key] = (revision, value)
+
+        return value
+
+    def forgetObject(self, documentName, name):
+        self.entries.pop((documentName, name), None)
+
+    def forgetDocument(self, documentName):
+        for entryKey in [k for k in self.entries if k[0] == documentName]:
+            del self.entries[entryKey]
+
+    def clear(self):
+        self.entries = {}
+
+
+_classifier = None
+
+
+def getClassifier():
+    global _classifier
+
+    if _classifier is None:
+        _classifier = ClassificationCache()
+
+    return _classifier
@@ -0,0 +1,164 @@
+import Draft
+
+import app.section_observer as section_observer
+
+
+class GroupExpansion:
+    "The contents of a group, as returned by Draft.getGroupContents, without the group itself"
+
+    def __init__(self, contents):
+        self.contents = contents
+        self.names = set([o.Name for o in contents])
+
+
+class ObjectResolver:
+    """Resolves the IncludeObjects and ExcludeObjects lists of section planes.
+
+    The expansion of every included group is kept until the group or one of the objects
+    in it changes. Changes are taken from the section observer, so unchanged
+    BuildingParts are not walked again on the next render.
+    Every object is added once, also when it is reachable through several groups.
+    """
+
+    def __init__(self, observer=None):
+        self.observer = observer
+        # document name -> (revision of the last validation, {group name: GroupExpansion})
+        self.documents = {}
+
+    def getObserver(self):
+        if self.observer is None:
+            self.observer = section_observer.getObserver()
+
+        return self.observer
+
+    def resolve(self, includeList, excludeList):
+        "Returns the objects to process, in the order they are reached"
+        excluded = set([o.Name for o in excludeList])
+        seen = set()
+        objectsToProcess = []
+
+        for o in includeList:
+            if not self.add(o, excluded, seen, objectsToProcess):
+                continue
+
+            # The expansion already holds all nested contents, so it is only walked one level deep
+            for child in self.getContents(o):
+                self.add(child, excluded, seen, objectsToProcess)
+
+        return objectsToProcess
+
+    def add(self, o, excluded, seen, objectsToProcess):
+        """Adds the object, or the slabs of a floor builder.
+        Returns True, when the contents of the object have to be added as well.
+        """
+        if o.Name in excluded or o.Name in seen:
+            return False
+
+        seen.add(o.Name)
+
+        if hasattr(o, "Slabs") and o.Slabs is not None:
+            for s in o.Slabs:
+                if not s.Name in seen:
+                    seen.add(s.Name)
+                    objectsToProcess.append(s)
+
+            return False
+
+        objectsToProcess.append(o)
+
+        return True
+
+    def getContents(self, o):
+        expansions = self.getExpansions(o.Document)
+
+        if not o.Name in expansions:
+            expansions[o.Name] = GroupExpansion(self.expand(o))
+
+        return expansions[o.Name].contents
+
+    def getExpansions(self, doc):
+        "Returns the valid expansions of the document, dropping the ones touched by a change"
+        observer = self.getObserver()
+        revision, expansions = self.documents.get(doc.Name, (observer.revision, {}))
+
+        if revision != observer.revision:
+            changed = observer.changedSince(doc, revision)
+            expansions = dict([(name, expansion) for name, expansion in expansions.items()
+                               if not name in changed and expansion.names.isdisjoint(changed)])
+
+        self.documents[doc.Name] = (observer.revision, expansions)
+
+        return expansions
+
+    def expand(self, o):
+        """Returns the contents of the group like Draft.getGroupContents(walls=True, addgroups=True).
+        Every group is walked once, so groups containing themselves do not recurse forever.
+        """
+        contents = []
+        names = set([o.Name])
+
+        if isGroup(o):
+            self.expandGroup(o, set(), [], contents, names)
+        else:
+            addWindows(o, contents, names)
+
+        return contents
+
+    def expandGroup(self, group, visited, path, contents, names):
+        visited.add(group.Name)
+        path.append(group.Name)
+
+        for child in group.Group:
+            if child is None:
+                continue
+
+            if not isGroup(child):
+                addObject(child, contents, names)
+                addWindows(child, contents, names)
+            elif child.Name in path:
+                print("%s contains itself, it is only walked once" % (child.Label, ))
+            else:
+                addObject(child, contents, names)
+
+                # A group reached through several parents has been walked already
+                if not child.Name in visited:
+                    self.expandGroup(child, visited, path, contents, names)
+
+        path.pop()
+
+    def clear(self):
+        self.documents = {}
+
+
+def isGroup(o):
+    "Tells, if Draft.getGroupContents walks into the object"
+    if o.isDerivedFrom("App::DocumentObjectGroup"):
+        return True
+
+    return Draft.getType(o) in ["App::Part", "Building", "BuildingPart", "Space", "Site"] and hasattr(o, "Group")
+
+
+def addObject(o, contents, names):
+    if not o.Name in names:
+        names.add(o.Name)
+        contents.append(o)
+
+
+def addWindows(o, contents, names):
+    "Windows are not in any group, they are hosted by walls and structures"
+    if Draft.getType(o) in ["Wall", "Structure"]:
+        for hosted in o.OutList:
+            if Draft.getType(hosted) == "Window":
+                addObject(hosted, contents, names)
+
+
+_resolver = None
+
+
+def getResolver():
+    global _resolver
+
+    if _resolver is None:
+        _resolver = ObjectResolver()
+
+    return _resolver
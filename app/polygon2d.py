@@ -0,0 +1,312 @@
+import numpy
+
+
+class Polygon2D:
+    """A projected face, stored as plain coordinate arrays instead of an OCC face.
+
+    rings is a list of Nx2 arrays. The first ring is the outer wire, all others are holes.
+    The rings are open, the last point is not repeated.
+    reversed tells, that the face normal points in the opposite direction of the
+    ring orientation. It is only needed, when an OCC face is built from the polygon.
+    """
+
+    def __init__(self, rings, reversed=False):
+        self.rings = rings
+        self.reversed = reversed
+        self.bounds = None
+
+    @staticmethod
+    def fromPoints(points, ringSizes):
+        """Builds a polygon from a Nx2 (or Nx3) array of points of all rings.
+        ringSizes contains the number of points of every ring, the first ring is the outer one.
+        Rings with less than 3 distinct points are degenerated, such holes are skipped.
+        Returns None, when the outer ring is degenerated.
+        """
+        rings = []
+        start = 0
+
+        for i, size in enumerate(ringSizes):
+            ring = numpy.array(points[start:start + size, 0:2], dtype=float)
+            start += size
+
+            if isValidRing(ring):
+                rings.append(ring)
+            elif i == 0:
+                return None
+
+        if not rings:
+            return None
+
+        return Polygon2D(rings)
+
+    def getBounds(self):
+        "Returns (minx, miny, maxx, maxy) of the polygon"
+        if self.bounds is None:
+            outer = self.rings[0]
+            minimum = outer.min(axis=0)
+            maximum = outer.max(axis=0)
+
+            # holes are inside the outer ring, but be on the safe side with invalid faces
+            for ring in self.rings[1:]:
+                minimum = numpy.minimum(minimum, ring.min(axis=0))
+                maximum = numpy.maximum(maximum, ring.max(axis=0))
+
+            self.bounds = (float(minimum[0]), float(minimum[1]),
+                           float(maximum[0]), float(maximum[1]))
+
+        return self.bounds
+
+    def getPoints(self, precision=5):
+        "Returns all points of all rings as rounded tuples"
+        return [tuple(p) for ring in self.rings for p in numpy.round(ring, precision).tolist()]
+
+    def pointCount(self):
+        return sum([len(ring) for ring in self.rings])
+
+    def getCentroid(self):
+        """Returns the area centroid (x, y) of the polygon, holes are subtracted.
+        Falls back to the average of the outer points for degenerated polygons.
+        """
+        totalArea = 0
+        cx = 0
+        cy = 0
+
+        for i, ring in enumerate(self.rings):
+            area, x, y = ringAreaAndCentroid(ring)
+            area = abs(area)
+
+            if i > 0:
+                area = -area
+
+            totalArea += area
+            cx += x * area
+            cy += y * area
+
+        if abs(totalArea) < 1e-12:
+            center = self.rings[0].mean(axis=0)
+            return (float(center[0]), float(center[1]))
+
+        return (cx / totalArea, cy / totalArea)
+
+    def containsPoints(self, points):
+        """Returns a boolean array, telling which of the Nx2 points lie inside the polygon.
+        Uses the even-odd rule over all rings, so points inside holes are outside.
+        Points exactly on the border may end up on either side.
+        """
+        points = numpy.asarray(points, dtype=float)
+        inside = numpy.zeros(len(points), dtype=bool)
+
+        for ring in self.rings:
+            inside ^= pointsInRing(points, ring)
+
+        return inside
+
+    def containsPolygon(self, other):
+        """Tells, if the other polygon lies completely inside this polygon.
+        All points and edge midpoints of the outer ring have to be inside or on the border,
+        and none of its edges may cross the rings of this polygon.
+        No hole of this polygon may lie inside the other polygon either.
+        """
+        bounds = self.getBounds()
+        otherBounds = other.getBounds()
+
+        if (otherBounds[0] < bounds[0] or otherBounds[1] < bounds[1]
+                or otherBounds[2] > bounds[2] or otherBounds[3] > bounds[3]):
+            return False
+
+        outer = other.rings[0]
+        middles = (outer + numpy.roll(outer, -1, axis=0)) / 2
+        points = numpy.concatenate([outer, middles])
+
+        inside = self.containsPoints(points)
+
+        if not inside.all():
+            for ring in self.rings:
+                inside |= pointsOnRing(points, ring)
+
+            if not inside.all():
+                return False
+
+        for ring in self.rings:
+            if ringsCross(outer, ring):
+                return False
+
+        # A hole completely inside the other polygon leaves all of its points and edges outside
+        for hole in self.rings[1:]:
+            if (pointsInRing(hole, outer) & ~pointsOnRing(hole, outer)).any():
+                return False
+
+        return True
+
+    def clipToRectangle(self, bounds):
+        """Clips all rings to the rectangle (minx, miny, maxx, maxy) (Sutherland-Hodgman).
+        Returns the polygon itself when it lies completely inside, None when nothing is left.
+        """
+        minx, miny, maxx, maxy = self.getBounds()
+
+        if minx >= bounds[0] and miny >= bounds[1] and maxx <= bounds[2] and maxy <= bounds[3]:
+            return self
+
+        if minx > bounds[2] or maxx < bounds[0] or miny > bounds[3] or maxy < bounds[1]:
+            return None
+
+        rings = []
+
+        for i, ring in enumerate(self.rings):
+            clipped = clipRingToRectangle(ring, bounds)
+
+            if len(clipped) < 3:
+                if i == 0:
+                    return None
+
+                continue
+
+            rings.append(clipped)
+
+        return Polygon2D(rings, self.reversed)
+
+    def toFace(self):
+        "Builds an OCC face from the polygon. Only use it, when a real face is needed"
+        import FreeCAD
+        import Part
+        import ArchCommands
+
+        wires = []
+
+        for ring in self.rings:
+            verts = [FreeCAD.Vector(x, y, 0) for x, y in ring.tolist()]
+            verts.append(verts[0])
+
+            wires.append(Part.makePolygon(verts))
+
+        face = ArchCommands.makeFace(wires)
+
+        if self.reversed:
+            face.reverse()
+
+        return face
+
+
+def isValidRing(ring):
+    "A ring needs at least 3 distinct points to enclose an area"
+    return len(ring) >= 3 and len(numpy.unique(ring, axis=0)) >= 3
+
+
+def ringAreaAndCentroid(ring):
+    "Returns the signed area and the centroid of a closed ring (shoelace formula)"
+    x = ring[:, 0]
+    y = ring[:, 1]
+    nextX = numpy.roll(x, -1)
+    nextY = numpy.roll(y, -1)
+
+    cross = x * nextY - nextX * y
+    area = cross.sum() / 2
+
+    if abs(area) < 1e-12:
+        return (0.0, float(x.mean()), float(y.mean()))
+
+    cx = ((x + nextX) * cross).sum() / (6 * area)
+    cy = ((y + nextY) * cross).sum() / (6 * area)
+
+    return (float(area), float(cx), float(cy))
+
+
+def pointsInRing(points, ring):
+    "Even-odd test of the Nx2 points against a single closed ring"
+    x = points[:, 0:1]
+    y = points[:, 1:2]
+    x0 = ring[:, 0]
+    y0 = ring[:, 1]
+    x1 = numpy.roll(x0, -1)
+    y1 = numpy.roll(y0, -1)
+
+    crosses = (y0 > y) != (y1 > y)
+
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        xIntersection = x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+
+    return (crosses & (x < xIntersection)).sum(axis=1) % 2 == 1
+
+
+def clipRingToRectangle(ring, bounds):
+    "Clips a closed ring to a rectangle, returns a Nx2 array"
+    minx, miny, maxx, maxy = bounds
+    # (axis, limit, keep the side above the limit)
+    sides = [(0, minx, True), (0, maxx, False), (1, miny, True), (1, maxy, False)]
+    points = ring.tolist()
+
+    for axis, limit, above in sides:
+        if not points:
+            break
+
+        def inside(p):
+            if above:
+                return p[axis] >= limit
+
+            return p[axis] <= limit
+
+        def intersection(a, b):
+            t = (limit - a[axis]) / (b[axis] - a[axis])
+
+            return [a[0] + (b[0] - a[0]) * t, a[1] + (b[1] - a[1]) * t]
+
+        clipped = []
+        previous = points[-1]
+
+        for current in points:
+            if inside(current):
+                if not inside(previous):
+                    clipped.append(intersection(previous, current))
+
+                clipped.append(current)
+            elif inside(previous):
+                clipped.append(intersection(previous, current))
+
+            previous = current
+
+        points = clipped
+
+    return numpy.array(points, dtype=float).reshape(-1, 2)
+
+
+def pointsOnRing(points, ring, epsilon=1e-6):
+    "Tells, which of the Nx2 points lie on an edge of the closed ring"
+    start = ring[None, :, :]
+    direction = (numpy.roll(ring, -1, axis=0) - ring)[None, :, :]
+    offset = points[:, None, :] - start
+
+    lengths = (direction ** 2).sum(axis=2)
+
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        t = numpy.clip((offset * direction).sum(axis=2) / lengths, 0, 1)
+
+    t = numpy.where(lengths > 0, t, 0)
+    closest = start + t[:, :, None] * direction
+    distances = ((points[:, None, :] - closest) ** 2).sum(axis=2)
+
+    return (distances <= epsilon * epsilon).any(axis=1)
+
+
+def ringsCross(ringA, ringB, epsilon=1e-9):
+    "Tells, if any edge of the closed ring A properly crosses an edge of the closed ring B"
+    a0 = ringA[:, None, :]
+    da = (numpy.roll(ringA, -1, axis=0) - ringA)[:, None, :]
+    b0 = ringB[None, :, :]
+    db = (numpy.roll(ringB, -1, axis=0) - ringB)[None, :, :]
+    w = b0 - a0
+
+    denominator = da[:, :, 0] * db[:, :, 1] - da[:, :, 1] * db[:, :, 0]
+
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        t = (w[:, :, 0] * db[:, :, 1] - w[:, :, 1] * db[:, :, 0]) / denominator
+        u = (w[:, :, 0] * da[:, :, 1] - w[:, :, 1] * da[:, :, 0]) / denominator
+
+    crossing = ((numpy.abs(denominator) > epsilon)
+                & (t > epsilon) & (t < 1 - epsilon)
+                & (u > epsilon) & (u < 1 - epsilon))
+
+    return bool(crossing.any())
+
+
+def signedArea(ring):
+    return ringAreaAndCentroid(ring)[0]
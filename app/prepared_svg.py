@@ -0,0 +1,65 @@
+import re
+
+from app.section_vector_renderer import PATTERN_NUMBER_REGEX, toNumberString
+
+
+def buildPlaceholderRegex(names):
+    "Longer names first, so SMALL_TEXT_FONT_SIZE is not taken for TEXT_FONT_SIZE"
+    names = sorted(names, key=len, reverse=True)
+
+    return re.compile('(%s)' % ('|'.join([re.escape(n) for n in names]), ))
+
+
+class PreparedSvg:
+    """The svg parts of a section, split at their scale dependent placeholders once.
+
+    The parts are kept as lists of alternating text chunks and placeholder names.
+    Writing a scale and page size only joins the chunks with the values for that scale,
+    nothing is searched or replaced again.
+    """
+
+    def __init__(self, template, parts, patternSvg, placeholders):
+        """template contains the names of the parts and the page slots (see write).
+        parts maps a part name to its svg, placeholders are the names replaced inside the parts.
+        """
+        slotRegex = buildPlaceholderRegex(
+            list(parts.keys()) + ["PATTERN_SVG", "WIDTH", "HEIGHT", "VIEWBOX_VALUES", "INFORMATION_SVG"])
+        placeholderRegex = buildPlaceholderRegex(placeholders)
+
+        self.template = slotRegex.split(template)
+        self.parts = dict([(name, placeholderRegex.split(svg))
+                           for name, svg in parts.items()])
+        self.patterns = PATTERN_NUMBER_REGEX.split(patternSvg)
+
+        # The pattern numbers are parsed once, they are divided by the scale on write
+        for i in range(1, len(self.patterns), 2):
+            self.patterns[i] = float(self.patterns[i])
+
+    def write(self, fileObject, scale, values, slots):
+        """Writes the document for one scale.
+        values maps the placeholders to their values at that scale.
+        slots holds the values of WIDTH, HEIGHT, VIEWBOX_VALUES and INFORMATION_SVG.
+        """
+        for i, chunk in enumerate(self.template):
+            if i % 2 == 0:
+                fileObject.write(chunk)
+            elif chunk in self.parts:
+                self.writePart(fileObject, self.parts[chunk], values)
+            elif chunk == "PATTERN_SVG":
+                self.writePatterns(fileObject, scale)
+            else:
+                fileObject.write(slots[chunk])
+
+    def writePart(self, fileObject, chunks, values):
+        for i, chunk in enumerate(chunks):
+            if i % 2 == 0:
+                fileObject.write(chunk)
+            else:
+                fileObject.write(values[chunk])
+
+    def writePatterns(self, fileObject, scale):
+        for i, chunk in enumerate(self.patterns):
+            if i % 2 == 0:
+                fileObject.write(chunk)
+            else:
+                fileObject.write(toNumberString(chunk / scale, 6))
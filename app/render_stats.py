@@ -0,0 +1,166 @@
+import json
+import os
+import threading
+import time
+
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class ObjectTiming:
+    "Time spent for a single object of a render"
+
+    def __init__(self, passName, name):
+        self.passName = passName
+        self.name = name
+        self.cut = 0
+        self.project = 0
+        self.solids = 0
+        self.faces = 0
+        self.edges = 0
+        self.vertexes = 0
+
+    def total(self):
+        return self.cut + self.project
+
+    def toDict(self):
+        return OrderedDict([
+            ("name", self.name),
+            ("pass", self.passName),
+            ("seconds", self.total()),
+            ("cut", self.cut),
+            ("project", self.project),
+            ("solids", self.solids),
+            ("faces", self.faces),
+            ("edges", self.edges),
+            ("vertexes", self.vertexes)
+        ])
+
+
+class RenderStats:
+    """Collects wall time, call counts and counters of a single render.
+
+    Stages can be nested, the totals are stored per stage name.
+    Every stage run is also kept as event, so the render can be viewed as Chrome trace.
+    """
+
+    def __init__(self):
+        self.startTime = time.perf_counter()
+        self.stages = OrderedDict()
+        self.counters = OrderedDict()
+        self.objects = OrderedDict()
+        self.events = []
+
+    @contextmanager
+    def stage(self, name):
+        # keeps the stages in the order they were started
+        self.stages.setdefault(name, (0, 0))
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.addStage(name, start, end)
+
+    def addStage(self, name, start, end):
+        seconds, calls = self.stages.get(name, (0, 0))
+        self.stages[name] = (seconds + end - start, calls + 1)
+
+        self.events.append({
+            "name": name,
+            "cat": "section",
+            "ph": "X",
+            "ts": (start - self.startTime) * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident()
+        })
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def getObject(self, passName, name):
+        key = (passName, name)
+
+        if not key in self.objects:
+            self.objects[key] = ObjectTiming(passName, name)
+
+        return self.objects[key]
+
+    def slowestObjects(self, limit=10):
+        objects = sorted(self.objects.values(),
+                         key=lambda o: o.total(), reverse=True)
+
+        return objects[0:limit]
+
+    def formatSlowestObjects(self, limit=10, heavyFaceCount=None, labels=None):
+        """Returns a text report of the slowest objects.
+        Objects with more than heavyFaceCount faces are marked as heavy.
+        labels can map object names to the labels to show.
+        """
+        lines = ["%-30s %-8s %9s %9s %9s %8s" %
+                 ("Object", "Pass", "Total", "Cut", "Project", "Faces")]
+
+        for o in self.slowestObjects(limit):
+            name = o.name
+
+            if labels and o.name in labels:
+                name = labels[o.name]
+
+            line = "%-30s %-8s %8.3fs %8.3fs %8.3fs %8s" % (
+                name, o.passName, o.total(), o.cut, o.project, o.faces)
+
+            if heavyFaceCount and o.faces > heavyFaceCount:
+                line += "  heavy, refine the shape or enable SimplifyHeavyShapes"
+
+            lines.append(line)
+
+        return "\n".join(lines)
+
+    def toDict(self, limit=10):
+        stages = OrderedDict([(name, OrderedDict([("seconds", seconds), ("calls", calls)]))
+                              for name, (seconds, calls) in self.stages.items()])
+
+        return OrderedDict([
+            ("stages", stages),
+            ("counters", self.counters),
+            ("slowestObjects", [o.toDict() for o in self.slowestObjects(limit)])
+        ])
+
+    def toJson(self, limit=10, indent=None):
+        return json.dumps(self.toDict(limit), indent=indent)
+
+    def writeJson(self, fileName, limit=None):
+        "Writes the statistics. When limit is None, all objects are written"
+        if limit is None:
+            limit = len(self.objects)
+
+        with open(fileName, "w") as file_object:
+            file_object.write(self.toJson(limit, indent=2))
+
+    def writeChromeTrace(self, fileName):
+        "Writes the stage events in the Chrome trace format (chrome://tracing, Perfetto)"
+        with open(fileName, "w") as file_object:
+            json.dump({
+                "traceEvents": self.events,
+                "displayTimeUnit": "ms",
+                "otherData": {"counters": self.counters}
+            }, file_object)
+
+    def write(self, fileName):
+        "Writes a Chrome trace when the file name ends with .trace.json, the statistics otherwise"
+        if fileName.lower().endswith(".trace.json"):
+            self.writeChromeTrace(fileName)
+        else:
+            self.writeJson(fileName)
+
+    def __str__(self):
+        lines = ["%s: %.3f s (%s calls)" % (name, seconds, calls)
+                 for name, (seconds, calls) in self.stages.items()]
+        lines.extend(["%s: %s" % (name, value)
+                      for name, value in self.counters.items()])
+        lines.extend(["%s (%s): %.3f s, %s faces" % (o.name, o.passName, o.total(), o.faces)
+                      for o in self.slowestObjects()])
+
+        return "\n".join(lines)
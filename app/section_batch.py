@@ -0,0 +1,173 @@
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+import app.section_plane as section_plane
+import app.section_vector_renderer as section_vector_renderer
+
+
+class SharedSectionData:
+    """Data shared between the section planes of a batch export.
+
+    The include/exclude resolution is done once per distinct combination of lists,
+    and the shape of every object is only extracted once, no matter how many planes render it.
+    """
+
+    def __init__(self, storedColors=None):
+        self.filteredObjects = {}
+        self.shapeEntries = {}
+        # Colors read from the document file, used when there are no ViewObjects
+        self.storedColors = storedColors
+
+    def filterObjects(self, includeList, excludeList):
+        key = (tuple([o.Name for o in includeList]),
+               tuple([o.Name for o in excludeList]))
+
+        if not key in self.filteredObjects:
+            self.filteredObjects[key] = section_plane.filterObjects(
+                includeList, excludeList)
+
+        return self.filteredObjects[key]
+
+    def getShapeEntry(self, o):
+        if not o.Name in self.shapeEntries:
+            self.shapeEntries[o.Name] = section_vector_renderer.getShapeEntry(
+                o, self.storedColors)
+
+        return self.shapeEntries[o.Name]
+
+
+class PlaneTiming:
+    "Time spent for the different stages of a single section plane"
+
+    def __init__(self, plane):
+        self.label = plane.Label
+        self.target = plane.TargetFile
+        self.prepare = 0
+        self.cut = 0
+        self.write = 0
+        self.error = None
+
+    def total(self):
+        return self.prepare + self.cut + self.write
+
+    def __str__(self):
+        if self.error:
+            return "%s: failed (%s)" % (self.label, self.error)
+
+        return "%s: %.2f s (prepare %.2f s, cut %.2f s, write %.2f s) -> %s" % (
+            self.label, self.total(), self.prepare, self.cut, self.write, self.target)
+
+
+def isSectionPlane(o):
+    return hasattr(o, 'Proxy') and hasattr(o.Proxy, 'Type') and o.Proxy.Type == 'SimpleSectionPlane'
+
+
+def exportSections(planes, cutWorkers=0, shared=None):
+    """Renders all section planes and writes each of them to its TargetFile.
+
+    Object resolution and shape extraction are shared between the planes.
+    When cutWorkers is greater than 1, one process pool is shared by all planes and
+    the cuts of the planes run concurrently.
+    A plane failing does not stop the export of the others, the error is stored in its timing.
+    Returns a list of PlaneTiming objects.
+    """
+    if shared is None:
+        shared = SharedSectionData()
+
+    executor = None
+    timings = []
+    jobs = []
+
+    if cutWorkers > 1:
+        executor = section_vector_renderer.createCutExecutor(cutWorkers)
+
+    try:
+        # The document objects are only accessed here and while writing, both in the main thread.
+        # prepareRender reads all settings of the cut, cutRender only works on the renderer.
+        for plane in planes:
+            timing = PlaneTiming(plane)
+            timings.append(timing)
+
+            if not plane.TargetFile:
+                timing.error = "no TargetFile set"
+                continue
+
+            start = time.time()
+
+            try:
+                job = plane.Proxy.prepareRender(
+                    plane, shared=shared, executor=executor, cutWorkers=cutWorkers)
+            except Exception as e:
+                timing.error = str(e)
+                continue
+            finally:
+                timing.prepare = time.time() - start
+
+            if job is None:
+                timing.error = "nothing to render"
+                continue
+
+            jobs.append((plane, job, timing))
+
+        # The cuts only work on shapes, the worker threads mostly wait for the process pool
+        if executor is not None and len(jobs) > 1:
+            with ThreadPoolExecutor(max_workers=len(jobs)) as threads:
+                futures = [threads.submit(timeCut, plane, job)
+                           for plane, job, timing in jobs]
+
+                for (plane, job, timing), future in zip(jobs, futures):
+                    try:
+                        timing.cut = future.result()
+                    except Exception as e:
+                        timing.error = str(e)
+        else:
+            for plane, job, timing in jobs:
+                try:
+                    timing.cut = timeCut(plane, job)
+                except Exception as e:
+                    timing.error = str(e)
+
+        for plane, job, timing in jobs:
+            if timing.error:
+                continue
+
+            start = time.time()
+
+            try:
+                writePlane(plane, job)
+            except Exception as e:
+                timing.error = str(e)
+            finally:
+                timing.write = time.time() - start
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    for timing in timings:
+        print(timing)
+
+    print("Exported %s of %s section planes in %.2f s" %
+          (len([t for t in timings if not t.error]), len(timings), sum([t.total() for t in timings])))
+
+    return timings
+
+
+def timeCut(plane, job):
+    start = time.time()
+    plane.Proxy.cutRender(job)
+
+    return time.time() - start
+
+
+def writePlane(plane, job):
+    proxy = plane.Proxy
+    proxy.completeRender(job)
+
+    file_object = open(plane.TargetFile, "w")
+
+    try:
+        proxy.writeSvg(file_object, width=plane.DocumentWidth.Value,
+                       height=plane.DocumentHeight.Value, scale=plane.Scale)
+    finally:
+        file_object.close()
@@ -0,0 +1,253 @@
+import hashlib
+import json
+import os
+import numpy
+
+from collections import OrderedDict
+
+import FreeCAD
+import Part
+
+import app.section_observer as section_observer
+
+from app.polygon2d import Polygon2D
+from app.section_vector_renderer import FaceData, ObjectCutResult, shapeFromBrep
+
+CACHE_FORMAT_VERSION = 3
+
+
+def shapeHash(shape):
+    "Returns a hash of the shape content. Two shapes with the same geometry and placement get the same hash"
+    return hashlib.sha1(shape.exportBrepToString().encode("utf-8")).hexdigest()
+
+
+def getCacheFile(obj):
+    """Returns the path of the on disk cache for the section plane.
+    The file is stored next to the .FCStd file. None, when the document was not saved yet.
+    """
+    fileName = obj.Document.FileName
+
+    if not fileName:
+        return None
+
+    return "%s.%s.sectioncache" % (os.path.splitext(fileName)[0], obj.Name)
+
+
+class CutResultCache:
+    """A LRU cache of per object cut results.
+
+    The key consists of the name of the object, its revision reported by the section observer,
+    its color and pattern type and the cut settings of the section plane (see Renderer.buildCutKey).
+    Every change of the object gives it a new revision, so unchanged objects reuse their faces
+    without exporting or hashing their shapes.
+
+    Revisions are only valid during a session. When the cache is persistent, the content hash of
+    every cut shape is kept for save. Results loaded from a file are matched by that hash,
+    on the first miss of the object.
+    """
+
+    def __init__(self, maxEntries=2000, documentName=None, persistent=False, observer=None):
+        self.maxEntries = maxEntries
+        self.documentName = documentName
+        self.persistent = persistent
+        self.observer = observer
+        self.entries = OrderedDict()
+        # key -> content hash of the shape, only filled when persistent
+        self.contentHashes = {}
+        # (name, content hash, color, pattern type, cut key) -> result, read from the file
+        self.storedEntries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def getObserver(self):
+        if self.observer is None:
+            self.observer = section_observer.getObserver()
+
+        return self.observer
+
+    def buildKey(self, shapeEntry, cutKey):
+        shape, color, patternType, name = shapeEntry[:4]
+        revision = self.getObserver().getRevision(self.documentName, name)
+
+        return (name, revision, tuple(color), patternType, cutKey)
+
+    def get(self, key, shape=None):
+        "Returns the result for the key. The shape is only used to look up results read from a file"
+        result = self.entries.get(key)
+
+        if result is None and self.storedEntries and shape is not None:
+            contentHash = shapeHash(shape)
+            result = self.storedEntries.pop(self.getStoredKey(key, contentHash), None)
+
+            if result is not None:
+                self.put(key, result)
+                self.contentHashes[key] = contentHash
+
+        if result is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+
+        return result
+
+    def put(self, key, result, shape=None):
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+
+        if self.persistent and shape is not None:
+            self.contentHashes[key] = shapeHash(shape)
+
+        self.resize(self.maxEntries)
+
+    def getStoredKey(self, key, contentHash):
+        name, revision, color, patternType, cutKey = key
+
+        return (name, contentHash, color, patternType, cutKey)
+
+    def resize(self, maxEntries):
+        self.maxEntries = maxEntries
+
+        while len(self.entries) > self.maxEntries:
+            key, result = self.entries.popitem(last=False)
+            self.contentHashes.pop(key, None)
+
+    def clear(self):
+        self.entries.clear()
+        self.contentHashes.clear()
+        self.storedEntries.clear()
+
+    def resetStatistics(self):
+        self.hits = 0
+        self.misses = 0
+
+    def save(self, path):
+        """Writes all results with a known content hash as JSON, the shapes as BREP strings.
+        Results read from the file and not used yet are written again.
+        """
+        entries = []
+
+        for key, contentHash in self.contentHashes.items():
+            entries.append((self.getStoredKey(key, contentHash), self.entries[key]))
+
+        entries.extend(self.storedEntries.items())
+
+        data = {
+            "version": CACHE_FORMAT_VERSION,
+            "entries": [{"key": list(storedKey), "result": serializeResult(result)}
+                        for storedKey, result in entries[-self.maxEntries:]]
+        }
+
+        temporaryPath = path + ".tmp"
+
+        with open(temporaryPath, "w") as file_object:
+            json.dump(data, file_object)
+
+        os.replace(temporaryPath, path)
+
+    def load(self, path):
+        """Reads the results written by save. They are used, when an object with the same
+        name, shape content, color, pattern type and cut settings is cut.
+        Returns False, when there is no valid file of the current version.
+        """
+        if not os.path.isfile(path):
+            return False
+
+        try:
+            with open(path, "r") as file_object:
+                data = json.load(file_object)
+
+            if not isinstance(data, dict) or data.get("version") != CACHE_FORMAT_VERSION:
+                return False
+
+            storedEntries = {}
+
+            for entry in data["entries"]:
+                storedEntries[readStoredKey(entry["key"])] = deserializeResult(entry["result"])
+        except Exception as e:
+            FreeCAD.Console.PrintWarning("Unable to read section cache %s: %s\n" % (path, e))
+            return False
+
+        self.storedEntries = storedEntries
+
+        return True
+
+
+def toTuple(value):
+    "JSON turns tuples into lists, the keys need them back as tuples"
+    if isinstance(value, list):
+        return tuple([toTuple(v) for v in value])
+
+    return value
+
+
+def readStoredKey(key):
+    "Validates a key read from a cache file, raises ValueError when it is malformed"
+    if not isinstance(key, list) or len(key) != 5:
+        raise ValueError("invalid cache key %r" % (key, ))
+
+    name, contentHash, color, patternType, cutKey = key
+
+    if (not isinstance(name, str) or not isinstance(contentHash, str) or len(contentHash) != 40
+            or not isinstance(color, list) or not all(isinstance(c, (int, float)) for c in color)
+            or not (patternType is None or isinstance(patternType, str))
+            or not isinstance(cutKey, list)):
+        raise ValueError("invalid cache key %r" % (key, ))
+
+    return (name, contentHash, tuple(color), patternType, toTuple(cutKey))
+
+
+def toBrep(shape):
+    if shape is None:
+        return None
+
+    return shape.exportBrepToString()
+
+
+def fromBrep(brep):
+    if brep is None:
+        return None
+
+    return shapeFromBrep(brep)
+
+
+def serializeFaceData(face):
+    polygon = None
+
+    if face.polygon is not None:
+        polygon = ([ring.tolist() for ring in face.polygon.rings], face.polygon.reversed)
+
+    return (toBrep(face.originalFace), polygon, tuple(face.color), face.pattern_type)
+
+
+def deserializeFaceData(data):
+    originalFace, polygon, color, patternType = data
+
+    if polygon is not None:
+        rings, reversed = polygon
+        polygon = Polygon2D([numpy.array(ring, dtype=float) for ring in rings], reversed)
+
+    return FaceData(fromBrep(originalFace), tuple(color), patternType, polygon=polygon)
+
+
+def serializeResult(result):
+    return {
+        "objectShapes": [[toBrep(sh[0])] + list(sh[1:]) for sh in result.objectShapes],
+        "sections": [serializeFaceData(f) for f in result.sections],
+        "faces": [serializeFaceData(f) for f in result.faces],
+        "hiddenEdges": toBrep(Part.Compound(result.hiddenEdges)) if result.hiddenEdges else None
+    }
+
+
+def deserializeResult(data):
+    hiddenEdges = []
+
+    if data["hiddenEdges"] is not None:
+        hiddenEdges = fromBrep(data["hiddenEdges"]).Edges
+
+    return ObjectCutResult(
+        objectShapes=[[fromBrep(sh[0]), tuple(sh[1])] + list(sh[2:]) for sh in data["objectShapes"]],
+        sections=[deserializeFaceData(f) for f in data["sections"]],
+        faces=[deserializeFaceData(f) for f in data["faces"]],
+        hiddenEdges=hiddenEdges)
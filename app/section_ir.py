@@ -0,0 +1,311 @@
+"""A compact binary intermediate representation of a prepared render.
+
+It holds everything the 2D output needs: the projected rings, color, pattern type, layer and
+depth of every face, the hidden lines and the section cut lines. Exporting another scale, page
+size or format from it is a pure 2D operation, no shape is cut again.
+
+Layout (little endian), every array starts at a multiple of 8 bytes:
+
+    header              HEADER
+    string table        STRING_COUNT + utf-8 bytes per string, index 0 is the source key
+    faces               FACE_DTYPE[faceCount]
+    ring sizes          uint32[ringCount]
+    points              float64[pointCount, 2]
+    polyline sizes      uint32[polylineCount]
+    polyline points     float64[polylinePointCount, 2]
+    section cuts        SECTION_CUT_DTYPE[sectionCutCount]
+
+Writing and reading the arrays only needs numpy, FreeCAD is imported when a renderer is built.
+
+The file is read into memory with a single read, the arrays are views into that buffer.
+The file itself is closed right away, so it can be replaced by the next write, also on Windows.
+"""
+import os
+import struct
+
+import numpy
+
+from app.polygon2d import Polygon2D
+
+MAGIC = b"SCIR"
+FORMAT_VERSION = 1
+
+# magic, version, reserved, plane base (3), plane rotation quaternion (4),
+# strings, faces, rings, points, polylines, polyline points, section cuts
+HEADER = struct.Struct("<4sHH7d7I")
+STRING_SIZE = struct.Struct("<I")
+
+LAYERS = ["sections", "secondaryFaces", "windows"]
+NO_PATTERN = 0xFFFF
+
+FACE_DTYPE = numpy.dtype([
+    ("layer", "<u1"),
+    ("reversed", "<u1"),
+    ("pattern", "<u2"),
+    ("rings", "<u4"),
+    ("color", "<f8", (4, )),
+    ("depth", "<f8")
+])
+
+SECTION_CUT_DTYPE = numpy.dtype([
+    ("start", "<f8", (3, )),
+    ("end", "<f8", (3, )),
+    ("normal", "<f8", (3, )),
+    ("text", "<u4"),
+    ("reserved", "<u4")
+])
+
+
+def getIntermediateFile(obj):
+    """Returns the path of the intermediate file of the section plane.
+    The file is stored next to the .FCStd file. None, when the document was not saved yet.
+    """
+    fileName = obj.Document.FileName
+
+    if not fileName:
+        return None
+
+    return "%s.%s.sectionir" % (os.path.splitext(fileName)[0], obj.Name)
+
+
+def padding(size):
+    return b"\0" * (-size % 8)
+
+
+class StringTable:
+    def __init__(self):
+        self.strings = []
+        self.indexes = {}
+
+    def add(self, value):
+        if not value in self.indexes:
+            self.indexes[value] = len(self.strings)
+            self.strings.append(value)
+
+        return self.indexes[value]
+
+    def toBytes(self):
+        data = []
+
+        for value in self.strings:
+            encoded = value.encode("utf-8")
+            data.append(STRING_SIZE.pack(len(encoded)))
+            data.append(encoded)
+
+        data = b"".join(data)
+
+        return data + padding(len(data))
+
+
+def writeIntermediate(path, render, sourceKey):
+    """Writes the faces, hidden lines and section cuts of a prepared renderer.
+    sourceKey identifies the objects and settings the render was made from, see readIntermediate.
+    The file is replaced atomically, a failed write leaves the old file untouched.
+    """
+    render.prepareSvg()
+
+    strings = StringTable()
+    strings.add(sourceKey)
+
+    faces = []
+    ringSizes = []
+    points = []
+
+    for layerIndex, layer in enumerate(LAYERS):
+        for f in getattr(render, layer):
+            if not f or f.polygon is None:
+                continue
+
+            color = list(f.color)[0:4]
+            color += [0.0] * (4 - len(color))
+            pattern = NO_PATTERN
+
+            if f.pattern_type is not None:
+                pattern = strings.add(f.pattern_type)
+
+            faces.append((layerIndex, int(bool(f.polygon.reversed)), pattern,
+                          len(f.polygon.rings), color, render.getFaceDepth(f)))
+            ringSizes.extend([len(ring) for ring in f.polygon.rings])
+            points.extend(f.polygon.rings)
+
+    sectionCuts = []
+
+    for edge, normal, text in render.sectionCuts:
+        start = edge.Vertexes[0].Point
+        end = edge.Vertexes[-1].Point
+
+        sectionCuts.append(((start.x, start.y, start.z), (end.x, end.y, end.z),
+                            (normal.x, normal.y, normal.z), strings.add(text), 0))
+
+    polylines = render.hiddenLines
+
+    faceArray = numpy.array(faces, dtype=FACE_DTYPE)
+    ringArray = numpy.array(ringSizes, dtype="<u4")
+    pointArray = numpy.concatenate(points).astype("<f8") if points else numpy.zeros((0, 2), dtype="<f8")
+    polylineSizes = numpy.array([len(p) for p in polylines], dtype="<u4")
+    polylinePoints = numpy.concatenate(polylines).astype("<f8") if polylines else numpy.zeros((0, 2), dtype="<f8")
+    sectionCutArray = numpy.array(sectionCuts, dtype=SECTION_CUT_DTYPE)
+
+    placement = render.wp.getPlacement()
+    base = placement.Base
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, 0, base.x, base.y, base.z, *placement.Rotation.Q,
+                         len(strings.strings), len(faceArray), len(ringArray), len(pointArray),
+                         len(polylineSizes), len(polylinePoints), len(sectionCutArray))
+
+    temporaryPath = path + ".tmp"
+
+    with open(temporaryPath, "wb") as file_object:
+        file_object.write(header)
+        file_object.write(padding(len(header)))
+        file_object.write(strings.toBytes())
+
+        for array in (faceArray, ringArray, pointArray, polylineSizes, polylinePoints, sectionCutArray):
+            data = array.tobytes()
+            file_object.write(data)
+            file_object.write(padding(len(data)))
+
+    try:
+        os.replace(temporaryPath, path)
+    except OSError:
+        os.remove(temporaryPath)
+        raise
+
+
+class IntermediateReader:
+    "Reads an intermediate file into a buffer and gives access to its arrays without copying them"
+
+    def __init__(self, path):
+        with open(path, "rb") as file_object:
+            self.buffer = file_object.read()
+
+        values = HEADER.unpack_from(self.buffer, 0)
+
+        if values[0] != MAGIC or values[1] != FORMAT_VERSION:
+            raise ValueError("%s is no section intermediate file of version %s" % (path, FORMAT_VERSION))
+
+        self.base = values[3:6]
+        self.rotation = values[6:10]
+        stringCount, faceCount, ringCount, pointCount, polylineCount, polylinePointCount, sectionCutCount = values[10:17]
+
+        self.offset = HEADER.size + len(padding(HEADER.size))
+        self.strings = self.readStrings(stringCount)
+        self.faces = self.readArray(FACE_DTYPE, faceCount)
+        self.ringSizes = self.readArray("<u4", ringCount)
+        self.points = self.readArray("<f8", pointCount * 2).reshape((pointCount, 2))
+        self.polylineSizes = self.readArray("<u4", polylineCount)
+        self.polylinePoints = self.readArray(
+            "<f8", polylinePointCount * 2).reshape((polylinePointCount, 2))
+        self.sectionCuts = self.readArray(SECTION_CUT_DTYPE, sectionCutCount)
+
+    def readStrings(self, count):
+        strings = []
+        start = self.offset
+
+        for _ in range(count):
+            size, = STRING_SIZE.unpack_from(self.buffer, self.offset)
+            self.offset += STRING_SIZE.size
+            strings.append(bytes(self.buffer[self.offset:self.offset + size]).decode("utf-8"))
+            self.offset += size
+
+        self.offset += len(padding(self.offset - start))
+
+        return strings
+
+    def readArray(self, dtype, count):
+        array = numpy.frombuffer(self.buffer, dtype=dtype, count=count, offset=self.offset)
+        self.offset += array.nbytes + len(padding(array.nbytes))
+
+        return array
+
+    def getSourceKey(self):
+        return self.strings[0]
+
+    def iterFaces(self):
+        "Yields (layer name, Polygon2D, color, pattern type, depth) in the stored order"
+        ringIndex = 0
+        pointIndex = 0
+
+        for record in self.faces:
+            rings = []
+
+            for size in self.ringSizes[ringIndex:ringIndex + record["rings"]]:
+                rings.append(self.points[pointIndex:pointIndex + size])
+                pointIndex += size
+
+            ringIndex += record["rings"]
+
+            patternType = None
+
+            if record["pattern"] != NO_PATTERN:
+                patternType = self.strings[record["pattern"]]
+
+            polygon = Polygon2D(rings, bool(record["reversed"]))
+
+            yield (LAYERS[record["layer"]], polygon, tuple(record["color"].tolist()), patternType,
+                   float(record["depth"]))
+
+    def getPolylines(self):
+        polylines = []
+        start = 0
+
+        for size in self.polylineSizes:
+            polylines.append(self.polylinePoints[start:start + size])
+            start += size
+
+        return polylines
+
+    def getSectionCuts(self):
+        "Returns the section cuts in the form of Renderer.sectionCuts"
+        import FreeCAD
+        import Part
+
+        sectionCuts = []
+
+        for record in self.sectionCuts:
+            start = FreeCAD.Vector(*record["start"].tolist())
+            end = FreeCAD.Vector(*record["end"].tolist())
+            normal = FreeCAD.Vector(*record["normal"].tolist())
+
+            sectionCuts.append((Part.LineSegment(start, end).toShape(),
+                                normal, self.strings[record["text"]]))
+
+        return sectionCuts
+
+
+def readIntermediate(path, placement, sourceKey, stats=None, markers=()):
+    """Builds a renderer from an intermediate file, ready to write svg.
+    Markers are not stored, they are added from the given marker objects.
+    Returns None, when there is no file or it was made from other objects or settings.
+    """
+    import FreeCAD
+
+    from app.section_vector_renderer import FaceData, Renderer
+
+    if not path or not os.path.isfile(path):
+        return None
+
+    try:
+        reader = IntermediateReader(path)
+    except Exception as e:
+        FreeCAD.Console.PrintWarning("Unable to read section intermediate file %s: %s\n" % (path, e))
+        return None
+
+    if reader.getSourceKey() != sourceKey:
+        return None
+
+    render = Renderer(placement, stats=stats)
+    render.addMarkers(markers)
+
+    for layer, polygon, color, patternType, depth in reader.iterFaces():
+        getattr(render, layer).append(FaceData(None, color, patternType, polygon=polygon, depth=depth))
+
+    render.hiddenLines = reader.getPolylines()
+    render.sectionCuts = reader.getSectionCuts()
+
+    # The stored faces are already cut, sorted and cleaned up
+    render.iscut = True
+    render.sorted = True
+    render.duplicatesRemoved = True
+
+    return render
@@ -0,0 +1,104 @@
+import FreeCAD
+
+
+class SectionChangeObserver:
+    """Document observer, that records which objects changed.
+
+    Every change increases a revision counter. Section planes remember the revision
+    of their last render and ask for all objects changed since then.
+    Section planes watching a set of objects are touched, when one of these objects changes,
+    so they are recomputed on the next document recompute.
+    Caches added as listeners are told to forget deleted objects and documents.
+    """
+
+    def __init__(self):
+        self.revision = 0
+        self.changes = {}
+        self.watchers = {}
+        self.listeners = []
+
+    def slotCreatedObject(self, obj):
+        self.recordChange(obj)
+
+    def slotChangedObject(self, obj, prop):
+        self.recordChange(obj)
+
+    def slotDeletedObject(self, obj):
+        self.recordChange(obj)
+
+        if obj.Document is not None:
+            for listener in self.listeners:
+                listener.forgetObject(obj.Document.Name, obj.Name)
+
+    def slotDeletedDocument(self, doc):
+        self.changes.pop(doc.Name, None)
+        self.watchers.pop(doc.Name, None)
+
+        for listener in self.listeners:
+            listener.forgetDocument(doc.Name)
+
+    def addListener(self, listener):
+        "The listener needs the methods forgetObject(documentName, name) and forgetDocument(documentName)"
+        if not listener in self.listeners:
+            self.listeners.append(listener)
+
+    def recordChange(self, obj):
+        doc = obj.Document
+
+        if doc is None:
+            return
+
+        self.revision += 1
+        self.changes.setdefault(doc.Name, {})[obj.Name] = self.revision
+
+        self.notifyWatchers(doc, obj.Name)
+
+    def notifyWatchers(self, doc, name):
+        watchers = self.watchers.get(doc.Name)
+
+        if not watchers:
+            return
+
+        for planeName, names in watchers.items():
+            if planeName == name or not name in names:
+                continue
+
+            plane = doc.getObject(planeName)
+
+            if plane is not None and not "Touched" in plane.State:
+                plane.touch()
+
+    def changedSince(self, doc, revision):
+        "Returns the names of all objects of the document, that changed after the given revision"
+        changes = self.changes.get(doc.Name, {})
+
+        return set([name for name, rev in changes.items() if rev > revision])
+
+    def getObjectRevision(self, obj):
+        "Returns the revision of the last change of the object. 0 when no change was recorded"
+        return self.getRevision(obj.Document.Name, obj.Name)
+
+    def getRevision(self, documentName, name):
+        "Same as getObjectRevision, for the object with the given name in the named document"
+        return self.changes.get(documentName, {}).get(name, 0)
+
+    def watch(self, plane, names):
+        "Touches the plane, whenever one of the objects with the given names changes"
+        self.watchers.setdefault(plane.Document.Name, {})[plane.Name] = set(names)
+
+    def unwatch(self, plane):
+        self.watchers.get(plane.Document.Name, {}).pop(plane.Name, None)
+
+
+_observer = None
+
+
+def getObserver():
+    "Returns the observer, registering it with FreeCAD on first use"
+    global _observer
+
+    if _observer is None:
+        _observer = SectionChangeObserver()
+        FreeCAD.addDocumentObserver(_observer)
+
+    return _observer
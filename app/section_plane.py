@@ -1,10 +1,24 @@
 import FreeCAD
 import Draft
+import hashlib
+import io
 import math
+import os
 import WorkingPlane
 
 import app.section_vector_renderer as section_vector_renderer
+import app.section_cache as section_cache
+import app.section_ir as section_ir
+import app.section_observer as section_observer
+import app.object_resolver as object_resolver
+import app.object_classifier as object_classifier
+import app.svg_writer as svg_writer
+import app.svg_optimizer as svg_optimizer
+import app.prepared_svg as prepared_svg
+import app.shape_simplifier as shape_simplifier
+from app.render_stats import RenderStats
 from app.section_vector_renderer import toNumberString
+from app.spatial_index import boundsIntersect
 
 from FreeCAD import Vector
 
@@ -59,31 +73,40 @@ def isOriented(obj, plane):
 
 
 def filterObjects(includeList, excludeList):
-    objectsToProcess = []
+    "Returns the included objects and the contents of included groups, without the excluded ones"
+    return object_resolver.getResolver().resolve(includeList, excludeList)
 
-    for o in includeList:
-        if o in excludeList:
-            continue
 
-        if hasattr(o, "Slabs") and o.Slabs is not None:
-            for s in o.Slabs:
-                objectsToProcess.append(s)
+ANNOTATION_TYPES = ["Dimension", "Annotation", "Label", "DraftText"]
+TYPES_TO_IGNORE = ["BuildingPart", "Group"]
 
-            continue
 
-        objectsToProcess.append(o)
+def classifyObject(o):
+    """Returns the group of the object: spaces, annotations, drafts, windows or objects.
+    None for objects, that are not rendered. Annotations only become drafts, when they face the plane.
+    """
+    objectType = Draft.getType(o)
 
-        groupObjects = Draft.getGroupContents(
-            [o], walls=True, addgroups=True)
+    if objectType == "Space":
+        return "spaces"
+    elif objectType in ANNOTATION_TYPES:
+        return "annotations"
+    elif o.isDerivedFrom("Part::Part2DObject"):
+        return "drafts"
+    elif looksLikeDraft(o):
+        return "drafts"
+    elif objectType == "Window":
+        return "windows"
+    elif not objectType in TYPES_TO_IGNORE:
+        return "objects"
 
-        groupObjects.remove(o)
-
-        objectsToProcess.extend(filterObjects(groupObjects, excludeList))
-
-    return objectsToProcess
+    return None
 
 
 def groupObjects(objectsToProcess, cutplane, obj):
+    """Sorts the objects into the groups rendered by the section plane.
+    The classification of unchanged objects is taken from the classification cache.
+    """
     groups = {
         "spaces": [],
         "drafts": [],
@@ -92,24 +115,18 @@ def groupObjects(objectsToProcess, cutplane, obj):
         "sectionCuts": []
     }
 
-    typesToIgnore = ["BuildingPart", "Group"]
+    classifier = object_classifier.getClassifier()
+    normal = cutplane.normalAt(0, 0)
+    planeKey = ("oriented", round(normal.x, 9), round(normal.y, 9), round(normal.z, 9))
 
     for o in objectsToProcess:
-        objectType = Draft.getType(o)
+        group = classifier.get(o, "group", classifyObject)
 
-        if objectType == "Space":
-            groups["spaces"].append(o)
-        elif objectType in ["Dimension", "Annotation", "Label", "DraftText"]:
-            if isOriented(o, cutplane):
+        if group == "annotations":
+            if classifier.get(o, planeKey, lambda o: isOriented(o, cutplane)):
                 groups["drafts"].append(o)
-        elif o.isDerivedFrom("Part::Part2DObject"):
-            groups["drafts"].append(o)
-        elif looksLikeDraft(o):
-            groups["drafts"].append(o)
-        elif objectType == "Window":
-            groups["windows"].append(o)
-        elif not objectType in typesToIgnore:
-            groups["objects"].append(o)
+        elif group is not None:
+            groups[group].append(o)
 
     return groups
 
@@ -152,7 +169,7 @@ def calculateDimensionAngle(start, end):
     return angle
 
 
-def getDimensionTextSvg(d, start, end, angle, plane):
+def getDimensionTextSvg(d, start, end, angle, plane, fontSize="TEXT_FONT_SIZE"):
     text = toNumberString(d.Distance.Value / 10, d.ViewObject.Decimals)
     tpos = section_vector_renderer.getProj(d.ViewObject.Proxy.tbase, plane)
     midpoint = start.add(end).multiply(0.5)
@@ -164,11 +181,12 @@ def getDimensionTextSvg(d, start, end, angle, plane):
     textSvg = textSvg.replace("TEXT_POSITION_X", tx)
     textSvg = textSvg.replace("TEXT_POSITION_Y", ty)
     textSvg = textSvg.replace("TEXT_ROTATION", '%s %s %s' % (angle, tx, ty))
+    textSvg = textSvg.replace("TEXT_FONT_SIZE", str(fontSize))
 
     return textSvg
 
 
-def getDimensionSvg(d, plane):
+def getDimensionSvg(d, plane, strokeWidth="DIMENSION_STROKE_WIDTH", fontSize="TEXT_FONT_SIZE"):
     start = d.ViewObject.Proxy.p2
     end = d.ViewObject.Proxy.p3
     start = section_vector_renderer.getProj(start, plane)
@@ -192,6 +210,7 @@ def getDimensionSvg(d, plane):
         tickAngle = -tickAngle
 
     dimensionSvg = DIMESION_TEMPLATE.replace("PATH_DATA", path)
+    dimensionSvg = dimensionSvg.replace("DIMENSION_STROKE_WIDTH", str(strokeWidth))
     dimensionSvg = dimensionSvg.replace("TICK_LEFT", tickLeft)
     dimensionSvg = dimensionSvg.replace("TICK_RIGHT", tickRight)
     dimensionSvg = dimensionSvg.replace(
@@ -203,23 +222,140 @@ def getDimensionSvg(d, plane):
     dimensionSvg = dimensionSvg.replace(
         "TICK_ROTATION_RIGHT", '%s %s %s' % (angle, endx, endy))
     dimensionSvg = dimensionSvg.replace(
-        "TEXT_ELEMENT", getDimensionTextSvg(d, start, end, angle, plane))
+        "TEXT_ELEMENT", getDimensionTextSvg(d, start, end, angle, plane, fontSize))
 
     return dimensionSvg
 
 
 def getDraftSvg(objects, workingPlane):
-    svg = ""
+    return "".join(iterDraftSvg(objects, workingPlane))
+
 
+def iterDraftSvg(objects, workingPlane, strokeWidth="DIMENSION_STROKE_WIDTH", fontSize="TEXT_FONT_SIZE"):
     for d in objects:
         objectType = Draft.getType(d)
 
         if objectType == "Dimension":
-            svg += getDimensionSvg(d, workingPlane)
+            if d.ViewObject is None:
+                print("Skipping %s, dimensions can only be rendered with a GUI" % (d.Label, ))
+                continue
+
+            yield getDimensionSvg(d, workingPlane, strokeWidth, fontSize)
         else:
             print("Unsupported object type " + objectType)
 
-    return svg
+
+def getSvgValues(scale):
+    """Returns the values of all placeholders in the svg parts for the given scale.
+    The order matters, SMALL_TEXT_FONT_SIZE has to be replaced before TEXT_FONT_SIZE.
+    """
+    return [
+        ("SMALL_TEXT_FONT_SIZE", str(3 / scale)),
+        ("TEXT_FONT_SIZE", str(4 / scale)),
+        ("DIMENSION_STROKE_WIDTH", toNumberString(0.2 / scale)),
+        ("SECTION_STROKE_WIDTH", toNumberString(0.2 / scale)),
+        ("WINDOW_STROKE_WIDTH", toNumberString(0.1 / scale)),
+        ("SECONDARY_STROKE_WIDTH", toNumberString(0.1 / scale)),
+        ("MARKER_STROKE_WIDTH", toNumberString(0.2 / scale)),
+        ("SECTION_CUT_STROKE_WIDTH", toNumberString(0.2 / scale)),
+        ("HIDDEN_STROKE_WIDTH", toNumberString(0.1 / scale)),
+        ("HIDDEN_DASH_ARRAY", "%s,%s" % (toNumberString(1 / scale), toNumberString(0.5 / scale)))
+    ]
+
+
+SVG_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg"
+     xmlns:sodipodi="http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd"
+     xmlns:inkscape="http://www.inkscape.org/namespaces/inkscape"
+     width="WIDTHmm" height="HEIGHTmm" viewBox="VIEWBOX_VALUES"
+     version="1.1">
+    <sodipodi:namedview
+        id="base"
+        pagecolor="#ffffff"
+        bordercolor="#666666"
+        borderopacity="1.0"
+        inkscape:pageopacity="1"
+        inkscape:pageshadow="2"
+        inkscape:document-units="mm"
+        inkscape:window-maximized="1" />
+    <g
+        inkscape:label="Layer 1"
+        inkscape:groupmode="layer"
+        id="layer1">
+
+        <g i="everything">
+            <g id="patterns">
+                PATTERN_SVG
+            </g>
+
+            <g id="secondary">
+                SECONDARY_SVG
+            </g>
+
+            <g id="sections">
+                SECTION_SVG
+            </g>
+
+            <g id="windows">
+                WINDOW_SVG
+            </g>
+
+            <g id="hidden">
+                HIDDEN_SVG
+            </g>
+
+            <g id="drafts">
+                DRAFT_SVG
+            </g>
+
+            <g id="section_cuts">
+                SECTION_CUT_SVG
+            </g>
+
+            <g id="markers">
+                MARKER_SVG
+            </g>
+
+            <g id="information">
+                INFORMATION_SVG
+            </g>
+        </g>
+    </g>
+</svg>
+"""
+
+
+class RenderJob:
+    """Everything needed to cut and complete the render of a single section plane.
+
+    The settings of the cut are read from the section plane when the job is created,
+    so the cut itself only works on the renderer and plain values and can run in a worker thread.
+    cutContextKey is None, when the cut volumes are not kept, cacheFile is None,
+    when the cut cache is not written.
+    """
+
+    def __init__(self, obj, cutplane, objectsToProcess, groups, render,
+                 hidden=False, clip=False, clipDepth=0, cutContextKey=None, cacheFile=None):
+        self.obj = obj
+        self.cutplane = cutplane
+        self.objectsToProcess = objectsToProcess
+        self.groups = groups
+        self.render = render
+        self.stats = render.stats
+        self.hidden = hidden
+        self.clip = clip
+        self.clipDepth = clipDepth
+        self.cutContextKey = cutContextKey
+        self.cacheFile = cacheFile
+
+
+class IncrementalState:
+    "The state of the last incremental computation of a section plane"
+
+    def __init__(self, settings, revision, results):
+        self.settings = settings
+        self.revision = revision
+        self.results = results
 
 
 class SimpleSectionPlane:
@@ -238,6 +374,16 @@ class SimpleSectionPlane:
         self.windowSVG = ''
         self.draftSvg = ''
         self.sectionCutSvg = ''
+        self.hiddenSvg = ''
+        self.cutCache = None
+        self.cutContext = None
+        self.cutContextKey = None
+        self.incrementalState = None
+        self.renderer = None
+        self.groups = None
+        self.svgPartsBuilt = False
+        self.preparedSvg = None
+        self.lastStats = None
 
         if not "Placement" in pl:
             obj.addProperty("App::PropertyPlacement", "Placement", "SectionPlane", QT_TRANSLATE_NOOP(
@@ -287,6 +433,26 @@ class SimpleSectionPlane:
             obj.addProperty("App::PropertyDistance", "DocumentHeight",
                             "Document", "The page height of the rendered document").DocumentHeight = 297
 
+        if not "OptimizeOutput" in pl:
+            obj.addProperty("App::PropertyBool", "OptimizeOutput",
+                            "Document", "Write compact svg: css classes instead of inline styles, faces of the same style merged into shared paths with relative coordinates, precision adapted to the scale").OptimizeOutput = False
+
+        if not "ExportScales" in pl:
+            obj.addProperty("App::PropertyFloatList", "ExportScales",
+                            "Document", "Scales written by the multi scale export, e.g. 0.02, 0.01, 0.005. When empty, Scale is used").ExportScales = []
+
+        if not "TileColumns" in pl:
+            obj.addProperty("App::PropertyInteger", "TileColumns",
+                            "Tiles", "Number of tile columns for the tiled export. When 0, as many as needed to fit the drawing on pages of DocumentWidth").TileColumns = 0
+
+        if not "TileRows" in pl:
+            obj.addProperty("App::PropertyInteger", "TileRows",
+                            "Tiles", "Number of tile rows for the tiled export. When 0, as many as needed to fit the drawing on pages of DocumentHeight").TileRows = 0
+
+        if not "TileMinFeatureSize" in pl:
+            obj.addProperty("App::PropertyFloat", "TileMinFeatureSize",
+                            "Tiles", "Faces and hidden lines smaller than this size on paper (mm) are left out of the tiles").TileMinFeatureSize = 0
+
         if not "CutLetter" in pl:
             obj.addProperty("App::PropertyString", "CutLetter",
                             "Document", "The Letter to show when this section plane is used as a section cut inside another section plane")
@@ -303,6 +469,64 @@ class SimpleSectionPlane:
             obj.addProperty("App::PropertyDistance", "PlaneDepth",
                             "SectionPlane", "The depth of the sectionplane. When greater 0 everything not in between this distance from the section plane will be clipped").PlaneDepth = 0
 
+        if not "CutWorkers" in pl:
+            obj.addProperty("App::PropertyInteger", "CutWorkers",
+                            "SectionPlane", "Number of worker processes used for the boolean cuts. When 0 or 1 all solids are cut inside the FreeCAD process").CutWorkers = 0
+
+        if not "CacheCutResults" in pl:
+            obj.addProperty("App::PropertyBool", "CacheCutResults",
+                            "Cache", "Keep the cut results of every object, so unchanged objects are not cut again on the next render").CacheCutResults = False
+
+        if not "CutCacheSize" in pl:
+            obj.addProperty("App::PropertyInteger", "CutCacheSize",
+                            "Cache", "The maximum number of cached object cut results. The least recently used results are removed first").CutCacheSize = 2000
+
+        if not "PersistCutCache" in pl:
+            obj.addProperty("App::PropertyBool", "PersistCutCache",
+                            "Cache", "Store the cut results in a .sectioncache file next to the .FCStd file, so they survive a restart").PersistCutCache = False
+
+        if not "CacheCutVolumes" in pl:
+            obj.addProperty("App::PropertyBool", "CacheCutVolumes",
+                            "Cache", "Keep the cut volumes between renders, while the placement, the plane size and the clip settings do not change").CacheCutVolumes = False
+
+        if not "StoreIntermediate" in pl:
+            obj.addProperty("App::PropertyBool", "StoreIntermediate",
+                            "Cache", "Store the projected faces, hidden lines and section cuts in a .sectionir file next to the .FCStd file. Exports at other scales or page sizes are then written from it without cutting again, also after a restart").StoreIntermediate = False
+
+        if not "IncrementalCompute" in pl:
+            obj.addProperty("App::PropertyBool", "IncrementalCompute",
+                            "SectionPlane", "Recompute the section, whenever an included object changes. Only the changed objects are cut again. Takes precedence over SkipCompute").IncrementalCompute = False
+
+        if not "ShowHiddenLines" in pl:
+            obj.addProperty("App::PropertyBool", "ShowHiddenLines",
+                            "SectionPlane", "Show the edges of the cut away parts as dashed lines. Lines covered by section faces are left out").ShowHiddenLines = False
+
+        if not "CullOccludedFaces" in pl:
+            obj.addProperty("App::PropertyBool", "CullOccludedFaces",
+                            "SectionPlane", "Leave out secondary faces, that are completely covered by faces in front of them. Makes large elevations a lot smaller").CullOccludedFaces = False
+
+        if not "SimplifyHeavyShapes" in pl:
+            obj.addProperty("App::PropertyBool", "SimplifyHeavyShapes",
+                            "SectionPlane", "Refine the shapes of objects with more than HeavyShapeFaceCount faces before cutting. The objects themselves are not changed").SimplifyHeavyShapes = False
+
+        if not "HeavyShapeFaceCount" in pl:
+            obj.addProperty("App::PropertyInteger", "HeavyShapeFaceCount",
+                            "SectionPlane", "Objects with more faces are reported as heavy and refined when SimplifyHeavyShapes is set").HeavyShapeFaceCount = shape_simplifier.DEFAULT_HEAVY_FACE_COUNT
+
+        if not "LastRenderStats" in pl:
+            obj.addProperty("App::PropertyString", "LastRenderStats",
+                            "Statistics", "Time spent per stage, counters and the slowest objects of the last render as JSON")
+
+        obj.setEditorMode("LastRenderStats", 1)
+
+        # Changing the statistics must neither touch the section plane nor be saved with it
+        if hasattr(obj, "setPropertyStatus"):
+            obj.setPropertyStatus("LastRenderStats", ["Output", "Transient"])
+
+        if not "RenderStatsFile" in pl:
+            obj.addProperty("App::PropertyFile", "RenderStatsFile",
+                            "Statistics", "When set, the statistics of every render are written to this file. Files ending with .trace.json are written as Chrome trace (chrome://tracing, Perfetto)")
+
         self.Type = "SimpleSectionPlane"
 
     def onDocumentRestored(self, obj):
@@ -314,26 +538,253 @@ class SimpleSectionPlane:
     def __setstate__(self, state):
         return None
 
+    def onChanged(self, obj, prop):
+        if prop == "IncrementalCompute" and not obj.IncrementalCompute:
+            if hasattr(self, "incrementalState") and self.incrementalState is not None:
+                section_observer.getObserver().unwatch(obj)
+
+            self.incrementalState = None
+
     def execute(self, obj):
-        if obj.SkipCompute:
+        if obj.IncrementalCompute:
+            self.doIncrementalExecute(obj)
+        elif obj.SkipCompute:
             return
+        else:
+            self.doExecute(obj)
+
+        self.publishStats(obj)
+
+    def doExecute(self, obj, reusableResults=None):
+        stats = RenderStats()
+
+        with stats.stage("doExecute"):
+            job = self.prepareRender(obj, reusableResults, stats=stats)
+
+            if job is not None:
+                self.cutRender(job)
+                self.completeRender(job)
+
+        if job is None:
+            return None
 
-        self.doExecute(obj)
+        self.keepStats(obj, stats)
+
+        return (job.objectsToProcess, job.render)
+
+    def prepareRender(self, obj, reusableResults=None, shared=None, executor=None, cutWorkers=None, stats=None):
+        """Resolves the objects to render and creates the renderer, without cutting anything yet.
+        shared can be used to share the object resolution and shape extraction between section planes.
+        Returns None, when there is nothing to render.
+        """
+        if stats is None:
+            stats = RenderStats()
 
-    def doExecute(self, obj):
         cutplane = self.calculateCutPlane(obj)
 
-        objectsToProcess = filterObjects(
-            obj.IncludeObjects, obj.ExcludeObjects)
+        with stats.stage("filterObjects"):
+            if shared is not None:
+                objectsToProcess = shared.filterObjects(
+                    obj.IncludeObjects, obj.ExcludeObjects)
+            else:
+                objectsToProcess = filterObjects(
+                    obj.IncludeObjects, obj.ExcludeObjects)
 
         if len(objectsToProcess) == 0:
-            return
+            return None
+
+        with stats.stage("groupObjects"):
+            groups = groupObjects(objectsToProcess, cutplane, obj)
+
+        with stats.stage("createRenderer"):
+            render = self.createRenderer(
+                obj, groups, reusableResults, shared, executor, cutWorkers, stats)
+
+        return self.createJob(obj, cutplane, objectsToProcess, groups, render)
 
-        groups = groupObjects(objectsToProcess, cutplane, obj)
-        render = self.render(obj, groups, cutplane)
+    def createJob(self, obj, cutplane, objectsToProcess, groups, render):
+        "Reads all settings the cut needs from the section plane"
+        cutContextKey = None
+        cacheFile = None
 
-        self.buildSvgParts(obj, render, groups)
+        if obj.CacheCutVolumes:
+            cutContextKey = self.getCutContextKey(obj, cutplane)
+
+        if obj.CacheCutResults and obj.PersistCutCache:
+            cacheFile = section_cache.getCacheFile(obj)
+
+        return RenderJob(obj, cutplane, objectsToProcess, groups, render,
+                         hidden=obj.ShowHiddenLines, clip=self.shouldClip(obj),
+                         clipDepth=obj.PlaneDepth.Value, cutContextKey=cutContextKey,
+                         cacheFile=cacheFile)
+
+    def cutRender(self, job):
+        "Cuts the shapes of the job. Does not access the section plane or other document objects"
+        render = job.render
+
+        render.cut(job.cutplane, hidden=job.hidden, clip=job.clip, clipDepth=job.clipDepth)
+
+        self.keepCutContext(job.cutContextKey, render.cutContext)
+
+        if render.cache is not None:
+            if section_vector_renderer.DEBUG:
+                print("Cut cache: %s hits, %s misses" %
+                      (render.cache.hits, render.cache.misses))
+
+            self.saveCutCache(job.cacheFile, render.cache)
+
+    def completeRender(self, job):
+        render = job.render
+        groups = job.groups
+
+        render.prepareSvg()
+
+        self.renderer = render
+        self.groups = groups
+        self.drafts = groups["drafts"]
+        self.boundBox = render.buildBoundBox()
+        self.boundBox.adaptFromDrafts(groups["drafts"])
+
+        # The svg strings are only built, when they are needed by getSvg
+        self.clearSvgParts()
+
+        if job.obj.StoreIntermediate:
+            with render.stats.stage("writeIntermediate"):
+                self.saveIntermediate(job.obj, render, groups)
+
+    def saveIntermediate(self, obj, render, groups):
+        intermediateFile = section_ir.getIntermediateFile(obj)
+
+        if not intermediateFile:
+            return
+
+        try:
+            section_ir.writeIntermediate(
+                intermediateFile, render, self.getIntermediateKey(obj, groups))
+        except Exception as e:
+            FreeCAD.Console.PrintError("Unable to write section intermediate file %s: %s\n" % (intermediateFile, e))
+
+    def restoreIntermediate(self, obj):
+        """Restores the renderer from the intermediate file, when it was written from the
+        current objects and settings. Returns False, when the section has to be cut again.
+        """
+        intermediateFile = section_ir.getIntermediateFile(obj)
+
+        if not obj.StoreIntermediate or not intermediateFile:
+            return False
+
+        stats = RenderStats()
+
+        with stats.stage("restoreIntermediate"):
+            cutplane = self.calculateCutPlane(obj)
+            objectsToProcess = filterObjects(
+                obj.IncludeObjects, obj.ExcludeObjects)
+            groups = groupObjects(objectsToProcess, cutplane, obj)
+            # Markers are not cut, they are taken from the current objects
+            render = section_ir.readIntermediate(
+                intermediateFile, obj.Placement, self.getIntermediateKey(obj, groups), stats, obj.Markers)
+
+            if render is None:
+                return False
+
+        self.renderer = render
+        self.groups = groups
         self.drafts = groups["drafts"]
+        self.boundBox = render.buildBoundBox()
+        self.boundBox.adaptFromDrafts(groups["drafts"])
+        self.clearSvgParts()
+
+        self.keepStats(obj, stats)
+
+        return True
+
+    def getIntermediateKey(self, obj, groups):
+        """Identifies the objects and settings a render was made from.
+        Hashing the shapes is a lot cheaper than cutting them again.
+        """
+        key = [repr(self.getCutSettings(obj)), repr(obj.CullOccludedFaces)]
+
+        for groupName in ["objects", "windows"]:
+            for o in groups[groupName]:
+                entry = section_vector_renderer.getShapeEntry(o)
+
+                if entry is not None:
+                    shape, color, patternType, name = entry
+                    key.append(repr((groupName, name, section_cache.shapeHash(shape),
+                                     tuple(color), patternType)))
+
+        for s in obj.SectionCuts:
+            key.append(repr((s.Name, s.Label, getattr(s, "CutLetter", None),
+                             section_cache.shapeHash(s.Proxy.calculateCutPlane(s)))))
+
+        return hashlib.sha1("\n".join(key).encode("utf-8")).hexdigest()
+
+    def ensureRenderer(self):
+        "Makes sure there is a renderer, restored from the intermediate file or cut again"
+        if self.renderer is None and not self.restoreIntermediate(self.Object):
+            self.doExecute(self.Object)
+
+    def publishStats(self, obj):
+        """Shows the statistics of the last render in LastRenderStats.
+        Only called from execute, exports keep their statistics in lastStats.
+        """
+        if self.lastStats is not None:
+            obj.LastRenderStats = self.lastStats.toJson()
+
+    def keepStats(self, obj, stats):
+        "Stores the statistics of the last render or export and writes them to RenderStatsFile"
+        self.lastStats = stats
+
+        if section_vector_renderer.DEBUG:
+            print(stats)
+
+        if obj.RenderStatsFile:
+            try:
+                stats.write(obj.RenderStatsFile)
+            except Exception as e:
+                print("Unable to write render statistics %s: %s" % (obj.RenderStatsFile, e))
+
+    def doIncrementalExecute(self, obj):
+        """Recomputes the section, but only cuts the objects changed since the last computation.
+        The cut results of all other objects are reused, and the svg parts are built again from them.
+        """
+        observer = section_observer.getObserver()
+        revision = observer.revision
+        settings = self.getCutSettings(obj)
+        reusableResults = None
+
+        if self.incrementalState is not None and self.incrementalState.settings == settings:
+            changed = observer.changedSince(
+                obj.Document, self.incrementalState.revision)
+
+            reusableResults = dict([(key, result) for key, result in self.incrementalState.results.items()
+                                    if not key[1] in changed])
+
+            if section_vector_renderer.DEBUG:
+                print("Incremental compute: %s changed objects, reusing %s results" %
+                      (len(changed), len(reusableResults)))
+
+        executed = self.doExecute(obj, reusableResults)
+
+        if executed is None:
+            self.incrementalState = None
+            observer.unwatch(obj)
+            return
+
+        objectsToProcess, render = executed
+
+        self.incrementalState = IncrementalState(
+            settings, revision, render.objectResults)
+
+        observer.watch(obj, [o.Name for o in objectsToProcess])
+
+    def getCutSettings(self, obj):
+        "All properties, that influence the cut result of a single object"
+        placement = obj.Placement
+        cutplane = self.calculateCutPlane(obj)
+
+        return (tuple(placement.toMatrix().A), cutplane.Area, self.shouldClip(obj),
+                obj.PlaneDepth.Value, self.getSimplifyFaceCount(obj), obj.ShowHiddenLines)
     
     def getBoundBox(self):
         bb = FreeCAD.BoundBox()
@@ -377,8 +828,7 @@ class SimpleSectionPlane:
 
         parts = render.getSvgParts(faceHighlightDistance.Value)
 
-        wp = WorkingPlane.plane()
-        wp.setFromPlacement(obj.Placement, rebase=True)
+        wp = self.getWorkingPlane(obj)
 
         self.sectionSVG = parts["sections"]
         self.secondaryFacesSVG = parts["secondaryFaces"]
@@ -386,23 +836,121 @@ class SimpleSectionPlane:
         self.patternSVG = parts["patterns"]
         self.draftSvg = getDraftSvg(groups["drafts"], wp)
         self.sectionCutSvg = parts["sectionCuts"]
+        self.hiddenSvg = parts["hidden"]
         self.markerSvg = parts["markers"]
         self.boundBox = parts["boundBox"]
 
         self.boundBox.adaptFromDrafts(groups["drafts"])
+        self.svgPartsBuilt = True
+        self.preparedSvg = None
+
+        self.keepStats(obj, render.stats)
+
+    def clearSvgParts(self):
+        self.patternSVG = ''
+        self.sectionSVG = ''
+        self.secondaryFacesSVG = ''
+        self.windowSVG = ''
+        self.draftSvg = ''
+        self.sectionCutSvg = ''
+        self.hiddenSvg = ''
+        self.markerSvg = ''
+        self.svgPartsBuilt = False
+        self.preparedSvg = None
+
+    def ensureSvgParts(self):
+        self.ensureRenderer()
+
+        if not self.svgPartsBuilt:
+            self.buildSvgParts(self.Object, self.renderer, self.groups)
+
+    def getWorkingPlane(self, obj):
+        wp = WorkingPlane.plane()
+        wp.setFromPlacement(obj.Placement, rebase=True)
+
+        return wp
 
-    def render(self, obj, groups, cutplane):
-        shouldClip = self.shouldClip(obj)
+    def render(self, obj, groups, cutplane, reusableResults=None):
+        render = self.createRenderer(obj, groups, reusableResults)
+        self.cutRender(self.createJob(obj, cutplane, None, groups, render))
 
-        render = section_vector_renderer.Renderer(obj.Placement)
+        return render
+
+    def createRenderer(self, obj, groups, reusableResults=None, shared=None, executor=None, cutWorkers=None, stats=None):
+        if cutWorkers is None:
+            cutWorkers = obj.CutWorkers
+
+        render = section_vector_renderer.Renderer(
+            obj.Placement, cutWorkers=cutWorkers, executor=executor, cache=self.getCutCache(obj),
+            reusableResults=reusableResults, shapeSource=shared, stats=stats,
+            simplifyFaceCount=self.getSimplifyFaceCount(obj), cullOccluded=obj.CullOccludedFaces,
+            cutContext=self.getCutContext(obj))
         render.addObjects(groups["objects"])
         render.addWindows(groups["windows"])
         render.addSectionCuts(obj.SectionCuts)
         render.addMarkers(obj.Markers)
-        render.cut(cutplane, clip=shouldClip, clipDepth=obj.PlaneDepth.Value)
 
         return render
 
+    def getCutContextKey(self, obj, cutplane):
+        "The cut volumes depend on the corners of the cut plane and the clip setting"
+        return (tuple([(v.Point.x, v.Point.y, v.Point.z) for v in cutplane.Vertexes]), self.shouldClip(obj))
+
+    def getCutContext(self, obj):
+        "Returns the cut context of the last render, when it can be reused"
+        if not obj.CacheCutVolumes:
+            self.cutContext = None
+            return None
+
+        if self.cutContextKey != self.getCutContextKey(obj, self.calculateCutPlane(obj)):
+            self.cutContext = None
+
+        return self.cutContext
+
+    def keepCutContext(self, cutContextKey, cutContext):
+        "Keeps the cut volumes for the next render. cutContextKey is None, when they are not cached"
+        if cutContextKey is None:
+            return
+
+        self.cutContext = cutContext
+        self.cutContextKey = cutContextKey
+
+    def getSimplifyFaceCount(self, obj):
+        if not obj.SimplifyHeavyShapes:
+            return 0
+
+        return max(obj.HeavyShapeFaceCount, 1)
+
+    def getCutCache(self, obj):
+        if not obj.CacheCutResults:
+            self.cutCache = None
+            return None
+
+        if self.cutCache is None:
+            self.cutCache = section_cache.CutResultCache(
+                obj.CutCacheSize, obj.Document.Name, obj.PersistCutCache)
+
+            cacheFile = section_cache.getCacheFile(obj)
+
+            if obj.PersistCutCache and cacheFile:
+                self.cutCache.load(cacheFile)
+        else:
+            self.cutCache.resize(obj.CutCacheSize)
+            self.cutCache.persistent = obj.PersistCutCache
+
+        self.cutCache.resetStatistics()
+
+        return self.cutCache
+
+    def saveCutCache(self, cacheFile, cache):
+        if not cacheFile or cache.misses == 0:
+            return
+
+        try:
+            cache.save(cacheFile)
+        except Exception as e:
+            FreeCAD.Console.PrintWarning("Unable to write section cache %s: %s\n" % (cacheFile, e))
+
     def shouldClip(self, obj):
         return obj.PlaneLength.Value > 0 or obj.PlaneHeight.Value > 0
 
@@ -437,14 +985,18 @@ class SimpleSectionPlane:
 
         return p
 
-    def renderInformation(self, width, height, scale):
+    def renderInformation(self, width, height, scale, boundBox=None):
         obj = self.Object
+
+        if boundBox is None:
+            boundBox = self.boundBox
+
         label = obj.Label
         scaleText = "1:%s" % (toNumberString(1/scale, 0),)
         fontSize = toNumberString(10/scale)
         smallFontSize = toNumberString(5/scale)
 
-        scaledWidth, scaleHeight, x, y = self.boundBox.calculateOffset(
+        scaledWidth, scaleHeight, x, y = boundBox.calculateOffset(
             scale, width, height)
 
         pageEndX = toNumberString(scaledWidth + x - 5 / scale)
@@ -487,147 +1039,265 @@ class SimpleSectionPlane:
 
         return "%s\n%s%s" % (labelSvg, scaleSvg, cutLetterSvg)
 
+    def writeSvg(self, fileObject, width=420, height=297, scale=1/50, render=None, boundBox=None, drafts=None):
+        """Writes the svg directly to the file like object.
+        In contrast to getSvg, the whole document is never held in memory.
+        render, boundBox and drafts can be given to write only a part (a tile) of the section.
+        """
+        self.ensureRenderer()
+
+        if render is None:
+            render = self.renderer
+
+        if boundBox is None:
+            boundBox = self.boundBox
+
+        if drafts is None:
+            drafts = self.drafts
+
+        with self.renderer.stats.stage("writeSvg"):
+            self.doWriteSvg(fileObject, width, height, scale, render, boundBox, drafts)
+
+        self.keepStats(self.Object, self.renderer.stats)
+
+    def doWriteSvg(self, fileObject, width, height, scale, render, boundBox, drafts):
+        obj = self.Object
+        values = dict(getSvgValues(scale))
+        faceHighlightDistance = obj.FaceHighlightDistance.Value
+
+        render.prepareSvg()
+        render.collectPatterns(faceHighlightDistance)
+
+        writer = svg_writer.SvgWriter(fileObject)
+        writer.startDocument(
+            width, height, boundBox.buildViewbox(scale, width, height))
+
+        writer.writeGroup("patterns", (section_vector_renderer.scalePatterns(
+            p, scale) for p in render.iterPatternSVG()))
+
+        if obj.OptimizeOutput:
+            self.writeOptimizedFaces(writer, render, values, faceHighlightDistance, scale)
+        else:
+            writer.writeGroup("secondary", render.iterSecondaryFacesSVG(
+                values["SECONDARY_STROKE_WIDTH"], faceHighlightDistance, values["SECTION_STROKE_WIDTH"]))
+            writer.writeGroup("sections", render.iterSectionSVG(
+                values["SECTION_STROKE_WIDTH"]))
+            writer.writeGroup("windows", render.iterWindowSVG(
+                values["WINDOW_STROKE_WIDTH"]))
+
+        writer.writeGroup("hidden", render.iterHiddenSVG(
+            values["HIDDEN_STROKE_WIDTH"], values["HIDDEN_DASH_ARRAY"]))
+        writer.writeGroup("drafts", iterDraftSvg(drafts, self.getWorkingPlane(obj),
+                                                 values["DIMENSION_STROKE_WIDTH"], values["TEXT_FONT_SIZE"]))
+        writer.writeGroup("section_cuts", render.iterSectionCutSvg(
+            values["SECTION_CUT_STROKE_WIDTH"], values["TEXT_FONT_SIZE"]))
+        writer.writeGroup("markers", render.iterMarkerSVG(
+            values["MARKER_STROKE_WIDTH"], values["SMALL_TEXT_FONT_SIZE"]))
+        writer.writeGroup("information", [
+                          self.renderInformation(width, height, scale, boundBox)])
+
+        writer.endDocument()
+
+    def writeTiles(self, targetFile=None, width=None, height=None, scale=None):
+        """Writes the section as a grid of tiles, every tile to a page of its own.
+        The projected geometry is clipped to the tiles, nothing is cut again.
+        Returns the list of written files.
+        """
+        obj = self.Object
+
+        if targetFile is None:
+            targetFile = obj.TargetFile
+
+        if width is None:
+            width = obj.DocumentWidth.Value
+
+        if height is None:
+            height = obj.DocumentHeight.Value
+
+        if scale is None:
+            scale = obj.Scale
+
+        self.ensureRenderer()
+
+        if self.renderer is None:
+            return []
+
+        render = self.renderer
+        minFeatureSize = obj.TileMinFeatureSize / scale
+        base, extension = os.path.splitext(targetFile)
+        files = []
+
+        for row, column, bounds in self.getTileGrid(obj, width, height, scale):
+            tile = render.getTile(bounds, minFeatureSize)
+            tileBox = section_vector_renderer.BoundBox(render.wp)
+            tileBox.update(*bounds)
+            drafts = [d for d in self.drafts if self.isDraftInBounds(d, render.wp, bounds)]
+
+            fileName = "%s_%s_%s%s" % (base, row + 1, column + 1, extension or ".svg")
+            file_object = open(fileName, "w")
+
+            try:
+                self.writeSvg(file_object, width, height, scale, tile, tileBox, drafts)
+            finally:
+                file_object.close()
+
+            files.append(fileName)
+
+        return files
+
+    def isDraftInBounds(self, draft, plane, bounds):
+        "Drafts without a known position (dimensions without a view provider) are left out"
+        draftBox = section_vector_renderer.BoundBox(plane)
+        draftBox.adaptFromDrafts([draft])
+
+        return draftBox.initialized and boundsIntersect(
+            (draftBox.minx, draftBox.miny, draftBox.maxx, draftBox.maxy), bounds)
+
+    def getTileGrid(self, obj, width, height, scale):
+        """Splits the bound box of the section into tiles.
+        Yields (row, column, (minx, miny, maxx, maxy)), the first row is the top one.
+        Yields nothing, when the section is empty.
+        """
+        boundBox = self.boundBox
+        columns = obj.TileColumns
+        rows = obj.TileRows
+
+        if boundBox.overallWidth() <= 0 or boundBox.overallHeight() <= 0:
+            return
+
+        if columns <= 0:
+            columns = max(1, int(math.ceil(boundBox.overallWidth() * scale / width)))
+
+        if rows <= 0:
+            rows = max(1, int(math.ceil(boundBox.overallHeight() * scale / height)))
+
+        tileWidth = boundBox.overallWidth() / columns
+        tileHeight = boundBox.overallHeight() / rows
+
+        if tileWidth * scale > width or tileHeight * scale > height:
+            print("Tiles of %s are larger than the page, they will be cut off" % (obj.Label, ))
+
+        for row in range(rows):
+            maxy = boundBox.maxy - row * tileHeight
+
+            for column in range(columns):
+                minx = boundBox.minx + column * tileWidth
+
+                yield (row, column, (minx, maxy - tileHeight, minx + tileWidth, maxy))
+
+    def writeOptimizedFaces(self, writer, render, values, faceHighlightDistance, scale):
+        """Writes the secondary faces, sections and windows with css classes and merged paths.
+        The styles are collected first, so the style sheet can be written before the faces.
+        """
+        layers = [
+            ("secondary", (values["SECONDARY_STROKE_WIDTH"], faceHighlightDistance, values["SECTION_STROKE_WIDTH"])),
+            ("sections", (values["SECTION_STROKE_WIDTH"], )),
+            ("windows", (values["WINDOW_STROKE_WIDTH"], ))
+        ]
+
+        styleSheet = svg_optimizer.StyleSheet()
+
+        for layer, arguments in layers:
+            for style, face in render.iterStyledFaces(layer, *arguments):
+                styleSheet.getClass(style)
+
+        precision = svg_optimizer.getAdaptivePrecision(
+            scale, maxPrecision=render.precision)
+        merger = svg_optimizer.PathMerger(
+            styleSheet, precision, render.getFacePathData)
+
+        writer.write(styleSheet.getStyleElement())
+
+        for layer, arguments in layers:
+            writer.writeGroup(layer, merger.iterGroups(
+                render.iterStyledFaces(layer, *arguments)))
+
     def getSvg(self, width=420, height=297, scale=1/50):
-        if not self.sectionSVG:
-            self.doExecute(self.Object)
+        if self.Object.OptimizeOutput:
+            # The optimized output depends on the scale, so it is written in one go
+            fileObject = io.StringIO()
+            self.writeSvg(fileObject, width, height, scale)
+
+            return fileObject.getvalue()
+
+        preparedSvg = self.getPreparedSvg()
+        fileObject = io.StringIO()
+        preparedSvg.write(fileObject, scale, dict(getSvgValues(scale)),
+                          self.getPageSlots(width, height, scale))
+
+        return fileObject.getvalue()
+
+    def getPreparedSvg(self):
+        "Returns the svg parts split at their placeholders, so every scale can be written from them"
+        self.ensureSvgParts()
+
+        if self.preparedSvg is None:
+            parts = {
+                "SECONDARY_SVG": self.secondaryFacesSVG,
+                "SECTION_SVG": self.sectionSVG,
+                "WINDOW_SVG": self.windowSVG,
+                "HIDDEN_SVG": self.hiddenSvg,
+                "DRAFT_SVG": self.draftSvg,
+                "SECTION_CUT_SVG": self.sectionCutSvg,
+                "MARKER_SVG": self.markerSvg
+            }
+
+            self.preparedSvg = prepared_svg.PreparedSvg(
+                SVG_TEMPLATE, parts, self.patternSVG, [name for name, value in getSvgValues(1)])
+
+        return self.preparedSvg
+
+    def getPageSlots(self, width, height, scale):
+        return {
+            "WIDTH": toNumberString(width),
+            "HEIGHT": toNumberString(height),
+            "VIEWBOX_VALUES": self.boundBox.buildViewbox(scale, width, height),
+            "INFORMATION_SVG": self.renderInformation(width, height, scale)
+        }
+
+    def writeScales(self, targetFile=None, scales=None, width=None, height=None):
+        """Writes the section once for every scale, the files are named <base>_1-<scale><ext>.
+        The section is cut and its svg parts are built only once for all scales.
+        Returns the list of written files.
+        """
+        obj = self.Object
 
-        template = """<?xml version="1.0" encoding="UTF-8"?>
-<svg xmlns="http://www.w3.org/2000/svg"
-     xmlns:sodipodi="http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd"
-     xmlns:inkscape="http://www.inkscape.org/namespaces/inkscape"
-     width="WIDTHmm" height="HEIGHTmm" viewBox="VIEWBOX_VALUES"
-     version="1.1">
-    <sodipodi:namedview
-        id="base"
-        pagecolor="#ffffff"
-        bordercolor="#666666"
-        borderopacity="1.0"
-        inkscape:pageopacity="1"
-        inkscape:pageshadow="2"
-        inkscape:document-units="mm"
-        inkscape:window-maximized="1" />
-    <g
-        inkscape:label="Layer 1"
-        inkscape:groupmode="layer"
-        id="layer1">
+        if targetFile is None:
+            targetFile = obj.TargetFile
 
-        <g i="everything">
-            <g id="patterns">
-                PATTERN_SVG
-            </g>
+        if scales is None:
+            scales = obj.ExportScales or [obj.Scale]
 
-            <g id="secondary">
-                SECONDARY_SVG
-            </g>
+        if width is None:
+            width = obj.DocumentWidth.Value
 
-            <g id="sections">
-                SECTION_SVG
-            </g>
+        if height is None:
+            height = obj.DocumentHeight.Value
 
-            <g id="windows">
-                WINDOW_SVG
-            </g>
+        self.ensureRenderer()
 
-            <g id="drafts">
-                DRAFT_SVG
-            </g>
+        if self.renderer is None:
+            return []
 
-            <g id="section_cuts">
-                SECTION_CUT_SVG
-            </g>
+        if not obj.OptimizeOutput:
+            preparedSvg = self.getPreparedSvg()
 
-            <g id="markers">
-                MARKER_SVG
-            </g>
+        base, extension = os.path.splitext(targetFile)
+        files = []
 
-            <g id="information">
-                INFORMATION_SVG
-            </g>
-        </g>
-    </g>
-</svg>
-"""
-        template = template.replace(
-            "WIDTH", toNumberString(width))
-        template = template.replace(
-            "HEIGHT", toNumberString(height))
-        template = template.replace(
-            "PATTERN_SVG", section_vector_renderer.scalePatterns(self.patternSVG, scale))
-        template = template.replace("SECONDARY_SVG", self.secondaryFacesSVG)
-        template = template.replace("SECTION_SVG", self.sectionSVG)
-        template = template.replace("WINDOW_SVG", self.windowSVG)
-        template = template.replace("DRAFT_SVG", self.draftSvg)
-        template = template.replace("SECTION_CUT_SVG", self.sectionCutSvg)
-        template = template.replace("MARKER_SVG", self.markerSvg)
-        template = template.replace(
-            "INFORMATION_SVG", self.renderInformation(width, height, scale))
-        template = template.replace("SMALL_TEXT_FONT_SIZE", str(3 / scale))
-        template = template.replace("TEXT_FONT_SIZE", str(4 / scale))
-        template = template.replace(
-            "DIMENSION_STROKE_WIDTH", toNumberString(0.2 / scale))
-        template = template.replace(
-            "SECTION_STROKE_WIDTH", toNumberString(0.2 / scale))
-        template = template.replace(
-            "WINDOW_STROKE_WIDTH", toNumberString(0.1 / scale))
-        template = template.replace(
-            "SECONDARY_STROKE_WIDTH", toNumberString(0.1 / scale))
-        template = template.replace("MARKER_STROKE_WIDTH", toNumberString(0.2 / scale))
-        template = template.replace(
-            "VIEWBOX_VALUES", self.boundBox.buildViewbox(scale, width, height))
-        template = template.replace("SECTION_CUT_STROKE_WIDTH", toNumberString(0.2 / scale))
-
-        return template
-
-
-if __name__ == "__main__":
-    if FreeCAD.ActiveDocument is None:
-        print('Create a document to continue.')
-    else:
-        simpleSectionPlaneObject = FreeCAD.ActiveDocument.addObject(
-            "App::FeaturePython", "SectionPlane")
-        SimpleSectionPlane(simpleSectionPlaneObject)
-
-        otherSectionPlaneObject = FreeCAD.ActiveDocument.addObject(
-            "App::FeaturePython", "SectionPlane")
-        SimpleSectionPlane(otherSectionPlaneObject)
-
-        # simpleSectionPlaneObject.FaceHighlightDistance = 6600
-
-        # simpleSectionPlaneObject.IncludeObjects = [
-        #     FreeCAD.ActiveDocument.Structure]
-        simpleSectionPlaneObject.IncludeObjects = [
-            FreeCAD.ActiveDocument.Wall045]
-        # simpleSectionPlaneObject.IncludeObjects = [
-        #     FreeCAD.ActiveDocument.BuildingPart]
-        # simpleSectionPlaneObject.IncludeObjects = [
-        #     FreeCAD.ActiveDocument.BuildingPart001]
-        # simpleSectionPlaneObject.IncludeObjects = [
-        #     FreeCAD.ActiveDocument.Wall003, FreeCAD.ActiveDocument.Dimension004]
-        simpleSectionPlaneObject.Markers = [FreeCAD.ActiveDocument.Rectangle033]
-
-        # simpleSectionPlaneObject.SectionCuts = [otherSectionPlaneObject]
-
-        # Top
-        simpleSectionPlaneObject.Placement = FreeCAD.Placement(
-            Vector(0, 0, 4540), FreeCAD.Rotation(Vector(0, 0, 1), 0))
-        # Front
-        # simpleSectionPlaneObject.Placement = FreeCAD.Placement(
-        #     Vector(0, -1000, 0), FreeCAD.Rotation(Vector(1, 0, 0), 90))
-        # Right
-        # simpleSectionPlaneObject.Placement = FreeCAD.Placement(
-        #     FreeCAD.Vector(1000, 0, 0), FreeCAD.Rotation(FreeCAD.Vector(0.577, 0.577, 0.577), 120))
-
-        # Right
-        otherSectionPlaneObject.Placement = FreeCAD.Placement(
-            FreeCAD.Vector(1000, 0, 0), FreeCAD.Rotation(FreeCAD.Vector(0.577, 0.577, 0.577), 120))
-
-        # simpleSectionPlaneObject.PlaneLength = 2000
-
-        FreeCAD.ActiveDocument.recompute()
-
-        svg = simpleSectionPlaneObject.Proxy.getSvg(scale=0.02)
-
-        file_object = open(
-            "C:\\Meine Daten\\freecad\\samples\\SectionPlane\\Export.svg", "w")
-        file_object.write(svg)
-        file_object.close()
+        for scale in scales:
+            fileName = "%s_1-%s%s" % (base, toNumberString(1 / scale, 0), extension or ".svg")
+            file_object = open(fileName, "w")
+
+            try:
+                if obj.OptimizeOutput:
+                    self.writeSvg(file_object, width, height, scale)
+                else:
+                    preparedSvg.write(file_object, scale, dict(getSvgValues(scale)),
+                                      self.getPageSlots(width, height, scale))
+            finally:
+                file_object.close()
+
+            files.append(fileName)
+
+        return files
@@ -1,13 +1,27 @@
 import FreeCAD
+import copy
 import math
 import re
+import time
 import Part
 import ArchCommands
 import Draft
 import DraftVecUtils
 import DraftGeomUtils
+import numpy
+
+from collections import OrderedDict
+
+from app.polygon2d import Polygon2D, signedArea
+from app.render_stats import RenderStats
+from app import shape_simplifier
+from app import hidden_lines
+from app.spatial_index import RTree, boundsContain, boundsIntersect
+from app.edge_order import orderEdges, getStartPoint, getEndPoint
+from app.cut_worker import cutBrepSolids, shapeFromBrep
 
 MAXLOOP = 10  # the max number of loop before abort
+HIDDEN_LINES_PER_PATH = 100  # hidden polylines are merged into paths of this size
 
 DEBUG = FreeCAD.ParamGet(
     "User parameter:BaseApp/Preferences/Mod/Arch").GetBool("ShowVRMDebug")
@@ -143,6 +157,55 @@ def toNumberString(val, precision=None):
     return str(rounded)
 
 
+def toNumberStrings(values, precision):
+    """Formats many values at once, producing the same strings as toNumberString.
+    All values are rounded in one numpy call. numpy rounds the scaled value, which can
+    differ from round() close to a tie, those few values are rounded again with round().
+    """
+    values = numpy.asarray(values, dtype=float)
+    scaled = values * 10.0 ** precision
+    rounded = numpy.round(values, precision).tolist()
+
+    distance = numpy.abs(scaled - numpy.floor(scaled) - 0.5)
+    uncertain = (distance <= numpy.abs(scaled) * 1e-12 + 1e-9) | (numpy.abs(scaled) >= 2 ** 52)
+
+    for i in numpy.flatnonzero(uncertain).tolist():
+        rounded[i] = round(float(values[i]), precision)
+
+    if precision == 0:
+        return [str(int(v)) for v in rounded]
+
+    return [str(v) for v in rounded]
+
+
+class PlaneProjection:
+    """Projects points into the local coordinates of a working plane.
+    Equivalent to WorkingPlane.getLocalCoords, but for many points with a single matrix multiplication.
+    """
+
+    def __init__(self, wp):
+        self.origin = numpy.array(
+            [wp.position.x, wp.position.y, wp.position.z], dtype=float)
+        self.matrix = numpy.array([[wp.u.x, wp.u.y, wp.u.z],
+                                   [wp.v.x, wp.v.y, wp.v.z],
+                                   [wp.axis.x, wp.axis.y, wp.axis.z]], dtype=float)
+
+    def projectPoints(self, points):
+        "Returns a Nx3 array of the local coordinates of the given FreeCAD vectors"
+        array = numpy.array([(p.x, p.y, p.z) for p in points], dtype=float)
+
+        if len(array) == 0:
+            return numpy.zeros((0, 3))
+
+        return (array - self.origin).dot(self.matrix.T)
+
+    def projectDirection(self, direction):
+        local = self.matrix.dot(
+            numpy.array([direction.x, direction.y, direction.z], dtype=float))
+
+        return FreeCAD.Vector(local[0], local[1], local[2])
+
+
 def getProj(vec, plane):
     if not plane:
         return vec
@@ -162,23 +225,125 @@ def getPatternType(o):
     return mat["PatternType"]
 
 
-def isEdgeOnPlane(edge, plane):
-    precision = DraftVecUtils.precision()
-    planeBase = plane.CenterOfMass
-    planeNormal = plane.normalAt(0.5, 0.5)
+DEFAULT_SHAPE_COLOR = (0.8, 0.8, 0.8, 0.0)
+DEFAULT_LINE_COLOR = (0.1, 0.1, 0.1, 0.0)
 
-    points = [v.Point for v in edge.Vertexes]
 
-    for p in points:
-        distance = p.distanceToPlane(planeBase, planeNormal)
+def getShapeColor(o, storedColors=None):
+    """Returns the shape color of the object.
+    Without a ViewObject (e.g. in FreeCADCmd), the color stored in the document file is used,
+    then the color of the material and finally a default color.
+    """
+    if o.ViewObject is not None:
+        return o.ViewObject.ShapeColor
 
-        if distance < 0:
-            distance = distance * -1
+    if storedColors and o.Name in storedColors and "ShapeColor" in storedColors[o.Name]:
+        return storedColors[o.Name]["ShapeColor"]
 
-        if distance > precision:
-            return False
+    if hasattr(o, "Material") and o.Material and hasattr(o.Material, "Color"):
+        return o.Material.Color
+
+    return DEFAULT_SHAPE_COLOR
+
+
+def getLineColor(o, storedColors=None):
+    if o.ViewObject is not None:
+        return o.ViewObject.LineColor
 
-    return True
+    if storedColors and o.Name in storedColors and "LineColor" in storedColors[o.Name]:
+        return storedColors[o.Name]["LineColor"]
+
+    return DEFAULT_LINE_COLOR
+
+
+def getShapeEntry(o, storedColors=None):
+    """Returns the entry [shape, color, pattern type, name] used by the renderer for the object.
+    None, when the object has no faces to render.
+    """
+    if not o.isDerivedFrom("Part::Feature"):
+        return None
+
+    color = getShapeColor(o, storedColors)
+    shape = o.Shape
+
+    if not shape.Faces:
+        return None
+
+    return [shape, color, getPatternType(o), o.Name]
+
+
+def getDepthRanges(faces, normal):
+    """Returns the nearest and the farthest depth of the bound box of every FaceData along the normal.
+    The depth grows towards the viewer. Both are returned as arrays.
+    """
+    if not faces:
+        return (numpy.zeros(0), numpy.zeros(0))
+
+    boxes = [f.originalFace.BoundBox for f in faces]
+    minimum = numpy.array([(bb.XMin, bb.YMin, bb.ZMin) for bb in boxes], dtype=float)
+    maximum = numpy.array([(bb.XMax, bb.YMax, bb.ZMax) for bb in boxes], dtype=float)
+    direction = numpy.array(normal, dtype=float)
+
+    a = minimum * direction
+    b = maximum * direction
+
+    return (numpy.maximum(a, b).sum(axis=1), numpy.minimum(a, b).sum(axis=1))
+
+
+def getArcFlags(edge, forward):
+    """Returns the svg (large arc, sweep) flags of a circular edge in local coordinates.
+    The circle runs counterclockwise around its axis from the first to the last vertex.
+    As the svg y axis points down, a counterclockwise arc has a sweep flag of 0.
+    """
+    counterClockwise = (edge.Curve.Axis.z >= 0) == forward
+    largeArc = abs(edge.LastParameter - edge.FirstParameter) > math.pi
+
+    return (int(largeArc), int(not counterClockwise))
+
+
+def getPlaneCrossing(points, tolerance):
+    """Intersects a planar polygon with the plane z = 0.
+    points are the corners of the polygon in order. Returns the end points of the
+    intersection as two (x, y) arrays, None when the polygon does not cross the plane.
+    """
+    crossings = []
+    count = len(points)
+
+    if all([abs(p.z) <= tolerance for p in points]):
+        # The polygon lies in the plane, there is no line of intersection
+        return None
+
+    for i in range(count):
+        a = points[i]
+        b = points[(i + 1) % count]
+
+        if abs(a.z) <= tolerance:
+            crossings.append((a.x, a.y))
+        elif abs(b.z) > tolerance and (a.z < 0) != (b.z < 0):
+            t = a.z / (a.z - b.z)
+            crossings.append((a.x + (b.x - a.x) * t, a.y + (b.y - a.y) * t))
+
+    if len(crossings) < 2:
+        return None
+
+    crossings = numpy.array(crossings, dtype=float)
+
+    # A convex polygon crosses the plane in a single segment, its ends are the farthest points
+    distances = numpy.linalg.norm(
+        crossings[:, numpy.newaxis, :] - crossings[numpy.newaxis, :, :], axis=2)
+    i, j = numpy.unravel_index(numpy.argmax(distances), distances.shape)
+
+    if distances[i, j] <= tolerance:
+        return None
+
+    return (crossings[i], crossings[j])
+
+
+def getShapeBounds(shape):
+    "Returns (minx, miny, maxx, maxy) of a shape in local coordinates"
+    bb = shape.BoundBox
+
+    return (bb.XMin, bb.YMin, bb.XMax, bb.YMax)
 
 
 class BoundBox():
@@ -216,10 +381,29 @@ class BoundBox():
 
             self.update(bb.XMin, bb.YMin, bb.XMax, bb.YMax)
 
+    def adaptFromPolylines(self, polylines):
+        "Adapts to a list of Nx2 arrays"
+        for p in polylines:
+            minimum = p.min(axis=0)
+            maximum = p.max(axis=0)
+
+            self.update(minimum[0], minimum[1], maximum[0], maximum[1])
+
+    def adaptFromFaces(self, faces):
+        "Adapts to a list of FaceData. Uses the projected polygons, when available"
+        for f in faces:
+            minx, miny, maxx, maxy = f.getBounds()
+
+            self.update(minx, miny, maxx, maxy)
+
     def adaptFromDrafts(self, objects):
         for o in objects:
             objectType = Draft.getType(o)
             if objectType == "Dimension":
+                if o.ViewObject is None:
+                    # The dimension points are only calculated by the view provider
+                    continue
+
                 start = o.ViewObject.Proxy.p2
                 end = o.ViewObject.Proxy.p3
                 start = getProj(start, self.plane)
@@ -262,35 +446,51 @@ class BoundBox():
 
 
 class FaceData:
-    def __init__(self, originalFace, color, pattern_type, reorientedFace=None):
+    def __init__(self, originalFace, color, pattern_type, reorientedFace=None, polygon=None, depth=None):
         self.originalFace = originalFace
         self.color = color
         self.pattern_type = pattern_type
-        self.reorientedFace = reorientedFace
+        self.polygon = polygon
+        # Signed distance of the center of mass of the original face from the plane, see Renderer.getFaceDepth
+        self.depth = depth
+        self._reorientedFace = reorientedFace
         self.points = None
+        self.signature = None
 
-    def matches(self, otherFace):
-        selfPoints = self.getPoints()
-        otherPoints = otherFace.getPoints()
+    @property
+    def reorientedFace(self):
+        """The projected face as OCC face.
+        Faces projected by the renderer only have a polygon, the OCC face is built on first access.
+        """
+        if self._reorientedFace is None and self.polygon is not None:
+            self._reorientedFace = self.polygon.toFace()
 
-        if not selfPoints or not otherPoints:
-            return False
+        return self._reorientedFace
+
+    @reorientedFace.setter
+    def reorientedFace(self, face):
+        self._reorientedFace = face
+
+    def matches(self, otherFace):
+        selfSignature = self.getSignature()
+        otherSignature = otherFace.getSignature()
 
-        if len(selfPoints) != len(otherPoints):
+        if selfSignature is None or otherSignature is None:
             return False
 
-        # Find the first point, that is not in the other Faces points.
-        # When no point is missing, the faces can be considered as equals
-        for p in selfPoints:
-            if not p in otherPoints:
-                return False
+        # Two faces are considered equal, when they consist of the same points,
+        # each of them occurring the same number of times
+        return selfSignature == otherSignature
 
-        return True
-    
     def getPoints(self):
         if self.points:
             return self.points
 
+        if self.polygon is not None:
+            self.points = self.polygon.getPoints(5)
+
+            return self.points
+
         if not self.reorientedFace:
             return None
         
@@ -299,6 +499,32 @@ class FaceData:
         
         return self.points
 
+    def getBounds(self):
+        "Returns (minx, miny, maxx, maxy) of the projected face"
+        if self.polygon is not None:
+            return self.polygon.getBounds()
+
+        bb = self.reorientedFace.BoundBox
+
+        return (bb.XMin, bb.YMin, bb.XMax, bb.YMax)
+
+    def getSignature(self):
+        """Returns a hashable signature of the projected points.
+        Faces that match each other have the same signature, so it can be used as a dict key
+        """
+        if self.signature is not None:
+            return self.signature
+
+        points = self.getPoints()
+
+        if not points:
+            return None
+
+        # Sorted instead of a set, so points repeated by one face are not lost
+        self.signature = tuple(sorted(points))
+
+        return self.signature
+
     def correctlyOriented(self, planeNormal):
         if not self.originalFace:
             return True
@@ -320,6 +546,16 @@ class MarkerData:
         self.text = text
         self.color = color
 
+class ObjectCutResult:
+    "The faces created by cutting a single object"
+
+    def __init__(self, objectShapes=None, sections=None, faces=None, hiddenEdges=None):
+        self.objectShapes = objectShapes or []
+        self.sections = sections or []
+        self.faces = faces or []
+        self.hiddenEdges = hiddenEdges or []
+
+
 class CutResult:
     def __init__(self, objectShapes, sections, faces, cutvolume, cutface):
         self.objectShapes = objectShapes
@@ -329,6 +565,278 @@ class CutResult:
         self.cutface = cutface
 
 
+class LocalBoundBox:
+    "An axis aligned bounding box in the local coordinates of a working plane"
+
+    def __init__(self, wp, points):
+        localPoints = [wp.getLocalCoords(p) for p in points]
+
+        self.minx = min(p.x for p in localPoints)
+        self.miny = min(p.y for p in localPoints)
+        self.minz = min(p.z for p in localPoints)
+        self.maxx = max(p.x for p in localPoints)
+        self.maxy = max(p.y for p in localPoints)
+        self.maxz = max(p.z for p in localPoints)
+
+    @staticmethod
+    def fromBoundBox(wp, bb):
+        return LocalBoundBox(wp, [bb.getPoint(i) for i in range(8)])
+
+    def volume(self):
+        return (self.maxx - self.minx) * (self.maxy - self.miny) * (self.maxz - self.minz)
+
+    def contains(self, other, tolerance):
+        return (other.minx >= self.minx - tolerance and other.maxx <= self.maxx + tolerance and
+                other.miny >= self.miny - tolerance and other.maxy <= self.maxy + tolerance and
+                other.minz >= self.minz - tolerance and other.maxz <= self.maxz + tolerance)
+
+    def isDisjoint(self, other, tolerance):
+        "True, when the boxes do not overlap, except for touching boundaries"
+        return (other.maxx <= self.minx + tolerance or other.minx >= self.maxx - tolerance or
+                other.maxy <= self.miny + tolerance or other.miny >= self.maxy - tolerance or
+                other.maxz <= self.minz + tolerance or other.minz >= self.maxz - tolerance)
+
+
+class CutRegion:
+    """Classifies solids against the cutvolume by their bounding boxes, so the
+    boolean cut is only needed for solids that intersect the cut.
+
+    The invcutvolume (the part that is kept) is a box in the local coordinates of the
+    working plane. Together with the cutvolume it fills the box spanned by both volumes.
+    Both assumptions are checked by comparing volumes, the classification is disabled
+    when they don't hold.
+    """
+
+    REMOVED = "removed"
+    KEPT = "kept"
+    INTERSECTING = "intersecting"
+
+    def __init__(self, wp, cutvolume, invcutvolume):
+        self.wp = wp
+        self.tolerance = 10 ** -DraftVecUtils.precision()
+        self.enabled = False
+
+        try:
+            self.keepBox = LocalBoundBox(
+                wp, [v.Point for v in invcutvolume.Vertexes])
+            self.overallBox = LocalBoundBox(
+                wp, [v.Point for v in invcutvolume.Vertexes + cutvolume.Vertexes])
+
+            self.enabled = (isClose(invcutvolume.Volume, self.keepBox.volume()) and
+                            isClose(invcutvolume.Volume + cutvolume.Volume, self.overallBox.volume()))
+        except Exception as e:
+            if DEBUG:
+                print("Unable to build cut region: %s" % (e, ))
+
+        if DEBUG:
+            print("Bounding box classification enabled: %s" % (self.enabled, ))
+
+    def classify(self, sol):
+        if not self.enabled:
+            return CutRegion.INTERSECTING
+
+        box = LocalBoundBox.fromBoundBox(self.wp, sol.BoundBox)
+
+        if self.keepBox.contains(box, -self.tolerance):
+            return CutRegion.KEPT
+
+        if self.keepBox.isDisjoint(box, self.tolerance) and self.overallBox.contains(box, -self.tolerance):
+            return CutRegion.REMOVED
+
+        return CutRegion.INTERSECTING
+
+    def isBeyondDepth(self, sol, clipDepth):
+        """True, when the whole solid is farther behind the plane than clipDepth.
+        None of its faces would pass the clipDepth filter later on.
+        """
+        if clipDepth <= 0:
+            return False
+
+        box = LocalBoundBox.fromBoundBox(self.wp, sol.BoundBox)
+
+        return box.maxz < -clipDepth - self.tolerance
+
+
+class CutPlaneClassifier:
+    """The cut face as origin, unit normal and tolerance.
+
+    Classifies all faces of a solid in one numpy pass: faces perpendicular to the plane are
+    skipped, planar faces lying in the plane are sections, all others are secondary faces.
+    The tolerances match FaceData.correctlyOriented and DraftGeomUtils.isCoplanar, which are
+    still used for faces, that are not built on a plane surface.
+    """
+
+    SKIPPED = 0
+    SECTION = 1
+    SECONDARY = 2
+
+    def __init__(self, cutface, planeNormal):
+        self.cutface = cutface
+        self.planeNormal = planeNormal
+
+        normal = cutface.normalAt(0, 0)
+        normal.normalize()
+        origin = cutface.Vertexes[0].Point
+
+        self.normal = numpy.array((normal.x, normal.y, normal.z))
+        self.origin = numpy.array((origin.x, origin.y, origin.z))
+
+        precision = DraftVecUtils.precision()
+        # isCoplanar rounds the distances, correctlyOriented the angle (in degrees) to precision decimals
+        self.tolerance = 0.5 * 10 ** -precision
+        self.angleTolerance = math.sin(math.radians(0.5 * 10 ** -precision))
+
+    def classifyFaces(self, faces):
+        "Returns the class (SKIPPED, SECTION or SECONDARY) of every face"
+        classes = [CutPlaneClassifier.SECONDARY] * len(faces)
+        planarFaces = []
+        axes = []
+        points = []
+        owners = []
+
+        for i, f in enumerate(faces):
+            surface = f.Surface
+
+            if not isinstance(surface, Part.Plane):
+                classes[i] = self.classifyFace(f)
+                continue
+
+            axis = surface.Axis
+            vertexes = f.Vertexes
+
+            axes.append((axis.x, axis.y, axis.z))
+            points.extend([(v.Point.x, v.Point.y, v.Point.z) for v in vertexes])
+            owners.extend([len(planarFaces)] * len(vertexes))
+            planarFaces.append(i)
+
+        if not planarFaces:
+            return classes
+
+        axes = numpy.array(axes, dtype=float)
+        axes /= numpy.linalg.norm(axes, axis=1)[:, numpy.newaxis]
+        cosines = numpy.abs(axes.dot(self.normal))
+        sines = numpy.sqrt(numpy.maximum(1 - cosines * cosines, 0))
+
+        distances = numpy.zeros(len(planarFaces))
+
+        if points:
+            vertexDistances = numpy.abs(
+                (numpy.array(points, dtype=float) - self.origin).dot(self.normal))
+            numpy.maximum.at(distances, numpy.array(owners), vertexDistances)
+
+        skipped = cosines <= self.angleTolerance
+        sections = ~skipped & (sines <= self.angleTolerance) & (distances < self.tolerance)
+
+        for j, i in enumerate(planarFaces):
+            if skipped[j]:
+                classes[i] = CutPlaneClassifier.SKIPPED
+            elif sections[j]:
+                classes[i] = CutPlaneClassifier.SECTION
+
+        return classes
+
+    def classifyFace(self, f):
+        "Classifies a face with the generic helpers"
+        if not FaceData(f, None, None).correctlyOriented(self.planeNormal):
+            return CutPlaneClassifier.SKIPPED
+
+        if DraftGeomUtils.isCoplanar([f, self.cutface]):
+            return CutPlaneClassifier.SECTION
+
+        return CutPlaneClassifier.SECONDARY
+
+
+def getShapesBoundBox(shapes):
+    "Returns the bound box of all shapes, None for an empty list"
+    if not shapes:
+        return None
+
+    boundBox = shapes[0].BoundBox
+
+    for sh in shapes[1:]:
+        boundBox.add(sh.BoundBox)
+
+    return boundBox
+
+
+class CutVolumes:
+    """The cut face and volumes of a single clip setting, with the helpers built from them.
+    boundBox is the bound box of the shapes the volumes were built for.
+    """
+
+    def __init__(self, boundBox, cutface, cutvolume, invcutvolume, region, classifier):
+        self.boundBox = boundBox
+        self.cutface = cutface
+        self.cutvolume = cutvolume
+        self.invcutvolume = invcutvolume
+        self.region = region
+        self.classifier = classifier
+
+    def covers(self, boundBox):
+        if boundBox is None or self.boundBox is None:
+            return boundBox is None and self.boundBox is None
+
+        return self.boundBox.isInside(boundBox)
+
+
+class CutContext:
+    """Builds and keeps the cut volumes of a cut plane, per clip setting.
+
+    The volumes only depend on the plane, the clip setting and the bound box of the cut shapes.
+    They are built once per render and shared by the object, window and section cut passes.
+    They can also be reused by later renders, for any shapes inside their bound box.
+    """
+
+    def __init__(self, cutplane, wp):
+        self.cutplane = cutplane
+        self.wp = wp
+        self.volumes = {}
+
+    def findVolumes(self, shapes, clip):
+        "Returns the volumes of the clip setting, when they cover the shapes. None otherwise"
+        volumes = self.volumes.get(bool(clip))
+
+        if volumes is not None and volumes.covers(getShapesBoundBox(shapes)):
+            return volumes
+
+        return None
+
+    def buildVolumes(self, shapes, clip):
+        cutplane = self.cutplane
+        cutface, cutvolume, invcutvolume = ArchCommands.getCutVolume(
+            cutplane, shapes, clip=clip)
+        planeNormal = self.wp.getNormal()
+        planeNormal.normalize()
+
+        if not cutvolume:
+            cutface = cutplane
+            cutnormal = cutplane.normalAt(0.5, 0.5)
+            cutvolume = cutplane.extrude(cutnormal)
+            cutnormal = cutnormal.negative()
+            invcutvolume = cutplane.extrude(cutnormal)
+
+        if DEBUG:
+            print('cutface: %s, cutvolume: %s, invcutvolume: %s' %
+                  (cutface, cutvolume, invcutvolume))
+
+        region = None
+        classifier = None
+
+        if cutface and cutvolume:
+            region = CutRegion(self.wp, cutvolume, invcutvolume)
+            classifier = CutPlaneClassifier(cutface, planeNormal)
+
+        volumes = CutVolumes(getShapesBoundBox(shapes), cutface, cutvolume,
+                             invcutvolume, region, classifier)
+        self.volumes[bool(clip)] = volumes
+
+        return volumes
+
+
+def isClose(a, b, relativeTolerance=1e-6):
+    return abs(a - b) <= relativeTolerance * max(abs(a), abs(b), 1)
+
+
 def indexOfFace(faceList, face):
     if not faceList:
         return None
@@ -340,13 +848,121 @@ def indexOfFace(faceList, face):
     return None
 
 
+class FaceIndex:
+    """A hashed index of faces, keyed by the signature of their projected points.
+    Looking up a face is a dict access instead of a linear scan over all faces.
+    """
+
+    def __init__(self, faces=None):
+        self.faces = OrderedDict()
+
+        if faces:
+            for f in faces:
+                self.add(f)
+
+    def add(self, face):
+        """Adds the face to the index.
+        When a matching face is already present, it is replaced and moved to the end,
+        so the index keeps the order in which the faces were last added.
+        """
+        signature = face.getSignature()
+
+        if signature is None:
+            # Faces without points never match anything, keep them anyway
+            signature = id(face)
+        elif signature in self.faces:
+            del self.faces[signature]
+
+        self.faces[signature] = face
+
+    def contains(self, face):
+        signature = face.getSignature()
+
+        if signature is None:
+            return False
+
+        return signature in self.faces
+
+    def values(self):
+        return list(self.faces.values())
+
+
+def splitIntoChunks(items, count):
+    "splits the items into at most count chunks of consecutive items"
+    if not items:
+        return []
+
+    size = int(math.ceil(len(items) / max(count, 1)))
+
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def findPythonExecutable():
+    """Inside the FreeCAD GUI sys.executable points to the FreeCAD binary,
+    which can't be used to spawn worker processes. Look for the python
+    interpreter shipped next to it instead.
+    """
+    import os
+    import sys
+
+    executable = sys.executable
+
+    if os.path.basename(executable).lower().startswith("python"):
+        return None
+
+    directory = os.path.dirname(executable)
+
+    for name in ["python3", "python", "python.exe"]:
+        candidate = os.path.join(directory, name)
+
+        if os.path.isfile(candidate):
+            return candidate
+
+    return None
+
+
+def createCutExecutor(workers):
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    context = multiprocessing.get_context("spawn")
+    executable = findPythonExecutable()
+
+    if executable:
+        context.set_executable(executable)
+
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context)
+
+
 class Renderer:
-    def __init__(self, placement):
+    def __init__(self, placement, cutWorkers=0, executor=None, cache=None, reusableResults=None, shapeSource=None, stats=None, simplifyFaceCount=0, cullOccluded=False, cutContext=None):
         import WorkingPlane
 
+        self.cutWorkers = cutWorkers
+        self.executor = executor
+        self.cache = cache
+        # Provides the shape entries of the objects. Allows sharing the extracted shapes between renderers
+        self.shapeSource = shapeSource
+        # Cut results of a previous render, keyed by (pass, object name).
+        # The caller has to make sure, the objects and the cut settings did not change.
+        self.reusableResults = reusableResults or {}
+        self.objectResults = {}
+        # Shapes with more faces are refined before cutting. 0 disables the simplification
+        self.simplifyFaceCount = simplifyFaceCount
+        # Drop secondary faces completely covered by nearer faces
+        self.cullOccluded = cullOccluded
+        # The cut volumes of a previous render with the same plane and clip settings
+        self.cutContext = cutContext
+        self.stats = stats
+
+        if self.stats is None:
+            self.stats = RenderStats()
+
         self.reset()
         self.wp = WorkingPlane.plane()
         self.wp.setFromPlacement(placement, rebase=True)
+        self.projection = PlaneProjection(self.wp)
+        self.precision = DraftVecUtils.precision()
 
         if DEBUG:
             print("Renderer initialized on %s. %s, %s" %
@@ -369,17 +985,46 @@ class Renderer:
         self.sections = []
         self.windows = []
         self.hiddenEdges = []
+        self.hiddenLines = []
         self.sectionCuts = []
+        self.layerIndexes = {}
+
+    def getShapeEntry(self, o):
+        if self.shapeSource is not None:
+            entry = self.shapeSource.getShapeEntry(o)
+        else:
+            entry = getShapeEntry(o)
+
+        if entry is not None and self.simplifyFaceCount > 0:
+            entry = self.simplifyEntry(o.Document.Name, entry)
+
+        return entry
+
+    def simplifyEntry(self, documentName, entry):
+        "Replaces heavy shapes by a refined copy. Shared entries are not modified"
+        shape = entry[0]
+
+        with self.stats.stage("simplifyShapes"):
+            simplified = shape_simplifier.simplifiedShapes.getShape(
+                documentName, entry[3], shape, self.simplifyFaceCount)
+
+        if simplified is shape:
+            return entry
+
+        self.stats.count("shapesSimplified")
+        self.stats.count("facesRemovedBySimplify",
+                         len(shape.Faces) - len(simplified.Faces))
+
+        return [simplified] + entry[1:]
 
     def addObjects(self, objs):
         "add objects to this renderer"
 
         for o in objs:
-            if o.isDerivedFrom("Part::Feature"):
-                color = o.ViewObject.ShapeColor
-                if o.Shape.Faces:
-                    self.objectShapes.append(
-                        [o.Shape, color, getPatternType(o)])
+            entry = self.getShapeEntry(o)
+
+            if entry is not None:
+                self.objectShapes.append(entry)
 
         self.resetFlags()
 
@@ -387,11 +1032,10 @@ class Renderer:
         "add objects to this renderer"
 
         for o in objs:
-            if o.isDerivedFrom("Part::Feature"):
-                color = o.ViewObject.ShapeColor
-                if o.Shape.Faces:
-                    self.windowShapes.append(
-                        [o.Shape, color, getPatternType(o)])
+            entry = self.getShapeEntry(o)
+
+            if entry is not None:
+                self.windowShapes.append(entry)
 
         self.resetFlags()
 
@@ -414,8 +1058,13 @@ class Renderer:
     def addMarkers(self, markers):
         "add objects to this renderer"
 
+        storedColors = None
+
+        if self.shapeSource is not None:
+            storedColors = self.shapeSource.storedColors
+
         for m in markers:
-            color = m.ViewObject.LineColor
+            color = getLineColor(m, storedColors)
             face = m.Shape.Faces[0]
             self.markerShapes.append(MarkerData(face, m.Label, color))
 
@@ -425,103 +1074,244 @@ class Renderer:
         if not self.secondaryFaces:
             return
 
-        newSecondaryFaces = []
+        with self.stats.stage("removeDuplicates"):
+            self.doRemoveDuplicates()
+
+    def doRemoveDuplicates(self):
+        count = len(self.secondaryFaces)
+
+        sectionIndex = FaceIndex(self.sections)
+        newSecondaryFaces = FaceIndex()
 
         for face in self.secondaryFaces:
             # If the face is already in a section, do not add it to the secondary faces
-            if not face or indexOfFace(self.sections, face) is not None:
+            if not face or sectionIndex.contains(face):
                 continue
 
-            i = indexOfFace(newSecondaryFaces, face)
-
-            # if the face already exists, remove it from the list
+            # if the face already exists, it is removed from the index
             # Adding the new face again preserves the original face order
-            if i is not None:
-                del newSecondaryFaces[i]
-
-            newSecondaryFaces.append(face)
+            newSecondaryFaces.add(face)
 
-        self.secondaryFaces = newSecondaryFaces
+        self.secondaryFaces = newSecondaryFaces.values()
+        self.stats.count("duplicateFacesRemoved", count - len(self.secondaryFaces))
 
-    def sort(self):
+    def getViewNormal(self):
+        "The plane normal, tiny components are rounded away so they do not change the order of equal faces"
         normal = self.wp.getNormal()
 
-        normalx = round(normal.x, 3)
-        normaly = round(normal.y, 3)
-        normalz = round(normal.z, 3)
+        return (round(normal.x, 9), round(normal.y, 9), round(normal.z, 9))
+
+    def sort(self):
+        normal = self.getViewNormal()
 
         if self.secondaryFaces:
-            self.sortFaces(self.secondaryFaces, normalx, normaly, normalz)
+            self.sortFaces(self.secondaryFaces, normal)
         if self.sections:
-            self.sortFaces(self.sections, normalx, normaly, normalz)
+            self.sortFaces(self.sections, normal)
         if self.windows:
-            self.sortFaces(self.windows, normalx, normaly, normalz)
-        if self.hiddenEdges:
-            self.sortFaces(self.hiddenEdges, normalx, normaly, normalz)
+            self.sortFaces(self.windows, normal)
+
+    def sortFaces(self, faces, normal):
+        """Sorts the faces back to front (painter's algorithm) for any plane normal.
+        The key is the nearest corner of the bound box of the original face.
+        For axis aligned planes the key is the maximum coordinate along the axis, which is
+        the nearest corner for positive and the farthest corner for negative normals.
+        """
+        axes = [n for n in normal if round(n, 3) != 0]
+
+        if len(axes) == 1:
+            normal = tuple([n if round(n, 3) != 0 else 0 for n in normal])
+
+        nearest, farthest = getDepthRanges(faces, normal)
+        keys = nearest
+
+        if len(axes) == 1 and axes[0] < 0:
+            keys = farthest
 
-    def sortFaces(self, faces, normalx, normaly, normalz):
-        def sortX(entry):
-            shape = entry.originalFace
+        order = numpy.argsort(keys, kind="stable")
+
+        faces[:] = [faces[i] for i in order]
+
+    def getTile(self, bounds, minFeatureSize=0):
+        """Returns a copy of this renderer, that only holds the 2D geometry inside bounds (minx, miny, maxx, maxy).
+        Faces and hidden lines are clipped to the bounds. Faces and hidden lines with an extent below
+        minFeatureSize (in model units) are left out. Section cuts and markers are kept whole,
+        so their arrows and labels stay in place, but only when they reach into the bounds.
+        Nothing is cut again.
+        """
+        self.prepareSvg()
+
+        tile = copy.copy(self)
+        tile.sections = self.clipFaces("sections", bounds, minFeatureSize)
+        tile.secondaryFaces = self.clipFaces(
+            "secondaryFaces", bounds, minFeatureSize)
+        tile.windows = self.clipFaces("windows", bounds, minFeatureSize)
+        tile.hiddenLines = []
+
+        for polyline in self.hiddenLines:
+            extent = polyline.max(axis=0) - polyline.min(axis=0)
+
+            if max(extent) < minFeatureSize:
+                continue
 
-            return shape.BoundBox.XMax
+            tile.hiddenLines.extend(
+                hidden_lines.clipPolylineToRectangle(polyline, bounds))
 
-        def sortY(entry):
-            shape = entry.originalFace
+        tile.sectionCuts = [s for s in self.sectionCuts
+                            if boundsIntersect(getShapeBounds(s[0]), bounds)]
+        tile.markerShapes = [m for m in self.markerShapes if self.isMarkerInBounds(m, bounds)]
 
-            return shape.BoundBox.YMax
+        return tile
 
-        def sortZ(entry):
-            shape = entry.originalFace
+    def isMarkerInBounds(self, marker, bounds):
+        projected = self.projectFace(FaceData(marker.face, None, None))
 
-            return shape.BoundBox.ZMax
+        return projected is not None and boundsIntersect(projected.polygon.getBounds(), bounds)
 
-        if normalz > 0:
-            faces.sort(key=sortZ)
-        elif normalx > 0:
-            faces.sort(key=sortX)
-        elif normaly > 0:
-            faces.sort(key=sortY)
-        elif normalz < 0:
-            faces.sort(key=sortZ, reverse=True)
-        elif normalx < 0:
-            faces.sort(key=sortX, reverse=True)
-        elif normaly < 0:
-            faces.sort(key=sortY, reverse=True)
+    def clipFaces(self, layer, bounds, minFeatureSize):
+        "Clips the faces of a layer, the faces keep their order"
+        faces = getattr(self, layer)
+
+        # The index is built once and shared by all tiles
+        if not layer in self.layerIndexes:
+            self.layerIndexes[layer] = RTree([(f.getBounds(), i) for i, f in enumerate(faces) if f])
+
+        clipped = []
+
+        for i in sorted(self.layerIndexes[layer].query(bounds)):
+            f = faces[i]
+            minx, miny, maxx, maxy = f.getBounds()
+
+            if max(maxx - minx, maxy - miny) < minFeatureSize:
+                continue
+
+            if f.polygon is None:
+                clipped.append(f)
+                continue
+
+            polygon = f.polygon.clipToRectangle(bounds)
+
+            if polygon is None:
+                continue
+
+            if polygon is f.polygon:
+                clipped.append(f)
+            else:
+                clipped.append(FaceData(f.originalFace, f.color,
+                                        f.pattern_type, polygon=polygon, depth=f.depth))
+
+        return clipped
+
+    def cullOccludedFaces(self):
+        """Removes the secondary faces, that are completely covered by a section or secondary face
+        lying entirely in front of them. Both are drawn opaque, windows are not used as occluders.
+        """
+        if not self.secondaryFaces:
+            return
+
+        occluders = self.sections + self.secondaryFaces
+        offset = len(self.sections)
+        nearest, farthest = getDepthRanges(occluders, self.getViewNormal())
+        tolerance = 10 ** -self.precision
+
+        index = RTree([(f.polygon.getBounds(), i) for i, f in enumerate(occluders)
+                       if f.polygon is not None])
+        visible = []
+
+        for j, face in enumerate(self.secondaryFaces):
+            i = offset + j
+
+            if face.polygon is None or not self.isOccluded(face, i, occluders, index, nearest, farthest, tolerance):
+                visible.append(face)
+
+        self.stats.count("occludedFacesCulled",
+                         len(self.secondaryFaces) - len(visible))
+        self.secondaryFaces = visible
+
+    def isOccluded(self, face, faceIndex, occluders, index, nearest, farthest, tolerance):
+        bounds = face.polygon.getBounds()
+
+        for k in index.query(bounds):
+            if k == faceIndex or farthest[k] <= nearest[faceIndex] + tolerance:
+                continue
+
+            polygon = occluders[k].polygon
+
+            if boundsContain(polygon.getBounds(), bounds) and polygon.containsPolygon(face.polygon):
+                return True
+
+        return False
 
     def projectFace(self, face):
-        "projects a single face on the WP"
+        """projects a single face on the WP.
+        The projection is stored as Polygon2D, no OCC face is created
+        """
 
-        wires = []
         if not face.originalFace.Wires:
             if DEBUG:
                 print("Error: Unable to project face on the WP")
             return None
         norm = face.originalFace.normalAt(0, 0)
+
+        # Collect the points of all wires, so they can be projected at once
+        points = []
+        wireSizes = []
+
         for w in face.originalFace.Wires:
-            verts = []
-            edges = Part.__sortEdges__(w.Edges)
-            for e in edges:
-                v = e.Vertexes[0].Point
-                v = self.wp.getLocalCoords(v)
-                verts.append(v)
-            verts.append(verts[0])
-            if len(verts) > 2:
-                wires.append(Part.makePolygon(verts))
-        try:
-            sh = ArchCommands.makeFace(wires)
-        except:
+            edges = orderEdges(w.Edges, self.precision)
+            points.extend([getStartPoint(e, forward) for e, forward in edges])
+            wireSizes.append(len(edges))
+
+        polygon = Polygon2D.fromPoints(
+            self.projection.projectPoints(points), wireSizes)
+
+        if polygon is None:
             if DEBUG:
                 print("Error: Unable to project face on the WP")
             return None
-        else:
-            # restoring flipped normals
-            vnorm = self.wp.getLocalCoords(norm)
-            if vnorm.getAngle(sh.normalAt(0, 0)) > 1:
-                sh.reverse()
 
-            face.reorientedFace = sh
+        # restoring flipped normals
+        vnorm = self.projection.projectDirection(norm)
+        polygon.reversed = vnorm.z * signedArea(polygon.rings[0]) < 0
+
+        face.polygon = polygon
 
-            return face
+        return face
+
+    def buildHiddenLines(self):
+        """Projects the hidden edges to polylines.
+        The parts covered by section faces are removed.
+        """
+        points = []
+        sizes = []
+
+        for e in self.hiddenEdges:
+            edgePoints = hidden_lines.discretizeEdge(e)
+
+            if len(edgePoints) < 2:
+                continue
+
+            points.extend(edgePoints)
+            sizes.append(len(edgePoints))
+
+        if not points:
+            return []
+
+        projected = self.projection.projectPoints(points)
+        polylines = []
+        start = 0
+
+        for size in sizes:
+            polylines.append(projected[start:start + size, 0:2])
+            start += size
+
+        index = hidden_lines.buildSectionIndex(self.sections)
+        visible, culled = hidden_lines.cullPolylines(polylines, index)
+
+        self.stats.count("hiddenEdges", len(polylines))
+        self.stats.count("hiddenSegmentsCulled", culled)
+
+        return visible
 
     def projectEdge(self, edge):
         "projects a single edge on the WP"
@@ -531,82 +1321,304 @@ class Renderer:
             return Part.LineSegment(v1, v2).toShape()
         return edge
 
-    def doCut(self, cutplane, hidden, clip, clipDepth, shapes):
+    def doCut(self, cutplane, hidden, clip, clipDepth, shapes, passName="objects"):
+        with self.stats.stage("doCut:%s" % (passName, )):
+            return self.doCutShapes(cutplane, hidden, clip, clipDepth, shapes, passName)
+
+    def doCutShapes(self, cutplane, hidden, clip, clipDepth, shapes, passName):
+        stats = self.stats
         objectShapes = []
         sections = []
         faces = []
 
-        shps = []
+        volumes = self.getCutVolumes(cutplane, [sh[0] for sh in shapes], clip)
+        cutface = volumes.cutface
+        cutvolume = volumes.cutvolume
+        invcutvolume = volumes.invcutvolume
 
-        # self.reorient()
-        # self.filterWrongOrientedFaces()
+        if cutface and cutvolume:
+            region = volumes.region
+            classifier = volumes.classifier
+            cutKey = self.buildCutKey(cutplane, hidden, clip, clipDepth)
+            results = []
+            pendingResults = []
+            solids = []
+            solidsToCut = []
 
-        for sh in shapes:
-            shps.append(sh[0])
+            for sh in shapes:
+                key = None
+                resultKey = (passName, sh[3])
+
+                if resultKey in self.reusableResults:
+                    result = self.reusableResults[resultKey]
+                    self.objectResults[resultKey] = result
+                    results.append(result)
+                    stats.count("reusedObjects")
+                    continue
+
+                if self.cache is not None:
+                    key = self.cache.buildKey(sh, cutKey)
+                    cached = self.cache.get(key, sh[0])
+
+                    if cached is not None:
+                        self.objectResults[resultKey] = cached
+                        results.append(cached)
+                        stats.count("cachedObjects")
+                        continue
+
+                result = ObjectCutResult()
+                self.objectResults[resultKey] = result
+                results.append(result)
+                pendingResults.append((key, result, sh[0]))
+
+                timing = stats.getObject(passName, sh[3])
+                timing.faces += len(sh[0].Faces)
+                timing.edges += len(sh[0].Edges)
+                timing.vertexes += len(sh[0].Vertexes)
+                stats.count("objects")
 
-        cutface, cutvolume, invcutvolume = ArchCommands.getCutVolume(
-            cutplane, shps, clip=clip)
-        planeNormal = self.wp.getNormal()
-        planeNormal.normalize()
+                for sol in sh[0].Solids:
+                    position = region.classify(sol)
+                    timing.solids += 1
 
-        if not cutvolume:
-            cutface = cutplane
-            cutnormal = cutplane.normalAt(0.5, 0.5)
-            cutvolume = cutplane.extrude(cutnormal)
-            cutnormal = cutnormal.negative()
-            invcutvolume = cutplane.extrude(cutnormal)
+                    if position == CutRegion.REMOVED:
+                        # The whole solid lies inside the cutvolume, so nothing of it is visible
+                        if hidden:
+                            result.hiddenEdges.extend(sol.Edges)
 
-        if DEBUG:
-            print('cutface: %s, cutvolume: %s, invcutvolume: %s' %
-                  (cutface, cutvolume, invcutvolume))
+                        stats.count("solidsRemoved")
+                        continue
 
-        if cutface and cutvolume:
-            for sh in shapes:
-                for sol in sh[0].Solids:
-                    c = sol.cut(cutvolume)
-                    objectShapes.append([c]+sh[1:])
-
-                    for f in c.Faces:
-                        faceData = FaceData(f, sh[1], sh[2])
-                        faceData = self.projectFace(faceData)
-                        # TODO: Create temporary face list and filter duplicate faces
-                        # Do isCoplanar check later on, when duplicate faces are removed
-
-                        if faceData.correctlyOriented(planeNormal):
-                            if DraftGeomUtils.isCoplanar([f, cutface]):
-                                sections.append(faceData)
-                            else:
-                                faces.append(faceData)
-
-                    if hidden:
-                        c = sol.cut(invcutvolume)
-                        # self.projectEdge(e)
-                        self.hiddenEdges.extend(c.Edges)
+                    if not hidden and region.isBeyondDepth(sol, clipDepth):
+                        stats.count("solidsBeyondDepth")
+                        continue
+
+                    solids.append((sol, sh, position, result, timing))
+
+                    if position == CutRegion.INTERSECTING:
+                        solidsToCut.append(sol)
+
+            stats.count("solidsCut", len(solidsToCut))
+            stats.count("solidsKept", len(solids) - len(solidsToCut))
+
+            with stats.stage("cutSolids"):
+                cuts = iter(self.cutSolids(solidsToCut,
+                                           cutvolume, invcutvolume, hidden))
+
+            if DEBUG:
+                print("Cutting %s of %s solids" % (len(solidsToCut), len(solids)))
+
+            projectionStart = time.perf_counter()
+
+            for sol, sh, position, result, timing in solids:
+                if position == CutRegion.INTERSECTING:
+                    c, hiddenShape, seconds = next(cuts)
+                    timing.cut += seconds
+                else:
+                    # Nothing of the solid is inside the cutvolume
+                    c, hiddenShape = (sol, None)
+
+                start = time.perf_counter()
+                result.objectShapes.append([c]+sh[1:])
+
+                cFaces = c.Faces
+
+                for f, faceClass in zip(cFaces, classifier.classifyFaces(cFaces)):
+                    # Faces perpendicular to the plane are not visible, no need to project them
+                    if faceClass == CutPlaneClassifier.SKIPPED:
+                        stats.count("facesSkipped")
+                        continue
+
+                    faceData = self.projectFace(FaceData(f, sh[1], sh[2]))
+
+                    if faceData is None:
+                        continue
+
+                    stats.count("facesProjected")
+
+                    if faceClass == CutPlaneClassifier.SECTION:
+                        result.sections.append(faceData)
+                    else:
+                        result.faces.append(faceData)
+
+                if hidden and hiddenShape:
+                    # self.projectEdge(e)
+                    result.hiddenEdges.extend(hiddenShape.Edges)
+
+                timing.project += time.perf_counter() - start
+
+            stats.addStage("projectFaces", projectionStart, time.perf_counter())
+
+            for key, result, shape in pendingResults:
+                if key is not None:
+                    self.cache.put(key, result, shape)
+
+            for result in results:
+                objectShapes.extend(result.objectShapes)
+                sections.extend(result.sections)
+                faces.extend(result.faces)
+                self.hiddenEdges.extend(result.hiddenEdges)
 
         if clipDepth > 0:
-            faces = [f for f in faces if self.isInRange(
-                f.originalFace, clipDepth)]
+            faces = [f for f in faces if self.isInRange(f, clipDepth)]
 
         return CutResult(objectShapes, sections, faces, cutvolume, cutface)
 
+    def getCutVolumes(self, cutplane, shapes, clip):
+        "Returns the cut volumes for the shapes, built volumes of the cut context are reused"
+        if self.cutContext is None:
+            self.cutContext = CutContext(cutplane, self.wp)
+
+        volumes = self.cutContext.findVolumes(shapes, clip)
+
+        if volumes is not None:
+            self.stats.count("cutVolumesReused")
+            return volumes
+
+        with self.stats.stage("buildCutVolumes"):
+            return self.cutContext.buildVolumes(shapes, clip)
+
+    def buildCutKey(self, cutplane, hidden, clip, clipDepth):
+        """Builds the part of the cache key, that depends on the cut settings.
+        Cut results can only be reused, when the plane and all clip settings are the same.
+        """
+        if self.cache is None:
+            return None
+
+        placement = self.wp.getPlacement()
+        base = placement.Base
+        planeBox = LocalBoundBox(self.wp, [v.Point for v in cutplane.Vertexes])
+        precision = DraftVecUtils.precision()
+
+        return (round(base.x, precision), round(base.y, precision), round(base.z, precision),
+                tuple(round(q, 9) for q in placement.Rotation.Q),
+                round(planeBox.maxx - planeBox.minx, precision),
+                round(planeBox.maxy - planeBox.miny, precision),
+                bool(hidden), bool(clip), round(clipDepth, precision), precision,
+                self.simplifyFaceCount)
+
+    def cutSolids(self, solids, cutvolume, invcutvolume, hidden):
+        """Cuts all solids with the cutvolume.
+        Returns a list of (cut shape, hidden shape, seconds) tuples in the same order as the solids.
+        The hidden shape is None, when hidden is False.
+        """
+        if self.cutWorkers > 1 and len(solids) > 1:
+            try:
+                return self.cutSolidsParallel(solids, cutvolume, invcutvolume, hidden)
+            except Exception as e:
+                self.stats.count("parallelCutFallbacks")
+                FreeCAD.Console.PrintWarning(
+                    "Parallel cut failed, falling back to serial cut: %s\n" % (e, ))
+
+        cuts = []
+
+        for sol in solids:
+            start = time.perf_counter()
+            c = sol.cut(cutvolume)
+            hiddenShape = None
+
+            if hidden:
+                hiddenShape = sol.cut(invcutvolume)
+
+            cuts.append((c, hiddenShape, time.perf_counter() - start))
+
+        return cuts
+
+    def cutSolidsParallel(self, solids, cutvolume, invcutvolume, hidden):
+        """Spreads the solids over a process pool. The shapes are transferred as BREP strings.
+        The results are collected in the order the chunks were submitted, so the
+        outcome is the same as for the serial cut.
+        """
+        cutBrep = cutvolume.exportBrepToString()
+        invcutBrep = None
+
+        if hidden:
+            invcutBrep = invcutvolume.exportBrepToString()
+
+        solidBreps = [sol.exportBrepToString() for sol in solids]
+        chunks = splitIntoChunks(solidBreps, self.cutWorkers * 4)
+
+        executor = self.executor
+        ownExecutor = executor is None
+
+        if ownExecutor:
+            executor = createCutExecutor(self.cutWorkers)
+
+        try:
+            futures = [executor.submit(cutBrepSolids, cutBrep, invcutBrep, chunk)
+                       for chunk in chunks]
+
+            breps = []
+
+            for future in futures:
+                breps.extend(future.result())
+        finally:
+            if ownExecutor:
+                executor.shutdown()
+
+        if DEBUG:
+            print("Cut %s solids in %s chunks with %s workers" %
+                  (len(solids), len(chunks), self.cutWorkers))
+
+        cuts = []
+
+        for cBrep, hiddenBrep, seconds in breps:
+            hiddenShape = None
+
+            if hiddenBrep is not None:
+                hiddenShape = shapeFromBrep(hiddenBrep)
+
+            cuts.append((shapeFromBrep(cBrep), hiddenShape, seconds))
+
+        return cuts
+
     def doCutSectionCuts(self, cutvolume, cutface, sectionCutShapes):
+        """Intersects the planes of the section cuts with the cut face.
+        The segments are computed in local coordinates, no boolean is needed.
+        """
         edges = []
 
-        if cutvolume:
-            for s in sectionCutShapes:
-                sh = s.face
-                c = sh.cut(cutvolume)
-                normal = sh.normalAt(0.5, 0.5)
+        if not cutvolume:
+            return edges
+
+        tolerance = 10 ** -self.precision
+        faceBox = LocalBoundBox(self.wp, [v.Point for v in cutface.Vertexes])
+        bounds = (faceBox.minx, faceBox.miny, faceBox.maxx, faceBox.maxy)
+
+        for s in sectionCutShapes:
+            sh = s.face
+            corners = [self.wp.getLocalCoords(v.Point)
+                       for v in sh.OuterWire.OrderedVertexes]
+            crossing = getPlaneCrossing(corners, tolerance)
+
+            if crossing is None:
+                continue
 
-                for e in c.Edges:
-                    if isEdgeOnPlane(e, cutface):
-                        e = self.projectEdge(e)
-                        edges.append((e, normal, s.text))
+            p0, p1 = crossing
+            clipped = hidden_lines.clipSegmentToRectangle(p0, p1, bounds)
+
+            if clipped is None:
+                continue
+
+            start = p0 + (p1 - p0) * clipped[0]
+            end = p0 + (p1 - p0) * clipped[1]
+
+            if numpy.linalg.norm(end - start) <= tolerance:
+                continue
+
+            e = Part.LineSegment(FreeCAD.Vector(start[0], start[1], 0),
+                                 FreeCAD.Vector(end[0], end[1], 0)).toShape()
+            normal = sh.normalAt(0.5, 0.5)
+            edges.append((e, normal, s.text))
 
         return edges
 
     def cut(self, cutplane, hidden=False, clip=False, clipDepth=0):
         "Cuts through the objectShapes with a given cut plane and builds section faces"
+        with self.stats.stage("cut"):
+            self.doCutAll(cutplane, hidden, clip, clipDepth)
+
+    def doCutAll(self, cutplane, hidden, clip, clipDepth):
         if DEBUG:
             print("\n\n======> Starting cut\n\n")
 
@@ -616,6 +1628,15 @@ class Renderer:
         objectCutVolume = None
         objectCutFace = None
 
+        # Build the volumes once for the shapes of both passes, the objects are always clipped
+        shapes = [sh[0] for sh in self.objectShapes + self.windowShapes]
+
+        if self.objectShapes:
+            self.getCutVolumes(cutplane, shapes, True)
+
+        if self.windowShapes:
+            self.getCutVolumes(cutplane, shapes, clip)
+
         if not self.objectShapes:
             if DEBUG:
                 print("No objects to make sections")
@@ -639,7 +1660,7 @@ class Renderer:
                 print("No objects to make windows")
         else:
             result = self.doCut(
-                cutplane, hidden, clip, clipDepth, self.windowShapes)
+                cutplane, hidden, clip, clipDepth, self.windowShapes, passName="windows")
 
             self.windowShapes = result.objectShapes
             self.windows = result.sections
@@ -651,13 +1672,22 @@ class Renderer:
             if DEBUG:
                 print("No objects to make sectionCuts")
         else:
-            self.sectionCuts = self.doCutSectionCuts(
-                objectCutVolume, objectCutFace, self.sectionCutShapes)
+            with self.stats.stage("doCutSectionCuts"):
+                self.sectionCuts = self.doCutSectionCuts(
+                    objectCutVolume, objectCutFace, self.sectionCutShapes)
 
             if DEBUG:
                 print("Built ", len(self.sectionCuts), " sectionCuts")
 
-        self.sort()
+        if hidden:
+            with self.stats.stage("hiddenLines"):
+                self.hiddenLines = self.buildHiddenLines()
+
+            if DEBUG:
+                print("Built ", len(self.hiddenLines), " hidden lines")
+
+        with self.stats.stage("sort"):
+            self.sort()
 
         self.iscut = True
         self.sorted = True
@@ -706,52 +1736,148 @@ class Renderer:
         The Y Axis in the SVG Coordinate system is reversed from the FreeCAD Coordinate System.
         So we change the y coordinates accordingly
         """
-        def toCommand(command, x, y):
-            return '%s %s %s ' % (command, toNumberString(x), toNumberString(-y))
+        edges = orderEdges(w.Edges, self.precision)
+
+        # All coordinates of the path are formatted in one go:
+        # the start point, followed by the end point of every edge
+        v = getStartPoint(*edges[0])
+        values = [v.x, -v.y]
+        radii = []
+        arcFlags = []
+        geomTypes = [DraftGeomUtils.geomType(e) for e, forward in edges]
 
-        edges = Part.__sortEdges__(w.Edges)
+        for (e, forward), geomType in zip(edges, geomTypes):
+            v = getEndPoint(e, forward)
+            values.append(v.x)
+            values.append(-v.y)
 
-        v = edges[0].Vertexes[0].Point
-        svg = toCommand('M', v.x, v.y)
+            if geomType == "Circle":
+                radii.append(e.Curve.Radius)
+                arcFlags.append(getArcFlags(e, forward))
 
-        for e in edges:
-            if (DraftGeomUtils.geomType(e) == "Line") or (DraftGeomUtils.geomType(e) == "BSplineCurve"):
-                v = e.Vertexes[-1].Point
-                svg += toCommand('L', v.x, v.y)
-            elif DraftGeomUtils.geomType(e) == "Circle":
-                r = e.Curve.Radius
-                v = e.Vertexes[-1].Point
+        numbers = toNumberStrings(values, self.precision)
+        radiusNumbers = iter(toNumberStrings(radii, self.precision))
+        arcFlags = iter(arcFlags)
 
-                svg += 'A %s %s 0 0 1 %s %s ' % (toNumberString(r),
-                                                 toNumberString(r), toNumberString(v.x), toNumberString(-v.y))
+        svg = ['M %s %s ' % (numbers[0], numbers[1])]
+
+        for i, geomType in enumerate(geomTypes):
+            x = numbers[2 * i + 2]
+            y = numbers[2 * i + 3]
+
+            if (geomType == "Line") or (geomType == "BSplineCurve"):
+                svg.append('L %s %s ' % (x, y))
+            elif geomType == "Circle":
+                r = next(radiusNumbers)
+                largeArc, sweep = next(arcFlags)
+
+                svg.append('A %s %s 0 %s %s %s %s ' % (r, r, largeArc, sweep, x, y))
 
         if len(edges) > 1:
-            svg += 'Z '
+            svg.append('Z ')
+
+        return ''.join(svg)
+
+    def getFacePathData(self, face):
+        "Returns the path data of a FaceData or an OCC face"
+        if isinstance(face, FaceData):
+            if face.polygon is not None:
+                return self.getPolygonPathData(face.polygon)
+
+            face = face.reorientedFace
+
+        return ''.join([self.getPathData(w) for w in face.Wires])
 
-        return svg
+    def getPolygonPathData(self, polygon):
+        """Returns the path data of a Polygon2D.
+        The output is the same as for the wires of the corresponding OCC face.
+        """
+        svg = []
+
+        for ring in polygon.rings:
+            # Flip the y axis and format all coordinates of the ring at once
+            numbers = toNumberStrings((ring * (1, -1)).ravel(), self.precision)
+            coordinates = ['%s %s ' % (numbers[i], numbers[i + 1])
+                           for i in range(0, len(numbers), 2)]
+
+            svg.append('M ' + coordinates[0])
+            svg.extend(['L ' + c for c in coordinates[1:]])
+            svg.append('L ' + coordinates[0])
+            svg.append('Z ')
+
+        return ''.join(svg)
 
     def getPatternSVG(self):
-        if not hasattr(self, "patterns"):
-            return ''
+        return ''.join(self.iterPatternSVG())
 
-        patternsvg = ''
+    def iterPatternSVG(self):
+        if not hasattr(self, "patterns"):
+            return
 
         for pattern in self.patterns.values():
-            patternsvg += pattern + '\n'
+            yield pattern + '\n'
 
-        return patternsvg
+    def collectPatterns(self, faceHighlightDistance=0):
+        """Registers the patterns of all faces, without building any svg.
+        Used by the streaming writer, as the patterns have to be written before the faces.
+        """
+        self.patterns = {}
+
+        for f in self.secondaryFaces:
+            if f:
+                patternOpacity = 0.1
+
+                if self.isInRange(f, faceHighlightDistance):
+                    patternOpacity = 1
+
+                self.getPattern(f.color, f.pattern_type, patternOpacity)
+
+        for f in self.sections + self.windows:
+            if f:
+                self.getPattern(f.color, f.pattern_type)
+
+    def iterStyledFaces(self, layer, linewidth, faceHighlightDistance=0, highlightLineWidth=None):
+        """Yields (style, FaceData) for the faces of a layer ("sections", "windows" or "secondary"),
+        used by the optimized output. The styles match the path elements of the other emitters,
+        a style is a tuple (fill, fill opacity, stroke, stroke width, dash array).
+        """
+        if layer == "secondary":
+            for f in self.secondaryFaces:
+                if f:
+                    patternOpacity = 0.1
+                    strokeWidth = linewidth
+
+                    if self.isInRange(f, faceHighlightDistance):
+                        patternOpacity = 1
+                        strokeWidth = highlightLineWidth
+
+                    fill = 'url(#' + self.getPattern(f.color,
+                                                     f.pattern_type, patternOpacity) + ')'
+
+                    yield ((fill, "1", "#000000", str(strokeWidth), "none"), f)
+
+            return
+
+        faces = self.sections
+
+        if layer == "windows":
+            faces = self.windows
+
+        for f in faces:
+            if f:
+                fill = 'url(#' + self.getPattern(f.color, f.pattern_type) + ')'
+
+                yield ((fill, "1", "#000000", str(linewidth), "none"), f)
 
     def getSectionSVG(self, linewidth):
-        sectionsvg = ''
+        return ''.join(self.iterSectionSVG(linewidth))
 
+    def iterSectionSVG(self, linewidth):
         for f in self.sections:
             if f:
                 fill = 'url(#' + self.getPattern(f.color, f.pattern_type) + ')'
 
-                pathdata = ''
-
-                for w in f.reorientedFace.Wires:
-                    pathdata += self.getPathData(w)
+                pathdata = self.getFacePathData(f)
 
                 current = PATH_TEMPLATE.replace("PATH_FILL", fill)
                 current = current.replace("FILL_OPACITY", "1")
@@ -760,24 +1886,25 @@ class Renderer:
                 current = current.replace("STROKE_WIDTH", str(linewidth))
                 current = current.replace("PATH_DATA", pathdata)
 
-                sectionsvg += current + "\n"
+                yield current + "\n"
 
-        return sectionsvg
-    
-    def getMarkerSVG(self, linewidth):
-        markersvg = ''
+    def getMarkerSVG(self, linewidth, fontSize="SMALL_TEXT_FONT_SIZE"):
+        return ''.join(self.iterMarkerSVG(linewidth, fontSize))
 
+    def iterMarkerSVG(self, linewidth, fontSize="SMALL_TEXT_FONT_SIZE"):
         for m in self.markerShapes:
             # fill = 'url(#' + self.getPattern(f.color, f.pattern_type) + ')'
 
-            pathdata = ''
             fillColor = self.getFill(m.color)
 
-            reorientedFace = self.projectFace(FaceData(m.face, None, None)).reorientedFace
-            textPos = reorientedFace.CenterOfMass
+            projected = self.projectFace(FaceData(m.face, None, None))
+
+            if projected is None:
+                continue
+
+            textPos = FreeCAD.Vector(*projected.polygon.getCentroid())
 
-            for w in reorientedFace.Wires:
-                pathdata += self.getPathData(w)
+            pathdata = self.getFacePathData(projected)
 
             path = PATH_TEMPLATE.replace("PATH_FILL", fillColor)
             path = path.replace("FILL_OPACITY", "0.04")
@@ -787,19 +1914,18 @@ class Renderer:
             path = path.replace("PATH_DATA", pathdata)
 
             text = TEXT_TEMPLATE.replace("TEXT_CONTENT", m.text)
-            text = text.replace("TEXT_FONT_SIZE", "SMALL_TEXT_FONT_SIZE")
+            text = text.replace("TEXT_FONT_SIZE", str(fontSize))
             text = text.replace("TEXT_ANCHOR", "middle")
             text = text.replace("TEXT_POSITION_X", toNumberString(textPos.x))
             text = text.replace("TEXT_POSITION_Y", toNumberString(-textPos.y))
             text = text.replace("TEXT_ROTATION", "0")
 
-            markersvg += "%s %s\n" % (path, text)
-
-        return markersvg
+            yield "%s %s\n" % (path, text)
 
+    def getSectionCutSvg(self, linewidth, fontSize="TEXT_FONT_SIZE"):
+        return ''.join(self.iterSectionCutSvg(linewidth, fontSize))
 
-    def getSectionCutSvg(self, linewidth):
-        svg = ''
+    def iterSectionCutSvg(self, linewidth, fontSize="TEXT_FONT_SIZE"):
         arrowSize = 100
         referenceAxis = FreeCAD.Vector(0, -1, 0)
 
@@ -827,7 +1953,8 @@ class Renderer:
             baseYString = toNumberString(baseY)
 
             svg = TEXT_TEMPLATE.replace("TEXT_POSITION_X", baseXString)
-            text = text.replace("TEXT_ANCHOR", "middle")
+            svg = svg.replace("TEXT_ANCHOR", "middle")
+            svg = svg.replace("TEXT_FONT_SIZE", str(fontSize))
             svg = svg.replace("TEXT_POSITION_Y", baseYString)
             svg = svg.replace("TEXT_CONTENT", text)
             svg = svg.replace("TEXT_ROTATION", rotation(baseX, baseY, angle))
@@ -862,21 +1989,17 @@ class Renderer:
             current = current.replace("TEXT_START", textStart)
             current = current.replace("TEXT_END", textEnd)
 
-            svg += current + "\n"
-
-        return svg
+            yield current + "\n"
 
     def getWindowSVG(self, linewidth):
-        windowsvg = ''
+        return ''.join(self.iterWindowSVG(linewidth))
 
+    def iterWindowSVG(self, linewidth):
         for f in self.windows:
             if f:
                 fill = 'url(#' + self.getPattern(f.color, f.pattern_type) + ')'
 
-                pathdata = ''
-
-                for w in f.reorientedFace.Wires:
-                    pathdata += self.getPathData(w)
+                pathdata = self.getFacePathData(f)
 
                 current = PATH_TEMPLATE.replace("PATH_FILL", fill)
                 current = current.replace("FILL_OPACITY", "1")
@@ -885,16 +2008,50 @@ class Renderer:
                 current = current.replace("STROKE_WIDTH", str(linewidth))
                 current = current.replace("PATH_DATA", pathdata)
 
-                windowsvg += current + "\n"
+                yield current + "\n"
+
+    def getHiddenSVG(self, linewidth):
+        return ''.join(self.iterHiddenSVG(linewidth))
+
+    def iterHiddenSVG(self, linewidth, dashArray="HIDDEN_DASH_ARRAY"):
+        "Yields dashed paths of the hidden lines. Several polylines share one path"
+        for i in range(0, len(self.hiddenLines), HIDDEN_LINES_PER_PATH):
+            pathdata = ''.join([self.getPolylinePathData(p)
+                                for p in self.hiddenLines[i:i + HIDDEN_LINES_PER_PATH]])
+
+            current = PATH_TEMPLATE.replace("PATH_FILL", "none")
+            current = current.replace("FILL_OPACITY", "0")
+            current = current.replace("DASH_ARRAY", dashArray)
+            current = current.replace("STROKE_COLOR", "#000000")
+            current = current.replace("STROKE_WIDTH", str(linewidth))
+            current = current.replace("PATH_DATA", pathdata)
+
+            yield current + "\n"
+
+    def getPolylinePathData(self, polyline):
+        "Returns the path data of an open Nx2 polyline"
+        numbers = toNumberStrings((polyline * (1, -1)).ravel(), self.precision)
+        coordinates = ['%s %s ' % (numbers[i], numbers[i + 1])
+                       for i in range(0, len(numbers), 2)]
+
+        return 'M ' + 'L '.join(coordinates)
+
+    def getFaceDepth(self, face):
+        """Returns the signed distance of the center of mass of the original face from the plane.
+        It is stored on the FaceData, so faces restored without their original face still have it.
+        """
+        if face.depth is None:
+            face.depth = face.originalFace.CenterOfMass.distanceToPlane(
+                self.wp.getPlacement().Base, self.wp.getNormal())
 
-        return windowsvg
+        return face.depth
 
     def isInRange(self, face, maxDistance):
+        "face is a FaceData"
         if maxDistance <= 0:
             return False
 
-        distance = face.CenterOfMass.distanceToPlane(
-            self.wp.getPlacement().Base, self.wp.getNormal())
+        distance = self.getFaceDepth(face)
 
         if distance < 0:
             distance *= -1
@@ -905,44 +2062,52 @@ class Renderer:
         return False
 
     def getSecondaryFacesSVG(self, linewidth, faceHighlightDistance, highlightLineWith):
-        secondaryFacesSvg = ''
+        return ''.join(self.iterSecondaryFacesSVG(linewidth, faceHighlightDistance, highlightLineWith))
 
+    def iterSecondaryFacesSVG(self, linewidth, faceHighlightDistance, highlightLineWith):
         for f in self.secondaryFaces:
             if f:
                 patternOpacity = 0.1
-                shouldHightlight = self.isInRange(
-                    f.originalFace, faceHighlightDistance)
+                strokeWidth = linewidth
+                shouldHightlight = self.isInRange(f, faceHighlightDistance)
 
                 if shouldHightlight:
-                    linewidth = highlightLineWith
+                    strokeWidth = highlightLineWith
                     patternOpacity = 1
 
                 fill = 'url(#' + self.getPattern(f.color,
                                                  f.pattern_type, patternOpacity) + ')'
 
-                pathdata = ''
-
-                for w in f.reorientedFace.Wires:
-                    pathdata += self.getPathData(w)
+                pathdata = self.getFacePathData(f)
 
                 current = PATH_TEMPLATE.replace("PATH_FILL", fill)
                 current = current.replace("FILL_OPACITY", "1")
                 current = current.replace("DASH_ARRAY", "none")
                 current = current.replace("STROKE_COLOR", "#000000")
-                current = current.replace("STROKE_WIDTH", str(linewidth))
+                current = current.replace("STROKE_WIDTH", str(strokeWidth))
                 current = current.replace("PATH_DATA", pathdata)
 
-                secondaryFacesSvg += current + "\n"
+                yield current + "\n"
 
-        return secondaryFacesSvg
-
-    def getSvgParts(self, faceHighlightDistance=0):
-        "Returns all svg parts we cut"
+    def prepareSvg(self):
+        "Removes the duplicate and, if enabled, the occluded faces. Has to be called before any svg is built"
         if not self.duplicatesRemoved:
             self.removeDuplicates()
 
+            if self.cullOccluded:
+                with self.stats.stage("cullOccludedFaces"):
+                    self.cullOccludedFaces()
+
             self.duplicatesRemoved = True
 
+    def getSvgParts(self, faceHighlightDistance=0):
+        "Returns all svg parts we cut"
+        with self.stats.stage("getSvgParts"):
+            return self.buildSvgParts(faceHighlightDistance)
+
+    def buildSvgParts(self, faceHighlightDistance):
+        self.prepareSvg()
+
         self.patterns = {}
 
         sectionSvg = self.getSectionSVG("SECTION_STROKE_WIDTH")
@@ -951,6 +2116,7 @@ class Renderer:
             "SECONDARY_STROKE_WIDTH", faceHighlightDistance, "SECTION_STROKE_WIDTH")
         patternSvg = self.getPatternSVG()
         sectionCutSvg = self.getSectionCutSvg("SECTION_CUT_STROKE_WIDTH")
+        hiddenSvg = self.getHiddenSVG("HIDDEN_STROKE_WIDTH")
         markerSvg = self.getMarkerSVG("MARKER_STROKE_WIDTH")
         boundBox = self.buildBoundBox()
 
@@ -959,6 +2125,7 @@ class Renderer:
             "sections": sectionSvg,
             "secondaryFaces": secondaryFacesSvg,
             "windows": windowSvg,
+            "hidden": hiddenSvg,
             "boundBox": boundBox,
             "sectionCuts": sectionCutSvg,
             "markers": markerSvg
@@ -968,206 +2135,17 @@ class Renderer:
         boundBox = BoundBox(self.wp)
 
         if self.secondaryFaces:
-            boundBox.adaptFromShapes(
-                [f.reorientedFace for f in self.secondaryFaces if f])
+            boundBox.adaptFromFaces(
+                [f for f in self.secondaryFaces if f])
         if self.sections:
-            boundBox.adaptFromShapes(
-                [f.reorientedFace for f in self.sections if f])
+            boundBox.adaptFromFaces(
+                [f for f in self.sections if f])
         if self.windows:
-            boundBox.adaptFromShapes(
-                [f.reorientedFace for f in self.windows if f])
-        if self.hiddenEdges:
-            boundBox.adaptFromShapes(
-                [f.reorientedFace for f in self.hiddenEdges if f])
+            boundBox.adaptFromFaces(
+                [f for f in self.windows if f])
+        if self.hiddenLines:
+            boundBox.adaptFromPolylines(self.hiddenLines)
         if self.sectionCuts:
             boundBox.adaptFromShapes([s[0] for s in self.sectionCuts])
 
         return boundBox
-
-    # def getHiddenSVG(self, linewidth=0.02):
-    #     "Returns a SVG fragment from cut geometry"
-    #     if DEBUG:
-    #         print("Printing ", len(self.sections), " hidden faces")
-    #     if not self.oriented:
-    #         self.reorient()
-    #     svg = '<g stroke="#000000" stroke-width="' + \
-    #         str(linewidth) + '" style="stroke-width:' + str(linewidth)
-    #     svg += ';stroke-miterlimit:1;stroke-linejoin:round;stroke-dasharray:0.09,0.05;fill:none;">\n'
-    #     for e in self.hiddenEdges:
-    #         svg += '<path '
-    #         svg += 'd="'
-    #         svg += self.getPathData(e)
-    #         svg += '"/>\n'
-    #     svg += '</g>\n'
-    #     return svg
-
-
-if __name__ == "__main__":
-    import time
-    import tracemalloc
-
-    def calculateCutPlane(pl, l=18889, h=14706):
-        import Part
-
-        p = Part.makePlane(l, h, FreeCAD.Vector(
-            l/2, -h/2, 0), FreeCAD.Vector(0, 0, -1))
-
-        # make sure the normal direction is pointing outwards, you never know what OCC will decide...
-        if p.normalAt(0, 0).getAngle(pl.Rotation.multVec(FreeCAD.Vector(0, 0, 1))) > 1:
-            p.reverse()
-
-        p.Placement = pl
-
-        # Part.show(p)
-
-        return p
-
-    # Top
-    # pl = FreeCAD.Placement(
-    #     FreeCAD.Vector(9440, 7350, 4450), FreeCAD.Rotation(FreeCAD.Vector(0, 0, 1), 0))
-    # Front
-    # pl = FreeCAD.Placement(
-    #     FreeCAD.Vector(0, -1000, 0), FreeCAD.Rotation(FreeCAD.Vector(1, 0, 0), 90))
-    # Right
-    # pl = FreeCAD.Placement(
-    #     FreeCAD.Vector(16000, 0, 0), FreeCAD.Rotation(FreeCAD.Vector(0.577, 0.577, 0.577), 120))
-    # Back
-    # pl = FreeCAD.Placement(
-    #     FreeCAD.Vector(0, 15000, 0), FreeCAD.Rotation(FreeCAD.Vector(0, -0.71, -0.71), 180))
-    # custom
-    pl = FreeCAD.Placement(
-        FreeCAD.Vector(9280, 7348, 1702), FreeCAD.Rotation(FreeCAD.Vector(0.577, 0.577, 0.577), 120))
-    # print(pl)
-
-    cutplane = calculateCutPlane(pl, 14706, 10915)
-
-    # Right
-    # opl = FreeCAD.Placement(
-    #     FreeCAD.Vector(1000, 0, 0), FreeCAD.Rotation(FreeCAD.Vector(0.577, 0.577, 0.577), 120))
-    # otherPlane = calculateCutPlane(opl)
-
-    DEBUG = True
-
-    render = Renderer(pl)
-    render.addObjects([FreeCAD.ActiveDocument.Roof001])
-    # render.addObjects([FreeCAD.ActiveDocument.Structure108])
-    # render.addObjects([FreeCAD.ActiveDocument.Box,
-    #                    FreeCAD.ActiveDocument.Wall003])
-    # render.addObjects(FreeCAD.ActiveDocument.BuildingPart001.Group)
-    # render.addObjects(FreeCAD.ActiveDocument.BuildingPart002.Group)
-
-    # render.addSectionCuts([FreeCAD.ActiveDocument.SectionPlane026, FreeCAD.ActiveDocument.SectionPlane027])
-    # render.addMarkers([FreeCAD.ActiveDocument.Rectangle033])
-
-    tracemalloc.start()
-    startTime = time.time()
-
-    render.cut(cutplane, clip=True)
-    parts = render.getSvgParts(0)
-
-    endTime = time.time()
-    top_stats = tracemalloc.take_snapshot().statistics("lineno")
-
-    print("Needed %s s, %s MB" %(endTime - startTime, tracemalloc.get_traced_memory()[0] / 1024 / 1024))
-    for stat in top_stats[:10]:
-        print(stat)
-    
-    tracemalloc.stop()
-
-    boundBox = parts["boundBox"]
-    # boundBox.adaptFromDrafts([FreeCAD.ActiveDocument.Dimension005])
-
-    width = 420
-    height = 297
-
-    # print("---patterns---")
-    # print(parts["patterns"])
-    # print("---sections---")
-    # print(parts["sections"])
-    # print("---windows---")
-    # print(parts["windows"])
-    # print("---secondaryFaces---")
-    # print(parts["secondaryFaces"])
-
-    template = """
-<?xml version="1.0" encoding="UTF-8"?>
-<svg xmlns="http://www.w3.org/2000/svg"
-     xmlns:sodipodi="http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd"
-     xmlns:inkscape="http://www.inkscape.org/namespaces/inkscape"
-     width="WIDTHmm" height="HEIGHTmm" viewBox="VIEWBOX_VALUES"
-     version="1.1">
-    <sodipodi:namedview
-        id="base"
-        pagecolor="#ffffff"
-        bordercolor="#666666"
-        borderopacity="1.0"
-        inkscape:pageopacity="1"
-        inkscape:pageshadow="2"
-        inkscape:document-units="mm"
-        inkscape:window-maximized="1" />
-    <g
-        inkscape:label="Layer 1"
-        inkscape:groupmode="layer"
-        id="layer1">
-
-        <g id="everything">
-            <g id="patterns">
-                PATTERN_SVG
-            </g>
-
-            <g id="secondary">
-                SECONDARY_SVG
-            </g>
-
-            <g id="sections">
-                SECTION_SVG
-            </g>
-
-            <g id="windows">
-                WINDOW_SVG
-            </g>
-
-            <g id="drafts">
-                DRAFT_SVG
-            </g>
-
-            <g id="section_cuts">
-                SECTION_CUT_SVG
-            </g>
-
-            <g id="markers">
-                MARKER_SVG
-            </g>
-
-            <g id="information">
-                INFORMATION_SVG
-            </g>
-        </g>
-    </g>
-</svg>
-"""
-    scale = 1/50
-
-    template = template.replace(
-        "VIEWBOX_VALUES", boundBox.buildViewbox(scale, width, height))
-    template = template.replace("WIDTH", toNumberString(width))
-    template = template.replace("HEIGHT", toNumberString(height))
-    template = template.replace(
-        "PATTERN_SVG", scalePatterns(parts["patterns"], scale))
-    template = template.replace("SECONDARY_SVG", parts["secondaryFaces"])
-    template = template.replace("SECTION_SVG", parts["sections"])
-    template = template.replace("WINDOW_SVG", parts["windows"])
-    template = template.replace("SECTION_CUT_SVG", parts["sectionCuts"])
-    template = template.replace("MARKER_SVG", parts["markers"])
-    template = template.replace("SMALL_TEXT_FONT_SIZE", str(3 / scale))
-    template = template.replace("TEXT_FONT_SIZE", str(240))
-    template = template.replace("SECTION_STROKE_WIDTH", str(3))
-    template = template.replace("MARKER_STROKE_WIDTH", str(0.12 / scale))
-    template = template.replace("WINDOW_STROKE_WIDTH", str(1))
-    template = template.replace("SECONDARY_STROKE_WIDTH", str(1))
-    template = template.replace("SECTION_CUT_STROKE_WIDTH", str(0.05 / scale))
-
-    file_object = open(
-        "C:\\Meine Daten\\freecad\\samples\\SectionPlane\\Export.svg", "w")
-    file_object.write(template)
-    file_object.close()
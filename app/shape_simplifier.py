@@ -0,0 +1,69 @@
+DEFAULT_HEAVY_FACE_COUNT = 1000
+
+
+class SimplifiedShapeCache:
+    """Keeps refined copies of heavy object shapes, so they are only refined once.
+    The shapes of the objects themselves are never modified.
+    The copies of deleted objects and closed documents are dropped.
+    """
+
+    def __init__(self, observer=None):
+        self.observer = observer
+        # (document name, object name) -> (shape hash, refined shape)
+        self.shapes = {}
+
+    def registerObserver(self):
+        if self.observer is None:
+            import app.section_observer as section_observer
+
+            self.observer = section_observer.getObserver()
+
+        self.observer.addListener(self)
+
+    def getShape(self, documentName, name, shape, faceCount):
+        """Returns a refined copy of the shape, when it has more than faceCount faces.
+        The shape itself is returned, when it is light enough or refining does not help.
+        """
+        if len(shape.Faces) <= faceCount:
+            return shape
+
+        # hashCode changes, whenever the object is recomputed or moved
+        key = shape.hashCode()
+        cached = self.shapes.get((documentName, name))
+
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        self.registerObserver()
+
+        simplified = simplifyShape(shape)
+        self.shapes[(documentName, name)] = (key, simplified)
+
+        return simplified
+
+    def forgetObject(self, documentName, name):
+        self.shapes.pop((documentName, name), None)
+
+    def forgetDocument(self, documentName):
+        for shapeKey in [k for k in self.shapes if k[0] == documentName]:
+            del self.shapes[shapeKey]
+
+    def clear(self):
+        self.shapes = {}
+
+
+def simplifyShape(shape):
+    "Removes the splitting edges of coplanar faces. Returns the shape itself, when that fails"
+    try:
+        refined = shape.removeSplitter()
+    except Exception as e:
+        print("Unable to simplify shape: %s" % (e, ))
+        return shape
+
+    if refined.isNull() or not refined.isValid() or len(refined.Faces) >= len(shape.Faces):
+        return shape
+
+    return refined
+
+
+simplifiedShapes = SimplifiedShapeCache()
@@ -0,0 +1,102 @@
+import math
+
+NODE_CAPACITY = 16
+
+
+def unionBounds(boundsList):
+    minx = min([b[0] for b in boundsList])
+    miny = min([b[1] for b in boundsList])
+    maxx = max([b[2] for b in boundsList])
+    maxy = max([b[3] for b in boundsList])
+
+    return (minx, miny, maxx, maxy)
+
+
+def boundsIntersect(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def boundsContain(outer, inner):
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and outer[2] >= inner[2] and outer[3] >= inner[3]
+
+
+class RTreeNode:
+    def __init__(self, bounds, children, leaf):
+        self.bounds = bounds
+        # (bounds, value) tuples for leaves, RTreeNodes otherwise
+        self.children = children
+        self.leaf = leaf
+
+
+class RTree:
+    """A static 2D R-tree, bulk loaded with the sort tile recursive (STR) algorithm.
+
+    items is a list of (bounds, value) tuples, bounds are (minx, miny, maxx, maxy).
+    The tree can't be changed after it is built.
+    """
+
+    def __init__(self, items, nodeCapacity=NODE_CAPACITY):
+        self.nodeCapacity = max(nodeCapacity, 2)
+        self.size = len(items)
+        self.root = None
+
+        if not items:
+            return
+
+        level = self.packLevel(list(items), True)
+
+        while len(level) > 1:
+            level = self.packLevel([(n.bounds, n) for n in level], False)
+
+        self.root = level[0]
+
+    def packLevel(self, entries, leaf):
+        "Groups the entries into nodes: sorted into vertical slices by x, then by y inside every slice"
+        capacity = self.nodeCapacity
+        nodeCount = int(math.ceil(len(entries) / capacity))
+        sliceCount = int(math.ceil(math.sqrt(nodeCount)))
+        sliceSize = sliceCount * capacity
+
+        entries.sort(key=lambda e: e[0][0] + e[0][2])
+        nodes = []
+
+        for i in range(0, len(entries), sliceSize):
+            verticalSlice = entries[i:i + sliceSize]
+            verticalSlice.sort(key=lambda e: e[0][1] + e[0][3])
+
+            for j in range(0, len(verticalSlice), capacity):
+                children = verticalSlice[j:j + capacity]
+                bounds = unionBounds([c[0] for c in children])
+
+                if leaf:
+                    nodes.append(RTreeNode(bounds, children, True))
+                else:
+                    nodes.append(RTreeNode(
+                        bounds, [c[1] for c in children], False))
+
+        return nodes
+
+    def query(self, bounds):
+        "Returns the values of all items, whose bounds intersect the given bounds"
+        if self.root is None:
+            return []
+
+        values = []
+        stack = [self.root]
+
+        while stack:
+            node = stack.pop()
+
+            if not boundsIntersect(node.bounds, bounds):
+                continue
+
+            if node.leaf:
+                values.extend([value for itemBounds, value in node.children
+                               if boundsIntersect(itemBounds, bounds)])
+            else:
+                stack.extend(node.children)
+
+        return values
+
+    def __len__(self):
+        return self.size
@@ -0,0 +1,169 @@
+"""Writes faces as compact svg: css classes instead of inline styles, faces of the same
+style merged into few paths, relative path commands and a precision adapted to the scale.
+"""
+import math
+
+from collections import OrderedDict
+
+import numpy
+
+# Maximum deviation on paper in mm caused by rounding the coordinates
+DEFAULT_TOLERANCE = 0.01
+# Limits the cost of the overlap test while merging
+MAX_FACES_PER_PATH = 200
+
+
+def getAdaptivePrecision(scale, tolerance=DEFAULT_TOLERANCE, maxPrecision=None):
+    """Returns the number of decimals needed, so rounding never moves a point more than
+    tolerance (in mm on paper) at the given scale.
+    """
+    precision = max(0, int(math.ceil(math.log10(scale / (2 * tolerance)))))
+
+    if maxPrecision is not None:
+        precision = min(precision, maxPrecision)
+
+    return precision
+
+
+def formatNumbers(values, precision):
+    "Formats the values as short as possible: no trailing zeros, no -0"
+    strings = []
+
+    for v in values:
+        s = "%.*f" % (precision, v)
+
+        if precision > 0:
+            s = s.rstrip("0").rstrip(".")
+
+        if s == "-0":
+            s = "0"
+
+        strings.append(s)
+
+    return strings
+
+
+def boundsOverlap(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+class StyleSheet:
+    """Assigns a css class to every distinct style.
+    A style is a tuple (fill, fill opacity, stroke, stroke width, dash array).
+    """
+
+    def __init__(self):
+        self.classes = OrderedDict()
+
+    def getClass(self, style):
+        if not style in self.classes:
+            self.classes[style] = "s%s" % (len(self.classes), )
+
+        return self.classes[style]
+
+    def getCss(self):
+        rules = []
+
+        for style, name in self.classes.items():
+            fill, fillOpacity, stroke, strokeWidth, dashArray = style
+
+            rules.append(".%s{fill:%s;fill-opacity:%s;fill-rule:evenodd;stroke:%s;stroke-width:%s;stroke-miterlimit:1;stroke-linejoin:round;stroke-dasharray:%s}" % (
+                name, fill, fillOpacity, stroke, strokeWidth, dashArray))
+
+        return "\n".join(rules)
+
+    def getStyleElement(self):
+        return '<style type="text/css">\n%s\n</style>\n' % (self.getCss(), )
+
+
+class PathMerger:
+    """Merges consecutive faces of the same style into few paths inside a shared group.
+
+    A face is only added to a path, when its bound box does not overlap the faces already in it.
+    With the evenodd fill rule overlapping faces would cut holes into each other.
+    As only consecutive faces are merged, the painting order stays the same.
+    """
+
+    def __init__(self, styleSheet, precision, fallbackPathData):
+        self.styleSheet = styleSheet
+        self.precision = precision
+        # Returns absolute path data, for faces without polygon
+        self.fallbackPathData = fallbackPathData
+
+    def iterGroups(self, styledFaces):
+        "styledFaces is an iterable of (style, FaceData). Yields svg strings"
+        currentClass = None
+        paths = []
+        data = []
+        bounds = []
+        self.current = None
+
+        for style, face in styledFaces:
+            className = self.styleSheet.getClass(style)
+            faceBounds = None
+
+            if face.polygon is not None:
+                faceBounds = face.polygon.getBounds()
+
+            if className != currentClass:
+                if data:
+                    paths.append(''.join(data))
+
+                if paths:
+                    yield self.buildGroup(currentClass, paths)
+
+                currentClass = className
+                paths = []
+                data = []
+                bounds = []
+                self.current = None
+            elif (faceBounds is None or len(bounds) >= MAX_FACES_PER_PATH
+                  or [b for b in bounds if boundsOverlap(b, faceBounds)]):
+                paths.append(''.join(data))
+                data = []
+                bounds = []
+                self.current = None
+
+            data.append(self.getPathData(face))
+
+            if faceBounds is not None:
+                bounds.append(faceBounds)
+            else:
+                # The position after an absolute fallback path is not known
+                self.current = None
+
+        if data:
+            paths.append(''.join(data))
+
+        if paths:
+            yield self.buildGroup(currentClass, paths)
+
+    def buildGroup(self, className, paths):
+        return '<g class="%s">\n%s</g>\n' % (className, ''.join(['<path d="%s"/>\n' % (p, ) for p in paths]))
+
+    def getPathData(self, face):
+        if face.polygon is None:
+            return self.fallbackPathData(face)
+
+        svg = []
+
+        for ring in face.polygon.rings:
+            # Round the absolute coordinates first, so the rounding errors do not add up
+            points = numpy.round(ring * (1, -1), self.precision)
+
+            if self.current is None:
+                svg.append('M%s' % (' '.join(formatNumbers(points[0], self.precision)), ))
+            else:
+                svg.append('m%s' % (' '.join(formatNumbers(
+                    points[0] - self.current, self.precision)), ))
+
+            if len(points) > 1:
+                deltas = numpy.diff(points, axis=0).ravel()
+                svg.append('l%s' % (' '.join(formatNumbers(deltas, self.precision)), ))
+
+            svg.append('z')
+
+            # After closing, the current point is the start of the ring
+            self.current = points[0]
+
+        return ''.join(svg)
@@ -0,0 +1,77 @@
+from app.section_vector_renderer import toNumberString
+
+DOCUMENT_START = """<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg"
+     xmlns:sodipodi="http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd"
+     xmlns:inkscape="http://www.inkscape.org/namespaces/inkscape"
+     width="%smm" height="%smm" viewBox="%s"
+     version="1.1">
+    <sodipodi:namedview
+        id="base"
+        pagecolor="#ffffff"
+        bordercolor="#666666"
+        borderopacity="1.0"
+        inkscape:pageopacity="1"
+        inkscape:pageshadow="2"
+        inkscape:document-units="mm"
+        inkscape:window-maximized="1" />
+    <g
+        inkscape:label="Layer 1"
+        inkscape:groupmode="layer"
+        id="layer1">
+
+        <g id="everything">
+"""
+
+DOCUMENT_END = """        </g>
+    </g>
+</svg>
+"""
+
+
+class SvgWriter:
+    """Writes a section svg element by element to a file like object.
+
+    Nothing is kept in memory, except the element that is currently written.
+    All values (stroke widths, font sizes, ...) have to be resolved by the caller.
+    """
+
+    def __init__(self, fileObject):
+        self.fileObject = fileObject
+        self.openGroups = 0
+
+    def startDocument(self, width, height, viewBox):
+        self.fileObject.write(DOCUMENT_START % (
+            toNumberString(width), toNumberString(height), viewBox))
+
+    def endDocument(self):
+        while self.openGroups > 0:
+            self.endGroup()
+
+        self.fileObject.write(DOCUMENT_END)
+
+    def startGroup(self, groupId, attributes=None):
+        attributeString = ''
+
+        if attributes:
+            attributeString = ''.join([' %s="%s"' % (name, value)
+                                       for name, value in attributes.items()])
+
+        self.fileObject.write('<g id="%s"%s>\n' % (groupId, attributeString))
+        self.openGroups += 1
+
+    def endGroup(self):
+        self.fileObject.write('</g>\n')
+        self.openGroups -= 1
+
+    def write(self, element):
+        self.fileObject.write(element)
+
+    def writeAll(self, elements):
+        for element in elements:
+            self.fileObject.write(element)
+
+    def writeGroup(self, groupId, elements, attributes=None):
+        self.startGroup(groupId, attributes)
+        self.writeAll(elements)
+        self.endGroup()
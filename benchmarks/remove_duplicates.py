@@ -0,0 +1,104 @@
+"""Compares the linear duplicate removal with the hashed FaceIndex.
+
+Run it from the FreeCAD python console or with FreeCADCmd, from the
+root folder of the toolbox:
+
+    FreeCADCmd benchmarks/remove_duplicates.py
+
+The linear variant is quadratic, so it is only run on a subset of the faces
+unless FULL_LINEAR is set to True.
+"""
+import random
+import time
+
+from app.section_vector_renderer import FaceData, FaceIndex, indexOfFace
+
+FACE_COUNT = 50000
+DUPLICATE_RATIO = 0.3
+SECTION_RATIO = 0.1
+LINEAR_FACE_COUNT = 5000
+FULL_LINEAR = False
+
+
+def buildFace(index):
+    x = (index % 500) * 10
+    y = (index // 500) * 10
+
+    face = FaceData(None, (0.5, 0.5, 0.5), None)
+    face.points = [(x, y), (x + 10, y), (x + 10, y + 10), (x, y + 10)]
+
+    return face
+
+
+def buildFaces(count, seed=42):
+    rnd = random.Random(seed)
+    uniqueCount = int(count * (1 - DUPLICATE_RATIO))
+
+    faces = [buildFace(i) for i in range(uniqueCount)]
+
+    # Duplicates get their points in another order, as OCC does not guarantee the vertex order
+    while len(faces) < count:
+        original = faces[rnd.randrange(uniqueCount)]
+        duplicate = FaceData(None, original.color, None)
+        duplicate.points = list(reversed(original.points))
+        faces.append(duplicate)
+
+    rnd.shuffle(faces)
+
+    sections = [buildFace(i) for i in range(int(uniqueCount * SECTION_RATIO))]
+
+    return (sections, faces)
+
+
+def removeLinear(sections, secondaryFaces):
+    newSecondaryFaces = []
+
+    for face in secondaryFaces:
+        if not face or indexOfFace(sections, face) is not None:
+            continue
+
+        i = indexOfFace(newSecondaryFaces, face)
+
+        if i is not None:
+            del newSecondaryFaces[i]
+
+        newSecondaryFaces.append(face)
+
+    return newSecondaryFaces
+
+
+def removeIndexed(sections, secondaryFaces):
+    sectionIndex = FaceIndex(sections)
+    newSecondaryFaces = FaceIndex()
+
+    for face in secondaryFaces:
+        if not face or sectionIndex.contains(face):
+            continue
+
+        newSecondaryFaces.add(face)
+
+    return newSecondaryFaces.values()
+
+
+def measure(name, function, sections, faces):
+    startTime = time.time()
+    result = function(sections, faces)
+    endTime = time.time()
+
+    print("%s: %s faces -> %s faces in %.3f s" %
+          (name, len(faces), len(result), endTime - startTime))
+
+    return result
+
+
+if __name__ == "__main__":
+    sections, faces = buildFaces(FACE_COUNT)
+
+    indexed = measure("indexed", removeIndexed, sections, faces)
+
+    linearFaces = faces if FULL_LINEAR else faces[:LINEAR_FACE_COUNT]
+    linear = measure("linear", removeLinear, sections, linearFaces)
+    check = removeIndexed(sections, linearFaces)
+
+    if [id(f) for f in linear] != [id(f) for f in check]:
+        print("Result of the indexed removal differs from the linear removal")
@@ -0,0 +1,333 @@
+"""Benchmark of the section renderer on synthetic buildings.
+
+Builds a building of configurable size in a new document and times every stage
+of the section pipeline separately. Wall time and peak memory of each stage are
+written as JSON, so results of different releases can be compared.
+
+Run it from the root folder of the toolbox:
+
+    FreeCADCmd benchmarks/section_benchmark.py --pass --walls 200 --output results.json
+
+or, with the FreeCAD lib folder on the PYTHONPATH:
+
+    python -m benchmarks.section_benchmark --walls 200 --output results.json
+
+The section plane is rendered through the same prepareRender, cutRender and completeRender
+calls as SimpleSectionPlane.execute. The stages inside them are taken from the RenderStats of the render.
+"""
+import argparse
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import FreeCAD
+import Part
+
+from app import section_plane
+from app.render_stats import RenderStats
+
+STOREY_HEIGHT = 3000
+WALL_LENGTH = 5000
+WALL_THICKNESS = 300
+SLAB_THICKNESS = 250
+WINDOW_WIDTH = 1200
+WINDOW_HEIGHT = 1400
+WINDOW_SILL = 900
+OPENING_SIZE = 800
+
+
+class SyntheticObject:
+    "Minimal proxy, so Draft.getType returns the given type"
+
+    def __init__(self, obj, objectType):
+        obj.Proxy = self
+        self.Type = objectType
+
+    def execute(self, obj):
+        pass
+
+
+def addObject(doc, name, objectType, shape):
+    obj = doc.addObject("Part::FeaturePython", name)
+    SyntheticObject(obj, objectType)
+    obj.Shape = shape
+
+    return obj
+
+
+def wallPlacement(index, storey):
+    "Places the walls on a square grid, alternating between x and y direction"
+    perRow = 10
+    row = (index // perRow) % perRow
+    column = index % perRow
+    z = storey * STOREY_HEIGHT
+
+    if index % 2 == 0:
+        return (FreeCAD.Vector(column * WALL_LENGTH, row * WALL_LENGTH, z), 0)
+
+    return (FreeCAD.Vector(column * WALL_LENGTH, row * WALL_LENGTH, z), 90)
+
+
+def makeWall(index, storey, openings):
+    base, angle = wallPlacement(index, storey)
+    wall = Part.makeBox(WALL_LENGTH, WALL_THICKNESS, STOREY_HEIGHT - SLAB_THICKNESS)
+
+    for i in range(openings):
+        x = (i + 1) * WALL_LENGTH / (openings + 1) - OPENING_SIZE / 2
+        opening = Part.makeBox(OPENING_SIZE, WALL_THICKNESS * 3, OPENING_SIZE,
+                               FreeCAD.Vector(x, -WALL_THICKNESS, WINDOW_SILL))
+        wall = wall.cut(opening)
+
+    wall.Placement = FreeCAD.Placement(
+        base, FreeCAD.Rotation(FreeCAD.Vector(0, 0, 1), angle))
+
+    return wall
+
+
+def makeWindow(index, storey):
+    base, angle = wallPlacement(index, storey)
+    x = (WALL_LENGTH - WINDOW_WIDTH) / 2
+    window = Part.makeBox(WINDOW_WIDTH, WALL_THICKNESS / 3, WINDOW_HEIGHT,
+                          FreeCAD.Vector(x, WALL_THICKNESS / 3, WINDOW_SILL))
+    window.Placement = FreeCAD.Placement(
+        base, FreeCAD.Rotation(FreeCAD.Vector(0, 0, 1), angle))
+
+    return window
+
+
+def makeCurvedWall(index, storey):
+    radius = 2000 + index * 100
+    height = STOREY_HEIGHT - SLAB_THICKNESS
+    center = FreeCAD.Vector(-radius - 1000 * index, 0, storey * STOREY_HEIGHT)
+    outer = Part.makeCylinder(radius + WALL_THICKNESS, height, center,
+                              FreeCAD.Vector(0, 0, 1), 180)
+    inner = Part.makeCylinder(radius, height, center,
+                              FreeCAD.Vector(0, 0, 1), 180)
+
+    return outer.cut(inner)
+
+
+def makeSlab(index, storey, size):
+    z = (storey + 1) * STOREY_HEIGHT - SLAB_THICKNESS
+
+    return Part.makeBox(size, size, SLAB_THICKNESS, FreeCAD.Vector(index * size, 0, z))
+
+
+def buildBuilding(doc, config):
+    "Creates the synthetic building and returns all objects"
+    objects = []
+    gridSize = WALL_LENGTH * 10
+
+    for storey in range(config.storeys):
+        for i in range(config.walls):
+            shape = makeWall(i, storey, config.openings)
+            objects.append(addObject(doc, "Wall", "Wall", shape))
+
+        for i in range(config.windows):
+            shape = makeWindow(i, storey)
+            objects.append(addObject(doc, "Window", "Window", shape))
+
+        for i in range(config.curved):
+            shape = makeCurvedWall(i, storey)
+            objects.append(addObject(doc, "CurvedWall", "Wall", shape))
+
+        for i in range(config.slabs):
+            shape = makeSlab(i, storey, gridSize / max(config.slabs, 1))
+            objects.append(addObject(doc, "Slab", "Structure", shape))
+
+    return objects
+
+
+def buildSectionPlane(doc, objects, config):
+    obj = doc.addObject("App::FeaturePython", "SectionPlane")
+    section_plane.SimpleSectionPlane(obj)
+
+    obj.IncludeObjects = objects
+
+    if config.view == "plan":
+        obj.Placement = FreeCAD.Placement(
+            FreeCAD.Vector(0, 0, STOREY_HEIGHT / 2), FreeCAD.Rotation())
+    else:
+        obj.Placement = FreeCAD.Placement(
+            FreeCAD.Vector(0, -1000, 0), FreeCAD.Rotation(FreeCAD.Vector(1, 0, 0), 90))
+
+    return obj
+
+
+class StageRecorder:
+    "Records the wall time and the peak memory of every stage"
+
+    def __init__(self):
+        self.stages = []
+
+    def run(self, name, function, *args, **kwargs):
+        resetPeak()
+        startMemory = tracemalloc.get_traced_memory()[0]
+        startTime = time.perf_counter()
+
+        result = function(*args, **kwargs)
+
+        duration = time.perf_counter() - startTime
+        peak = tracemalloc.get_traced_memory()[1]
+
+        self.stages.append({
+            "stage": name,
+            "seconds": duration,
+            "peakMemoryMB": max(peak - startMemory, 0) / 1024 / 1024
+        })
+
+        return result
+
+    def add(self, name, seconds, calls):
+        self.stages.append({
+            "stage": name,
+            "seconds": seconds,
+            "calls": calls
+        })
+
+    def addStats(self, stats):
+        "Adds the stages measured inside the pipeline"
+        for name, (seconds, calls) in stats.stages.items():
+            self.add(name, seconds, calls)
+
+
+def resetPeak():
+    # reset_peak is only available since python 3.9
+    if hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+
+
+def runPipeline(plane, recorder):
+    """Renders the section plane like SimpleSectionPlane.execute does and writes its svg.
+    Wall time and memory are recorded for the steps of the pipeline, the stages inside them
+    are added from the RenderStats of the render.
+    """
+    proxy = plane.Proxy
+    stats = RenderStats()
+
+    job = recorder.run("prepareRender", proxy.prepareRender, plane, stats=stats)
+
+    if job is None:
+        raise RuntimeError("The section plane contains nothing to render")
+
+    recorder.run("cutRender", proxy.cutRender, job)
+    recorder.run("completeRender", proxy.completeRender, job)
+
+    svg = recorder.run("getSvg", proxy.getSvg, plane.DocumentWidth.Value,
+                       plane.DocumentHeight.Value, plane.Scale)
+    recorder.run("writeSvg", proxy.writeSvg, io.StringIO(), plane.DocumentWidth.Value,
+                 plane.DocumentHeight.Value, plane.Scale)
+
+    recorder.addStats(stats)
+
+    render = job.render
+
+    return {
+        "objects": len(job.objectsToProcess),
+        "sections": len(render.sections),
+        "secondaryFaces": len(render.secondaryFaces),
+        "windows": len(render.windows),
+        "svgSize": len(svg),
+        "counters": dict(stats.counters)
+    }
+
+
+def runBenchmark(config):
+    doc = FreeCAD.newDocument("SectionBenchmark")
+
+    try:
+        objects = buildBuilding(doc, config)
+        plane = buildSectionPlane(doc, objects, config)
+
+        runs = []
+
+        for i in range(config.repeat):
+            recorder = StageRecorder()
+
+            tracemalloc.start()
+
+            try:
+                counts = runPipeline(plane, recorder)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+            runs.append({
+                "stages": recorder.stages,
+                "counts": counts,
+                "totalSeconds": sum([s["seconds"] for s in recorder.stages if "peakMemoryMB" in s]),
+                "peakMemoryMB": peak / 1024 / 1024
+            })
+
+        return {
+            "config": vars(config),
+            "freecadVersion": ".".join(FreeCAD.Version()[0:3]),
+            "python": platform.python_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "runs": runs
+        }
+    finally:
+        FreeCAD.closeDocument(doc.Name)
+
+
+def printResult(result):
+    for i, run in enumerate(result["runs"]):
+        print("Run %s: %.3f s, peak %.1f MB, %s" %
+              (i + 1, run["totalSeconds"], run["peakMemoryMB"], run["counts"]))
+
+        for stage in run["stages"]:
+            if "calls" in stage:
+                print("    %-22s %8.3f s (%s calls)" %
+                      (stage["stage"], stage["seconds"], stage["calls"]))
+            else:
+                print("    %-22s %8.3f s %8.1f MB" %
+                      (stage["stage"], stage["seconds"], stage["peakMemoryMB"]))
+
+
+def parseArguments(argv):
+    parser = argparse.ArgumentParser(
+        description="Benchmarks the section renderer on a synthetic building")
+    parser.add_argument("--walls", type=int, default=100,
+                        help="Number of straight walls per storey")
+    parser.add_argument("--slabs", type=int, default=4,
+                        help="Number of slabs per storey")
+    parser.add_argument("--windows", type=int, default=40,
+                        help="Number of windows per storey")
+    parser.add_argument("--openings", type=int, default=1,
+                        help="Number of openings per wall")
+    parser.add_argument("--curved", type=int, default=5,
+                        help="Number of curved walls per storey")
+    parser.add_argument("--storeys", type=int, default=2,
+                        help="Number of storeys")
+    parser.add_argument("--view", choices=["plan", "elevation"], default="plan",
+                        help="Cut a floor plan or an elevation")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="Number of runs")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+
+    if "--pass" in argv:
+        return parser.parse_args(argv[argv.index("--pass") + 1:])
+
+    return parser.parse_args(argv[1:])
+
+
+def main(argv):
+    config = parseArguments(argv)
+    result = runBenchmark(config)
+
+    printResult(result)
+
+    if config.output:
+        with open(config.output, "w") as file_object:
+            json.dump(result, file_object, indent=2)
+
+        print("Results written to %s" % (config.output, ))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -22,12 +22,13 @@ class ExportSectionSvgCommand:
         width = section_plane.DocumentWidth.Value
         height = section_plane.DocumentHeight.Value
 
-        svg = section_plane.Proxy.getSvg(
-            width=width, height=height, scale=scale)
-
         file_object = open(target, "w")
-        file_object.write(svg)
-        file_object.close()
+
+        try:
+            section_plane.Proxy.writeSvg(
+                file_object, width=width, height=height, scale=scale)
+        finally:
+            file_object.close()
 
         print("SVG Written to %s" % (target, ))
 
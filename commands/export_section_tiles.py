@@ -0,0 +1,50 @@
+import FreeCAD
+import FreeCADGui
+
+from app import section_batch
+
+
+class ExportSectionTilesCommand:
+    toolbarName = 'Arch_Tools'
+    commandName = 'Export_Section_Svg_Tiles'
+
+    def GetResources(self):
+        return {'MenuText': "Export Section SVG Tiles",
+                'ToolTip': "Exports the svg of the selected Section Plane as a grid of tiles, one file per tile",
+                # 'Pixmap': iconPath('CreateConfig.svg')
+                }
+
+    def Activated(self):
+        planes = [o for o in FreeCADGui.Selection.getSelection()
+                  if section_batch.isSectionPlane(o)]
+
+        if not planes:
+            print("Select at least one section plane")
+            return
+
+        for plane in planes:
+            if not plane.TargetFile:
+                print("%s has no TargetFile" % (plane.Label, ))
+                continue
+
+            files = plane.Proxy.writeTiles()
+
+            print("%s tiles of %s written to %s" %
+                  (len(files), plane.Label, plane.TargetFile))
+
+    def IsActive(self):
+        """If there is no active document we can't do anything."""
+        return not FreeCAD.ActiveDocument is None
+
+
+if __name__ == "__main__":
+    command = ExportSectionTilesCommand()
+
+    if command.IsActive():
+        command.Activated()
+    else:
+        qtutils.showInfo("No open Document", "There is no open document")
+else:
+    from gui import toolbar_manager
+    toolbar_manager.toolbarManager.registerCommand(
+        ExportSectionTilesCommand())
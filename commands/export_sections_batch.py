@@ -0,0 +1,56 @@
+import FreeCAD
+import FreeCADGui
+
+from app import section_batch
+
+
+def getSectionPlanes():
+    """Returns the selected section planes.
+    When no section plane is selected, all section planes of the active document are returned
+    """
+    selected = [o for o in FreeCADGui.Selection.getSelection()
+                if section_batch.isSectionPlane(o)]
+
+    if selected:
+        return selected
+
+    return [o for o in FreeCAD.ActiveDocument.Objects if section_batch.isSectionPlane(o)]
+
+
+class ExportSectionsBatchCommand:
+    toolbarName = 'Arch_Tools'
+    commandName = 'Export_Sections_Batch'
+
+    def GetResources(self):
+        return {'MenuText': "Export All Section SVGs",
+                'ToolTip': "Exports the svg of all selected Section Planes, or of all Section Planes in the document when none is selected",
+                # 'Pixmap': iconPath('CreateConfig.svg')
+                }
+
+    def Activated(self):
+        planes = getSectionPlanes()
+
+        if not planes:
+            print("No section planes to export")
+            return
+
+        cutWorkers = max([p.CutWorkers for p in planes])
+
+        section_batch.exportSections(planes, cutWorkers=cutWorkers)
+
+    def IsActive(self):
+        """If there is no active document we can't do anything."""
+        return not FreeCAD.ActiveDocument is None
+
+
+if __name__ == "__main__":
+    command = ExportSectionsBatchCommand()
+
+    if command.IsActive():
+        command.Activated()
+    else:
+        qtutils.showInfo("No open Document", "There is no open document")
+else:
+    from gui import toolbar_manager
+    toolbar_manager.toolbarManager.registerCommand(
+        ExportSectionsBatchCommand())
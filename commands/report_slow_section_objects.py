@@ -0,0 +1,61 @@
+import FreeCAD
+import FreeCADGui
+
+from app import section_batch
+
+
+class ReportSlowSectionObjectsCommand:
+    toolbarName = 'Arch_Tools'
+    commandName = 'Report_Slow_Section_Objects'
+
+    def GetResources(self):
+        return {'MenuText': "Report Slow Section Objects",
+                'ToolTip': "Prints the objects taking the most time to cut and project for the selected section planes",
+                # 'Pixmap': iconPath('CreateConfig.svg')
+                }
+
+    def Activated(self):
+        planes = [o for o in FreeCADGui.Selection.getSelection()
+                  if section_batch.isSectionPlane(o)]
+
+        if not planes:
+            print("Select at least one section plane")
+            return
+
+        for plane in planes:
+            reportSlowObjects(plane)
+
+    def IsActive(self):
+        """If there is no active document we can't do anything."""
+        return not FreeCAD.ActiveDocument is None
+
+
+def reportSlowObjects(plane, limit=20):
+    proxy = plane.Proxy
+
+    # Statistics are only available after a render, render when there was none yet
+    if proxy.lastStats is None:
+        proxy.doExecute(plane)
+
+    if proxy.lastStats is None:
+        print("%s: nothing to render" % (plane.Label, ))
+        return
+
+    labels = dict([(o.Name, o.Label) for o in plane.Document.Objects])
+
+    print("Slowest objects of %s:" % (plane.Label, ))
+    print(proxy.lastStats.formatSlowestObjects(
+        limit, plane.HeavyShapeFaceCount, labels))
+
+
+if __name__ == "__main__":
+    command = ReportSlowSectionObjectsCommand()
+
+    if command.IsActive():
+        command.Activated()
+    else:
+        qtutils.showInfo("No open Document", "There is no open document")
+else:
+    from gui import toolbar_manager
+    toolbar_manager.toolbarManager.registerCommand(
+        ReportSlowSectionObjectsCommand())
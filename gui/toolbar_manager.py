@@ -15,6 +15,10 @@ import commands.create_floor_builder
 import commands.create_wood_extract
 import commands.create_section_plane
 import commands.export_section_svg
+import commands.export_section_tiles
+import commands.export_section_scales
+import commands.export_sections_batch
+import commands.report_slow_section_objects
 import commands.include_in_section
 import commands.exclude_from_section
 import commands.create_raffstore
@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+from app.edge_order import chainEdges, orientEdges, getStartPoint, getEndPoint
+
+
+def point(x, y, z=0):
+    return SimpleNamespace(x=x, y=y, z=z)
+
+
+def edge(start, end):
+    return SimpleNamespace(Vertexes=[SimpleNamespace(Point=point(*start)),
+                                     SimpleNamespace(Point=point(*end))])
+
+
+def assertConnected(chain):
+    for (previous, previousForward), (current, forward) in zip(chain, chain[1:]):
+        assert getEndPoint(previous, previousForward) == getStartPoint(current, forward)
+
+
+def test_chain_closed_wire_with_reversed_edges():
+    edges = [edge((0, 0), (10, 0)), edge((10, 10), (0, 10)),
+             edge((10, 10), (10, 0)), edge((0, 0), (0, 10))]
+    chain = chainEdges(edges, 5)
+
+    assert len(chain) == 4
+    assert set([id(e) for e, forward in chain]) == set([id(e) for e in edges])
+    assertConnected(chain)
+    assert getEndPoint(*chain[-1]) == getStartPoint(*chain[0])
+
+
+def test_chain_open_wire_starts_at_its_end():
+    edges = [edge((10, 0), (20, 0)), edge((10, 0), (0, 0)), edge((20, 0), (30, 5))]
+    chain = chainEdges(edges, 5)
+
+    assertConnected(chain)
+    assert set([getStartPoint(*chain[0]).x, getEndPoint(*chain[-1]).x]) == set([0, 30])
+
+
+def test_chain_rounds_points():
+    edges = [edge((0, 0), (10.0000001, 0)), edge((10, 0), (10, 10)), edge((10, 10), (0, 0))]
+
+    # Rounded to 5 digits the wire is closed, with 9 digits it is open at x = 10
+    assert len(chainEdges(edges, 5)) == 3
+
+    chain = chainEdges(edges, 9)
+
+    assertConnected(chain)
+    assert set([getStartPoint(*chain[0]).x, getEndPoint(*chain[-1]).x]) == set([10, 10.0000001])
+
+
+def test_chain_of_disconnected_edges():
+    edges = [edge((0, 0), (1, 0)), edge((5, 5), (6, 5))]
+
+    assert chainEdges(edges, 5) is None
+
+
+def test_orient_sorted_edges():
+    edges = [edge((1, 0), (0, 0)), edge((1, 0), (1, 1)),
+             edge((0, 1), (1, 1)), edge((0, 1), (0, 0))]
+
+    assert [forward for e, forward in orientEdges(edges)] == [False, True, False, True]
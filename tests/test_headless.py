@@ -0,0 +1,171 @@
+import importlib
+import sys
+import zipfile
+from types import SimpleNamespace
+
+import pytest
+
+import app
+
+
+class FakeFreeCAD:
+    "Provides what headless.main uses from FreeCAD"
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.closed = []
+
+    def openDocument(self, fileName):
+        if self.doc is None:
+            raise IOError("no such file")
+
+        return self.doc
+
+    def closeDocument(self, name):
+        self.closed.append(name)
+
+
+class FakeSectionBatch:
+    "Exports every plane, failing the ones named in errors"
+
+    def __init__(self, errors=()):
+        self.errors = errors
+        self.exported = None
+
+    def isSectionPlane(self, o):
+        return o.Name.startswith("Section")
+
+    def SharedSectionData(self, colors):
+        return colors
+
+    def exportSections(self, planes, cutWorkers=0, shared=None):
+        self.exported = (planes, cutWorkers)
+
+        return [SimpleNamespace(error=p.Name in self.errors) for p in planes]
+
+
+def writeDocument(directory, guiDocument=None):
+    "Writes a .FCStd archive, the fake FreeCAD never reads it, only the stored colors are read"
+    fileName = str(directory / "house.FCStd")
+
+    with zipfile.ZipFile(fileName, "w") as archive:
+        archive.writestr("Document.xml", "<Document/>")
+
+        if guiDocument is not None:
+            archive.writestr("GuiDocument.xml", guiDocument)
+
+    return fileName
+
+
+def makeDocument():
+    objects = [SimpleNamespace(Name="Wall", Label="Wall"),
+               SimpleNamespace(Name="Section", Label="Ground floor"),
+               SimpleNamespace(Name="Section001", Label="First floor")]
+
+    return SimpleNamespace(Name="House", Objects=objects)
+
+
+@pytest.fixture
+def headless(monkeypatch):
+    "Imports app.headless with FreeCAD and section_batch replaced by fakes"
+    def load(doc, errors=()):
+        freecad = FakeFreeCAD(doc)
+        batch = FakeSectionBatch(errors)
+
+        monkeypatch.setitem(sys.modules, "FreeCAD", freecad)
+        monkeypatch.setitem(sys.modules, "app.section_batch", batch)
+        monkeypatch.setattr(app, "section_batch", batch, raising=False)
+        monkeypatch.delitem(sys.modules, "app.headless", raising=False)
+
+        return (importlib.import_module("app.headless"), freecad, batch)
+
+    yield load
+
+    # The module was bound to the fakes, the next import has to load it again
+    sys.modules.pop("app.headless", None)
+
+    if hasattr(app, "headless"):
+        del app.headless
+
+
+def test_get_arguments(headless):
+    module, _, _ = headless(makeDocument())
+
+    argv = ["FreeCADCmd", "app/headless.py", "--pass", "house.FCStd", "Section", "--workers", "2"]
+    assert module.getArguments(argv) == ["house.FCStd", "Section", "--workers", "2"]
+    assert module.getArguments(["headless.py", "house.FCStd"]) == ["house.FCStd"]
+
+
+def test_exports_all_planes(headless, tmp_path):
+    module, freecad, batch = headless(makeDocument())
+
+    assert module.main(["headless.py", writeDocument(tmp_path), "--workers", "3"]) == 0
+
+    planes, workers = batch.exported
+    assert [p.Name for p in planes] == ["Section", "Section001"]
+    assert workers == 3
+    assert freecad.closed == ["House"]
+
+
+def test_selects_planes_by_name_or_label(headless, tmp_path):
+    module, _, batch = headless(makeDocument())
+
+    assert module.main(["headless.py", writeDocument(tmp_path), "First floor", "Section"]) == 0
+    assert [p.Name for p in batch.exported[0]] == ["Section001", "Section"]
+
+
+def test_missing_plane_fails(headless, tmp_path):
+    module, _, batch = headless(makeDocument())
+
+    assert module.main(["headless.py", writeDocument(tmp_path), "Section", "Roof"]) == 1
+    assert [p.Name for p in batch.exported[0]] == ["Section"]
+
+
+def test_no_planes_fails(headless, tmp_path):
+    module, freecad, batch = headless(makeDocument())
+
+    assert module.main(["headless.py", writeDocument(tmp_path), "Roof"]) == 1
+    assert batch.exported is None
+    assert freecad.closed == ["House"]
+
+
+def test_failed_export_fails(headless, tmp_path):
+    module, _, _ = headless(makeDocument(), errors=["Section001"])
+
+    assert module.main(["headless.py", writeDocument(tmp_path)]) == 1
+
+
+def test_unreadable_document_fails(headless):
+    module, freecad, batch = headless(None)
+
+    assert module.main(["headless.py", "missing.FCStd"]) == 1
+    assert batch.exported is None
+    assert freecad.closed == []
+
+
+def test_invalid_arguments_exit(headless):
+    module, _, _ = headless(makeDocument())
+
+    with pytest.raises(SystemExit) as e:
+        module.main(["headless.py", "house.FCStd", "--workers", "many"])
+
+    assert e.value.code == 2
+
+
+def test_read_stored_colors(headless, tmp_path):
+    module, _, _ = headless(makeDocument())
+    fileName = writeDocument(tmp_path,
+                             '<Document><ViewProviderData>'
+                             '<ViewProvider name="Wall"><Properties>'
+                             '<Property name="ShapeColor"><PropertyColor value="4278190335"/></Property>'
+                             '<Property name="Visibility"><Bool value="true"/></Property>'
+                             '</Properties></ViewProvider>'
+                             '</ViewProviderData></Document>')
+
+    assert module.readStoredColors(fileName) == {"Wall": {"ShapeColor": (1.0, 0.0, 0.0, 1.0)}}
+
+
+def test_read_stored_colors_without_gui_document(headless, tmp_path):
+    module, _, _ = headless(makeDocument())
+
+    assert module.readStoredColors(writeDocument(tmp_path)) == {}
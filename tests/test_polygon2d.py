@@ -0,0 +1,68 @@
+import numpy
+
+from app.polygon2d import Polygon2D
+
+
+def square(minimum, maximum):
+    return numpy.array([[minimum, minimum], [maximum, minimum],
+                        [maximum, maximum], [minimum, maximum]], dtype=float)
+
+
+def test_contains_polygon():
+    outer = Polygon2D([square(0, 10)])
+
+    assert outer.containsPolygon(Polygon2D([square(2, 8)]))
+    assert outer.containsPolygon(Polygon2D([square(0, 10)]))
+    assert not outer.containsPolygon(Polygon2D([square(5, 15)]))
+
+
+def test_contains_polygon_with_hole():
+    holed = Polygon2D([square(0, 10), square(4, 6)])
+
+    # The hole lies inside the other polygon, it is seen through the hole
+    assert not holed.containsPolygon(Polygon2D([square(2, 8)]))
+    # The hole crosses the other polygon
+    assert not holed.containsPolygon(Polygon2D([square(5, 9)]))
+    # The other polygon lies inside the hole
+    assert not holed.containsPolygon(Polygon2D([square(4.5, 5.5)]))
+    # The other polygon lies beside the hole
+    assert holed.containsPolygon(Polygon2D([square(7, 9)]))
+
+
+def test_from_points_skips_degenerated_holes():
+    points = numpy.concatenate([square(0, 10), [[4, 4], [6, 6]], square(7, 9)])
+    polygon = Polygon2D.fromPoints(points, [4, 2, 4])
+
+    assert len(polygon.rings) == 2
+    assert numpy.array_equal(polygon.rings[0], square(0, 10))
+    assert numpy.array_equal(polygon.rings[1], square(7, 9))
+
+
+def test_from_points_rejects_degenerated_outer_ring():
+    points = numpy.concatenate([[[0, 0], [5, 5], [0, 0]], square(2, 4)])
+
+    assert Polygon2D.fromPoints(points, [3, 4]) is None
+
+
+def test_clip_to_rectangle_inside_and_outside():
+    polygon = Polygon2D([square(2, 4)])
+
+    assert polygon.clipToRectangle((0, 0, 10, 10)) is polygon
+    assert polygon.clipToRectangle((5, 5, 10, 10)) is None
+
+
+def test_clip_to_rectangle_cuts_rings():
+    polygon = Polygon2D([square(0, 10), square(1, 3), square(6, 8)], reversed=True)
+    clipped = polygon.clipToRectangle((5, 0, 15, 10))
+
+    assert clipped.reversed
+    # The first hole lies outside of the rectangle and is dropped
+    assert len(clipped.rings) == 2
+    assert clipped.getBounds() == (5.0, 0.0, 10.0, 10.0)
+    assert numpy.array_equal(clipped.rings[1], square(6, 8))
+
+
+def test_clip_to_rectangle_drops_polygon_without_outer_ring():
+    polygon = Polygon2D([numpy.array([[0, 0], [10, 0], [0, 10]], dtype=float)])
+
+    assert polygon.clipToRectangle((6, 6, 10, 10)) is None
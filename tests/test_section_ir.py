@@ -0,0 +1,111 @@
+from types import SimpleNamespace
+
+import numpy
+
+from app import section_ir
+from app.polygon2d import Polygon2D
+
+
+def vector(x, y, z):
+    return SimpleNamespace(x=x, y=y, z=z)
+
+
+def face(rings, color, patternType, depth, reversed=False):
+    return SimpleNamespace(polygon=Polygon2D([numpy.array(r, dtype=float) for r in rings], reversed),
+                           color=color, pattern_type=patternType, depth=depth)
+
+
+class FakeRender:
+    "Provides what writeIntermediate reads from a Renderer"
+
+    def __init__(self):
+        placement = SimpleNamespace(Base=vector(1, 2, 3), Rotation=SimpleNamespace(Q=(0, 0, 0, 1)))
+
+        self.wp = SimpleNamespace(getPlacement=lambda: placement)
+        self.sections = []
+        self.secondaryFaces = []
+        self.windows = []
+        self.hiddenLines = []
+        self.sectionCuts = []
+
+    def prepareSvg(self):
+        pass
+
+    def getFaceDepth(self, f):
+        return f.depth
+
+
+def line(start, end):
+    return SimpleNamespace(Vertexes=[SimpleNamespace(Point=vector(*start)),
+                                     SimpleNamespace(Point=vector(*end))])
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "plane.sectionir")
+    render = FakeRender()
+    render.sections = [face([[[0, 0], [4, 0], [4, 4], [0, 4]], [[1, 1], [2, 1], [2, 2]]],
+                            (1.0, 0.0, 0.0), "wood", -2.5, reversed=True)]
+    render.secondaryFaces = [face([[[5, 5], [6, 5], [6, 6]]], (0.0, 1.0, 0.0, 0.5), None, 4.0)]
+    render.windows = [face([[[7, 0], [8, 0], [8, 1]]], (0.0, 0.0, 1.0), "glass", 0.0)]
+    render.hiddenLines = [numpy.array([[0, 0], [5, 5], [6, 1]], dtype=float),
+                          numpy.array([[1, 1], [2, 2]], dtype=float)]
+    render.sectionCuts = [(line((0, 0, 0), (10, 0, 0)), vector(0, 1, 0), "A")]
+
+    section_ir.writeIntermediate(path, render, "source key")
+
+    reader = section_ir.IntermediateReader(path)
+
+    assert reader.getSourceKey() == "source key"
+    assert reader.base == (1, 2, 3)
+    assert reader.rotation == (0, 0, 0, 1)
+
+    faces = list(reader.iterFaces())
+
+    assert [f[0] for f in faces] == ["sections", "secondaryFaces", "windows"]
+
+    for (layer, polygon, color, patternType, depth), expected in zip(
+            faces, render.sections + render.secondaryFaces + render.windows):
+        assert polygon.reversed == expected.polygon.reversed
+        assert len(polygon.rings) == len(expected.polygon.rings)
+
+        for ring, expectedRing in zip(polygon.rings, expected.polygon.rings):
+            assert numpy.array_equal(ring, expectedRing)
+
+        # Colors are stored with 4 components
+        assert color[0:len(expected.color)] == expected.color
+        assert patternType == expected.pattern_type
+        assert depth == expected.depth
+
+    polylines = reader.getPolylines()
+
+    assert len(polylines) == 2
+
+    for polyline, expected in zip(polylines, render.hiddenLines):
+        assert numpy.array_equal(polyline, expected)
+
+    assert len(reader.sectionCuts) == 1
+    assert reader.sectionCuts[0]["end"].tolist() == [10, 0, 0]
+    assert reader.sectionCuts[0]["normal"].tolist() == [0, 1, 0]
+    assert reader.strings[reader.sectionCuts[0]["text"]] == "A"
+
+
+def test_round_trip_of_empty_render(tmp_path):
+    path = str(tmp_path / "empty.sectionir")
+
+    section_ir.writeIntermediate(path, FakeRender(), "key")
+
+    reader = section_ir.IntermediateReader(path)
+
+    assert list(reader.iterFaces()) == []
+    assert reader.getPolylines() == []
+    assert len(reader.sectionCuts) == 0
+
+
+def test_file_can_be_replaced_after_reading(tmp_path):
+    path = str(tmp_path / "plane.sectionir")
+
+    section_ir.writeIntermediate(path, FakeRender(), "first")
+    section_ir.IntermediateReader(path)
+    section_ir.writeIntermediate(path, FakeRender(), "second")
+
+    assert section_ir.IntermediateReader(path).getSourceKey() == "second"
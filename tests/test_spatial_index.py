@@ -0,0 +1,31 @@
+import random
+
+from app.spatial_index import RTree, boundsIntersect
+
+
+def randomBounds(generator, size):
+    x = generator.uniform(0, 1000)
+    y = generator.uniform(0, 1000)
+
+    return (x, y, x + generator.uniform(0, size), y + generator.uniform(0, size))
+
+
+def test_query_matches_brute_force():
+    generator = random.Random(42)
+    items = [(randomBounds(generator, 50), i) for i in range(500)]
+    tree = RTree(items, nodeCapacity=8)
+
+    assert len(tree) == len(items)
+
+    for _ in range(200):
+        bounds = randomBounds(generator, 200)
+        expected = set([i for itemBounds, i in items if boundsIntersect(itemBounds, bounds)])
+
+        assert set(tree.query(bounds)) == expected
+
+
+def test_query_of_empty_tree():
+    tree = RTree([])
+
+    assert len(tree) == 0
+    assert list(tree.query((0, 0, 1, 1))) == []